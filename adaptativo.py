@@ -0,0 +1,310 @@
+#Huffman adaptativo (FGK) en una sola pasada: el codificador y el decodificador parten del
+#mismo árbol vacío y lo actualizan igual después de cada símbolo, así que no hace falta
+#conocer las frecuencias de antemano ni guardar una tabla
+#
+#  HUF | versión 6 | mensaje | mensaje | ...
+#  Un símbolo nuevo se emite como el código del nodo NYT seguido del símbolo crudo:
+#  en texto su UTF-8 (la marca de fin es el byte 0xFF), en modo bytes 9 bits (la marca es 256).
+#  flush() cierra el mensaje con la marca de fin, completa el byte y vuelve al árbol vacío
+from árbol_huffman import HuffmanNode
+from formato import (MAGIA, VERSION_ADAPTATIVA, MASCARA_VERSION, BANDERA_BYTES, es_modo_bytes,
+                     escribir_simbolo, largo_utf8)
+
+#Bytes que se leen por bloque al comprimir o descomprimir un flujo
+TAMANO_BLOQUE = 1 << 16
+
+FIN_TEXTO = 0xFF
+FIN_BYTES = 0x100
+BITS_CRUDO_BYTES = 9
+
+class NodoAdaptativo(HuffmanNode):
+    __slots__ = ("padre", "posicion")
+
+    def __init__(self, char=None, freq=0, padre=None):
+        super().__init__(char, freq)
+        self.padre = padre
+        #Lugar del nodo en ArbolAdaptativo.nodos
+        self.posicion = 0
+
+class ArbolAdaptativo:
+    def __init__(self):
+        #NYT: hoja de peso 0 que representa a los símbolos que todavía no aparecieron
+        self.nyt = NodoAdaptativo()
+        self.raiz = self.nyt
+        #Nodos por peso no creciente (propiedad de hermanos): la raíz primero, el NYT al final
+        self.nodos = [self.nyt]
+        self.hojas = {}
+
+    def codigo(self, nodo):
+        #(código, longitud) subiendo desde el nodo hasta la raíz
+        codigo = 0
+        longitud = 0
+        while nodo.padre is not None:
+            if nodo.padre.right is nodo:
+                codigo |= 1 << longitud
+            longitud += 1
+            nodo = nodo.padre
+        return codigo, longitud
+
+    def _lider(self, nodo):
+        #Primer nodo de la lista con el mismo peso; los anteriores pesan más
+        nodos = self.nodos
+        freq = nodo.freq
+        bajo, alto = 0, nodo.posicion
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            if nodos[medio].freq > freq:
+                bajo = medio + 1
+            else:
+                alto = medio
+        return nodos[bajo]
+
+    def _intercambiar(self, a, b):
+        padre_a, padre_b = a.padre, b.padre
+        if padre_a is padre_b:
+            padre_a.left, padre_a.right = padre_a.right, padre_a.left
+        else:
+            if padre_a.left is a:
+                padre_a.left = b
+            else:
+                padre_a.right = b
+            if padre_b.left is b:
+                padre_b.left = a
+            else:
+                padre_b.right = a
+        a.padre, b.padre = padre_b, padre_a
+
+        self.nodos[a.posicion], self.nodos[b.posicion] = b, a
+        a.posicion, b.posicion = b.posicion, a.posicion
+
+    def actualizar(self, char):
+        nodo = self.hojas.get(char)
+        if nodo is None:
+            #El NYT se divide en un NYT nuevo (izquierda) y la hoja del símbolo (derecha)
+            padre = self.nyt
+            nodo = NodoAdaptativo(char, 0, padre)
+            self.nyt = NodoAdaptativo(None, 0, padre)
+            padre.left, padre.right = self.nyt, nodo
+            nodo.posicion = len(self.nodos)
+            self.nyt.posicion = nodo.posicion + 1
+            self.nodos += (nodo, self.nyt)
+            self.hojas[char] = nodo
+
+        #Subir hasta la raíz llevando cada nodo al frente de su bloque antes de sumarle uno
+        while nodo is not None:
+            lider = self._lider(nodo)
+            if lider is not nodo and lider is not nodo.padre:
+                self._intercambiar(nodo, lider)
+            nodo.freq += 1
+            nodo = nodo.padre
+
+def _byte_version(modo_bytes):
+    return bytes([VERSION_ADAPTATIVA | (BANDERA_BYTES if modo_bytes else 0)])
+
+class CodificadorAdaptativo:
+    def __init__(self, modo_bytes=None):
+        #Si no se indica, el modo sale del tipo del primer trozo
+        self.modo_bytes = modo_bytes
+        self.arbol = ArbolAdaptativo()
+        self.acumulador = 0
+        self.bits_acumulados = 0
+        self.cabecera_escrita = False
+        self.total_bits = 0
+
+    def _cabecera(self):
+        if self.cabecera_escrita:
+            return bytearray()
+        self.cabecera_escrita = True
+        return bytearray(MAGIA + _byte_version(self.modo_bytes))
+
+    def _crudo(self, char):
+        if self.modo_bytes:
+            return char, BITS_CRUDO_BYTES
+        crudo = escribir_simbolo(char)
+        return int.from_bytes(crudo, byteorder="big"), len(crudo) * 8
+
+    def feed(self, datos):
+        #Devuelve los bytes completos; los bits sobrantes esperan al siguiente trozo
+        if self.modo_bytes is None:
+            self.modo_bytes = es_modo_bytes(datos)
+        salida = self._cabecera()
+        arbol = self.arbol
+        hojas = arbol.hojas
+        acumulador = self.acumulador
+        bits_acumulados = self.bits_acumulados
+
+        for c in datos:
+            hoja = hojas.get(c)
+            if hoja is None:
+                codigo, longitud = arbol.codigo(arbol.nyt)
+                crudo, largo = self._crudo(c)
+                codigo = (codigo << largo) | crudo
+                longitud += largo
+            else:
+                codigo, longitud = arbol.codigo(hoja)
+            arbol.actualizar(c)
+
+            acumulador = (acumulador << longitud) | codigo
+            bits_acumulados += longitud
+            self.total_bits += longitud
+            if bits_acumulados >= 64:
+                bits_acumulados -= 64
+                salida += (acumulador >> bits_acumulados).to_bytes(8, byteorder="big")
+                acumulador &= (1 << bits_acumulados) - 1
+
+        completos = bits_acumulados - bits_acumulados % 8
+        if completos:
+            bits_acumulados -= completos
+            salida += (acumulador >> bits_acumulados).to_bytes(completos // 8, byteorder="big")
+            acumulador &= (1 << bits_acumulados) - 1
+
+        self.acumulador = acumulador
+        self.bits_acumulados = bits_acumulados
+        return bytes(salida)
+
+    def flush(self):
+        #Cierra el mensaje actual; lo siguiente que se codifique empieza con el árbol vacío
+        if self.modo_bytes is None:
+            self.modo_bytes = False
+        salida = self._cabecera()
+
+        codigo, longitud = self.arbol.codigo(self.arbol.nyt)
+        fin, largo = (FIN_BYTES, BITS_CRUDO_BYTES) if self.modo_bytes else (FIN_TEXTO, 8)
+        acumulador = (((self.acumulador << longitud) | codigo) << largo) | fin
+        bits_acumulados = self.bits_acumulados + longitud + largo
+        self.total_bits += longitud + largo
+
+        padding = (8 - bits_acumulados % 8) % 8
+        salida += (acumulador << padding).to_bytes((bits_acumulados + padding) // 8, byteorder="big")
+
+        self.arbol = ArbolAdaptativo()
+        self.acumulador = 0
+        self.bits_acumulados = 0
+        return bytes(salida)
+
+class DecodificadorAdaptativo:
+    def __init__(self):
+        self.arbol = ArbolAdaptativo()
+        self.nodo = self.arbol.raiz
+        self.buffer = 0
+        self.bits_buffer = 0
+        #El modo se conoce al leer la cabecera
+        self.modo_bytes = None
+        self.pendiente = b""
+
+    def _leer_cabecera(self, datos):
+        self.pendiente += bytes(datos)
+        if len(self.pendiente) < len(MAGIA) + 1:
+            return None
+        version = self.pendiente[len(MAGIA)]
+        if self.pendiente[:len(MAGIA)] != MAGIA or version & MASCARA_VERSION != VERSION_ADAPTATIVA:
+            raise ValueError("El flujo no tiene el formato de Huffman adaptativo")
+        self.modo_bytes = bool(version & BANDERA_BYTES)
+        datos = self.pendiente[len(MAGIA) + 1:]
+        self.pendiente = b""
+        return datos
+
+    def feed(self, datos):
+        #Devuelve todo lo que ya se puede decodificar con los bytes recibidos, o None mientras
+        #no llegue la cabecera y no se sepa si la salida es texto o bytes
+        if self.modo_bytes is None:
+            datos = self._leer_cabecera(datos)
+            if datos is None:
+                return None
+
+        salida = bytearray() if self.modo_bytes else []
+        agregar = salida.append
+        arbol = self.arbol
+        nodo = self.nodo
+        buffer = self.buffer
+        bits_buffer = self.bits_buffer
+
+        for byte in datos:
+            buffer = (buffer << 8) | byte
+            bits_buffer += 8
+
+            while True:
+                if nodo.left is not None:
+                    #Nodo interno: bajar un bit
+                    if not bits_buffer:
+                        break
+                    bits_buffer -= 1
+                    nodo = nodo.right if (buffer >> bits_buffer) & 1 else nodo.left
+                    continue
+
+                fin = False
+                if nodo is not arbol.nyt:
+                    char = nodo.char
+                elif self.modo_bytes:
+                    if bits_buffer < BITS_CRUDO_BYTES:
+                        break
+                    bits_buffer -= BITS_CRUDO_BYTES
+                    char = (buffer >> bits_buffer) & ((1 << BITS_CRUDO_BYTES) - 1)
+                    fin = char == FIN_BYTES
+                else:
+                    if bits_buffer < 8:
+                        break
+                    primero = (buffer >> (bits_buffer - 8)) & 0xFF
+                    fin = primero == FIN_TEXTO
+                    largo = 1 if fin else largo_utf8(primero)
+                    if bits_buffer < largo * 8:
+                        break
+                    bits_buffer -= largo * 8
+                    crudo = (buffer >> bits_buffer) & ((1 << (largo * 8)) - 1)
+                    char = crudo.to_bytes(largo, byteorder="big").decode("utf-8", "surrogatepass") if not fin else None
+
+                if fin:
+                    #Fin del mensaje: se descarta el relleno y se vuelve al árbol vacío
+                    bits_buffer -= bits_buffer % 8
+                    self.arbol = arbol = ArbolAdaptativo()
+                else:
+                    agregar(char)
+                    arbol.actualizar(char)
+                nodo = arbol.raiz
+
+            buffer &= (1 << bits_buffer) - 1
+
+        self.nodo = nodo
+        self.buffer = buffer
+        self.bits_buffer = bits_buffer
+        return bytes(salida) if self.modo_bytes else "".join(salida)
+
+    def flush(self):
+        #Solo se puede terminar entre mensajes, justo después de una marca de fin.
+        #Un flujo vacío no tiene cabecera: no hay modo y se devuelve None
+        if self.pendiente:
+            raise ValueError("El flujo adaptativo terminó dentro de la cabecera")
+        if self.arbol.raiz is not self.arbol.nyt or self.bits_buffer:
+            raise ValueError("El flujo adaptativo terminó antes de la marca de fin")
+        if self.modo_bytes is None:
+            return None
+        return b"" if self.modo_bytes else ""
+
+def comprimir_adaptativo(reader, writer, tamano_bloque=TAMANO_BLOQUE):
+    #Una sola pasada: cada trozo se escribe apenas se codifica
+    codificador = CodificadorAdaptativo(es_modo_bytes(reader.read(0)))
+    while True:
+        trozo = reader.read(tamano_bloque)
+        if not trozo:
+            break
+        writer.write(codificador.feed(trozo))
+    writer.write(codificador.flush())
+    return codificador.total_bits
+
+def iterar_descompresion_adaptativa(reader, tamano_bloque=TAMANO_BLOQUE):
+    #Lo decodificado de cada trozo leído, sin partes vacías
+    decodificador = DecodificadorAdaptativo()
+    while True:
+        trozo = reader.read(tamano_bloque)
+        if not trozo:
+            break
+        parte = decodificador.feed(trozo)
+        if parte:
+            yield parte
+    parte = decodificador.flush()
+    if parte:
+        yield parte
+
+def descomprimir_adaptativo(reader, writer, tamano_bloque=TAMANO_BLOQUE):
+    for parte in iterar_descompresion_adaptativa(reader, tamano_bloque):
+        writer.write(parte)
@@ -0,0 +1,84 @@
+#Texto que crece por trozos con memoria acotada: los últimos caracteres quedan en memoria y
+#los trozos anteriores se bajan a un archivo temporal, con un índice para leer cualquier rango
+import tempfile
+from bisect import bisect_right
+
+#Caracteres que se mantienen en memoria
+LIMITE_MEMORIA = 1 << 22
+
+class AlmacenTexto:
+    def __init__(self, limite_memoria=LIMITE_MEMORIA):
+        self.limite_memoria = limite_memoria
+        self.total = 0
+
+        #Trozos en memoria y el carácter donde empieza cada uno
+        self.trozos = []
+        self.inicios = []
+        self.caracteres_memoria = 0
+
+        #Trozos en disco: carácter donde empieza, posición en el archivo y largo en bytes
+        self.archivo = None
+        self.inicios_disco = []
+        self.ubicaciones_disco = []
+        #Último trozo leído del disco, porque al desplazarse se lee varias veces seguidas
+        self.ultimo_leido = (None, "")
+
+    def __len__(self):
+        return self.total
+
+    def agregar(self, texto):
+        if not texto:
+            return
+        self.trozos.append(texto)
+        self.inicios.append(self.total)
+        self.total += len(texto)
+        self.caracteres_memoria += len(texto)
+
+        #El último trozo siempre queda en memoria aunque pase el límite
+        while self.caracteres_memoria > self.limite_memoria and len(self.trozos) > 1:
+            self._bajar_a_disco()
+
+    def _bajar_a_disco(self):
+        if self.archivo is None:
+            self.archivo = tempfile.TemporaryFile()
+        texto = self.trozos.pop(0)
+        datos = texto.encode("utf-8", "surrogatepass")
+        self.archivo.seek(0, 2)
+        self.inicios_disco.append(self.inicios.pop(0))
+        self.ubicaciones_disco.append((self.archivo.tell(), len(datos)))
+        self.archivo.write(datos)
+        self.caracteres_memoria -= len(texto)
+
+    def _trozo_disco(self, indice):
+        if self.ultimo_leido[0] != indice:
+            posicion, largo = self.ubicaciones_disco[indice]
+            self.archivo.seek(posicion)
+            self.ultimo_leido = (indice, self.archivo.read(largo).decode("utf-8", "surrogatepass"))
+        return self.ultimo_leido[1]
+
+    def leer(self, inicio, fin):
+        #Caracteres de inicio a fin (sin incluir fin)
+        fin = min(fin, self.total)
+        if inicio >= fin:
+            return ""
+
+        partes = []
+        inicio_memoria = self.inicios[0] if self.inicios else self.total
+        if inicio < inicio_memoria:
+            k = max(bisect_right(self.inicios_disco, inicio) - 1, 0)
+            while k < len(self.inicios_disco) and self.inicios_disco[k] < fin:
+                comienzo = self.inicios_disco[k]
+                partes.append(self._trozo_disco(k)[max(inicio - comienzo, 0):fin - comienzo])
+                k += 1
+
+        k = max(bisect_right(self.inicios, inicio) - 1, 0)
+        while k < len(self.trozos) and self.inicios[k] < fin:
+            comienzo = self.inicios[k]
+            partes.append(self.trozos[k][max(inicio - comienzo, 0):fin - comienzo])
+            k += 1
+        return "".join(partes)
+
+    def cerrar(self):
+        if self.archivo is not None:
+            self.archivo.close()
+            self.archivo = None
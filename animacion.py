@@ -0,0 +1,79 @@
+#Modelo de la animación de decodificación: el comienzo del mensaje se decodifica de una vez con
+#las tablas y se guarda en qué bit empieza cada símbolo, así la animación puede saltar a
+#cualquier bit o carácter sin recorrer el árbol desde el principio
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+
+from árbol_huffman import calcular_longitudes, raiz_de
+from desencriptar import iterar_decodificacion
+
+#Bytes del cuerpo por trozo al decodificar
+TAMANO_TROZO = 1 << 16
+
+class ModeloAnimacion:
+    def __init__(self, arbol, cuerpo_codificado, padding, tablas, limite_bits=None):
+        #limite_bits: solo se animan los símbolos que terminan antes de ese bit.
+        #El árbol puede ser de HuffmanNode o un ArbolCompacto, que se recorre con sus vistas
+        self.arbol = raiz_de(arbol)
+        total_bits = len(cuerpo_codificado) * 8 - padding
+        limite = total_bits if limite_bits is None else min(limite_bits, total_bits)
+        longitudes = calcular_longitudes(arbol)
+
+        partes = []
+        if limite > 0:
+            trozos = (cuerpo_codificado[i:i+TAMANO_TROZO] for i in range(0, len(cuerpo_codificado), TAMANO_TROZO))
+            decodificados = 0
+            for parte in iterar_decodificacion(trozos, padding, tablas):
+                partes.append(parte)
+                decodificados += sum(map(longitudes.__getitem__, parte))
+                if decodificados >= limite:
+                    break
+        mensaje = tablas.vacio.join(partes)
+
+        #inicios[k]: bit donde empieza el símbolo k; el último valor es el final del último símbolo
+        self.inicios = array("Q", accumulate(map(longitudes.__getitem__, mensaje), initial=0))
+        cantidad = bisect_right(self.inicios, limite) - 1
+        del self.inicios[cantidad + 1:]
+        self.simbolos = mensaje[:cantidad]
+        self.total_bits = self.inicios[-1]
+        self.datos = bytes(cuerpo_codificado[:(self.total_bits + 7) // 8])
+
+    def __len__(self):
+        return len(self.simbolos)
+
+    def bit(self, posicion):
+        return (self.datos[posicion >> 3] >> (7 - (posicion & 7))) & 1
+
+    def simbolos_completos(self, posicion):
+        #Símbolos que terminan dentro de los primeros `posicion` bits
+        return bisect_right(self.inicios, posicion) - 1
+
+    def inicio_simbolo(self, indice):
+        return self.inicios[min(max(indice, 0), len(self.simbolos))]
+
+    def estado(self, posicion):
+        #(camino desde la raíz, nodo actual, nodo visitado) después de leer `posicion` bits
+        simbolo = self.simbolos_completos(posicion)
+        desde = self.inicios[simbolo]
+        if posicion == desde and simbolo > 0:
+            #Se acaba de terminar un símbolo: su camino hasta la hoja se sigue mostrando
+            desde = self.inicios[simbolo - 1]
+
+        nodo = self.arbol
+        camino = [nodo]
+        for i in range(desde, posicion):
+            nodo = nodo.right if self.bit(i) else nodo.left
+            camino.append(nodo)
+        visitado = camino[-2] if len(camino) > 1 else None
+        #Al llegar a una hoja el recorrido vuelve a la raíz
+        actual = self.arbol if nodo.left is None and nodo.right is None else nodo
+        return camino, actual, visitado
+
+    def texto(self, posicion, ultimos=None):
+        #Mensaje decodificado hasta el bit `posicion`; con `ultimos`, solo esa cantidad de caracteres
+        fin = self.simbolos_completos(posicion)
+        inicio = 0 if ultimos is None else max(fin - ultimos, 0)
+        parte = self.simbolos[inicio:fin]
+        #En modo bytes cada byte se muestra como el carácter de su valor
+        return parte if isinstance(parte, str) else parte.decode("latin-1")
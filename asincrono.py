@@ -0,0 +1,184 @@
+#API asyncio del códec, para servicios que atienden muchas peticiones en un mismo proceso.
+#El bucle de eventos solo coordina: la E/S de archivos corre en hilos y el trabajo de CPU
+#(conteo, codificación y decodificación de bloques) en el executor que se indique, de hilos o de
+#procesos. Se comprime al formato por bloques (versión 3) porque sus bloques se codifican y
+#decodifican por separado; cada petición tiene a lo sumo `en_vuelo` bloques en el executor
+import asyncio
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import aclosing
+
+from adaptativo import iterar_descompresion_adaptativa
+from árbol_huffman import (calcular_frecuencias, construir_arbol_huffman, calcular_longitudes,
+                           generar_codigos_canonicos)
+from bloques import (TAMANO_BLOQUE, _codificar_bloque, escribir_cabecera_bloques, escribir_indice_bloques,
+                     leer_indice_bloques)
+from desencriptar import CACHE_TABLAS, decodificar_cuerpo, iterar_descompresion
+from formato import MAGIA, VERSION_BLOQUES, VERSION_ADAPTATIVA, es_modo_bytes, leer_version
+
+#Bloques de una petición que pueden estar en el executor a la vez
+EN_VUELO = 4
+#Bytes por lectura en los formatos que se decodifican como un solo flujo
+TAMANO_LECTURA = 1 << 16
+
+async def _en_hilo(funcion, *argumentos, executor=None):
+    #Llamada bloqueante en un hilo (por defecto, el executor del bucle). Si la tarea se cancela, se
+    #espera a que termine la llamada en curso para no cerrar el archivo mientras otro hilo lo usa
+    futuro = asyncio.get_running_loop().run_in_executor(executor, funcion, *argumentos)
+    try:
+        return await asyncio.shield(futuro)
+    except asyncio.CancelledError:
+        await asyncio.wait((futuro,))
+        raise
+
+def _descartar(archivo, borrar):
+    #Cierra el archivo y, si era una salida a medias, lo borra
+    archivo.close()
+    if borrar:
+        os.remove(archivo.name)
+
+async def _abrir(ruta, modo):
+    #open en un hilo. Si la tarea se cancela mientras el hilo abre, el archivo que entregue se cierra
+    #(y se borra, si se abrió para escribir) en vez de quedar abierto sin dueño
+    futuro = asyncio.get_running_loop().run_in_executor(None, open, ruta, modo)
+    try:
+        return await asyncio.shield(futuro)
+    except asyncio.CancelledError:
+        await asyncio.wait((futuro,))
+        if futuro.exception() is None:
+            await _en_hilo(_descartar, futuro.result(), "w" in modo)
+        raise
+
+async def _asincrono(iterable):
+    for elemento in iterable:
+        yield elemento
+
+async def _en_orden(executor, funcion, argumentos, en_vuelo):
+    #Resultados de funcion(*args) para cada args del iterable asíncrono, en orden. No se envía una
+    #llamada nueva hasta que se consume la más antigua, así el consumidor marca el ritmo
+    loop = asyncio.get_running_loop()
+    pendientes = deque()
+    try:
+        async for args in argumentos:
+            pendientes.append(loop.run_in_executor(executor, funcion, *args))
+            if len(pendientes) >= en_vuelo:
+                yield await pendientes.popleft()
+        while pendientes:
+            yield await pendientes.popleft()
+    finally:
+        #Al cancelar o dejar de consumir, las llamadas que no empezaron ya no se ejecutan
+        for futuro in pendientes:
+            futuro.cancel()
+
+def _trozos(mensaje, tamano_bloque, modo_bytes):
+    for i in range(0, len(mensaje), tamano_bloque):
+        yield bytes(mensaje[i:i+tamano_bloque]) if modo_bytes else mensaje[i:i+tamano_bloque]
+
+async def comprimir_mensaje_async(mensaje, destino, executor=None, tamano_bloque=TAMANO_BLOQUE, en_vuelo=EN_VUELO):
+    #destino: ruta del .bin o un asyncio.StreamWriter. Devuelve el índice de bloques
+    modo_bytes = es_modo_bytes(mensaje)
+
+    frecuencias = {}
+    argumentos = _asincrono((trozo,) for trozo in _trozos(mensaje, tamano_bloque, modo_bytes))
+    async with aclosing(_en_orden(executor, calcular_frecuencias, argumentos, en_vuelo)) as conteos:
+        async for parciales in conteos:
+            for char, freq in parciales.items():
+                frecuencias[char] = frecuencias.get(char, 0) + freq
+
+    longitudes = calcular_longitudes(construir_arbol_huffman(frecuencias, compacto=True))
+    codigos = generar_codigos_canonicos(longitudes)
+
+    escritor = destino if hasattr(destino, "drain") else None
+    archivo = await _abrir(destino, "wb") if escritor is None else None
+
+    async def escribir(datos):
+        if escritor is None:
+            await _en_hilo(archivo.write, datos)
+        else:
+            escritor.write(datos)
+            #drain espera mientras el otro extremo no lea
+            await escritor.drain()
+
+    indice = []
+    try:
+        cabecera = io.BytesIO()
+        escribir_cabecera_bloques(cabecera, longitudes, modo_bytes)
+        posicion = cabecera.tell()
+        await escribir(cabecera.getvalue())
+
+        argumentos = _asincrono((trozo, codigos) for trozo in _trozos(mensaje, tamano_bloque, modo_bytes))
+        async with aclosing(_en_orden(executor, _codificar_bloque, argumentos, en_vuelo)) as bloques:
+            async for bytes_codificados, padding in bloques:
+                indice.append((posicion, len(bytes_codificados), padding))
+                await escribir(bytes_codificados)
+                posicion += len(bytes_codificados)
+
+        pie = io.BytesIO()
+        escribir_indice_bloques(pie, indice, posicion)
+        await escribir(pie.getvalue())
+    except BaseException:
+        #Cancelada o con error: no queda un .bin a medias. Cerrar y borrar también van en un hilo
+        if archivo is not None:
+            await _en_hilo(_descartar, archivo, True)
+        raise
+
+    if archivo is not None:
+        await _en_hilo(archivo.close)
+    return indice
+
+def _decodificar_con_tabla(longitudes, modo_bytes, cuerpo_codificado, padding):
+    #Corre en el executor; cada proceso construye la tabla una vez y la toma de su caché
+    tablas = CACHE_TABLAS.tablas({"longitudes": longitudes, "modo_bytes": modo_bytes})
+    return decodificar_cuerpo(cuerpo_codificado, padding, tablas)
+
+def _leer_en(f, posicion, largo):
+    f.seek(posicion)
+    return f.read(largo)
+
+async def descomprimir_async(nombre_archivo, executor=None, en_vuelo=EN_VUELO, tamano_lectura=TAMANO_LECTURA):
+    #Generador asíncrono de los trozos decodificados, en orden. Solo se adelantan `en_vuelo`
+    #bloques: si el consumidor se demora, no se lee ni se decodifica más
+    archivo = await _abrir(nombre_archivo, "rb")
+    try:
+        version, _ = leer_version(await _en_hilo(archivo.read, len(MAGIA) + 1))
+        await _en_hilo(archivo.seek, 0)
+
+        if version == VERSION_BLOQUES:
+            longitudes, indice, modo_bytes = await _en_hilo(leer_indice_bloques, archivo)
+
+            async def bloques():
+                for posicion, largo, padding in indice:
+                    yield longitudes, modo_bytes, await _en_hilo(_leer_en, archivo, posicion, largo), padding
+
+            async with aclosing(_en_orden(executor, _decodificar_con_tabla, bloques(), en_vuelo)) as partes:
+                async for parte in partes:
+                    yield parte
+            return
+
+        #Los demás formatos son un solo flujo con estado: se decodifica trozo a trozo en un hilo,
+        #en el executor indicado si es de hilos
+        if version == VERSION_ADAPTATIVA:
+            partes = iterar_descompresion_adaptativa(archivo, tamano_lectura)
+        else:
+            partes = iterar_descompresion(archivo, tamano_lectura)
+        hilos = None if isinstance(executor, ProcessPoolExecutor) else executor
+        while (parte := await _en_hilo(next, partes, None, executor=hilos)) is not None:
+            yield parte
+    finally:
+        await _en_hilo(archivo.close)
+
+def _leer_inicio(nombre_archivo):
+    with open(nombre_archivo, "rb") as f:
+        return f.read(len(MAGIA) + 1)
+
+async def leer_y_decomprimir_async(nombre_archivo, executor=None, en_vuelo=EN_VUELO):
+    partes = []
+    async with aclosing(descomprimir_async(nombre_archivo, executor, en_vuelo)) as trozos:
+        async for parte in trozos:
+            partes.append(parte)
+    if partes:
+        return partes[0][:0].join(partes)
+    _, modo_bytes = leer_version(await _en_hilo(_leer_inicio, nombre_archivo))
+    return b"" if modo_bytes else ""
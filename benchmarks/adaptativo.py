@@ -0,0 +1,45 @@
+"""
+Benchmark del Huffman adaptativo frente al modo estático de dos pasadas
+Uso: python -m benchmarks.adaptativo [KB ...]   (por defecto 100 1000)
+"""
+import io
+import sys
+import time
+
+from adaptativo import comprimir_adaptativo, descomprimir_adaptativo
+from benchmarks.decodificador import generar_texto
+from encriptar import comprimir_stream
+from desencriptar import descomprimir_stream
+
+def medir(comprimir, descomprimir, mensaje):
+    entrada = io.BytesIO(mensaje)
+    comprimido = io.BytesIO()
+    inicio = time.perf_counter()
+    comprimir(entrada, comprimido)
+    codificacion = time.perf_counter() - inicio
+
+    comprimido.seek(0)
+    salida = io.BytesIO()
+    inicio = time.perf_counter()
+    descomprimir(comprimido, salida)
+    decodificacion = time.perf_counter() - inicio
+
+    if salida.getvalue() != mensaje:
+        raise AssertionError("El mensaje decodificado no coincide")
+    return codificacion, decodificacion, len(comprimido.getvalue())
+
+def main(argumentos):
+    tamanos = [int(a) for a in argumentos] or [100, 1000]
+    modos = [("estático", comprimir_stream, descomprimir_stream),
+             ("adaptativo", comprimir_adaptativo, descomprimir_adaptativo)]
+    print(f"{'Tamaño':>8} {'Modo':>11} {'Cod. MB/s':>10} {'Dec. MB/s':>10} {'Ratio':>7}")
+    for kilobytes in tamanos:
+        mensaje = generar_texto(kilobytes * 1024).encode("utf-8")
+        megabytes = len(mensaje) / (1 << 20)
+        for nombre, comprimir, descomprimir in modos:
+            codificacion, decodificacion, tamano = medir(comprimir, descomprimir, mensaje)
+            print(f"{kilobytes:>6}KB {nombre:>11} {megabytes / codificacion:>10.2f} "
+                  f"{megabytes / decodificacion:>10.2f} {tamano / len(mensaje):>7.3f}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
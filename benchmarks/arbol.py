@@ -0,0 +1,33 @@
+"""
+Benchmark de construcción del árbol según el tamaño del alfabeto
+Uso: python -m benchmarks.arbol [símbolos ...]   (por defecto 256 a 65536)
+La última columna construye el ArbolCompacto, sin pasar a HuffmanNode
+"""
+import random
+import sys
+import time
+from functools import partial
+
+from árbol_huffman import construir_arbol_huffman
+
+def generar_frecuencias(cantidad, semilla=2920):
+    aleatorio = random.Random(semilla)
+    return {chr(0x100 + i): aleatorio.randint(1, 1 << 20) for i in range(cantidad)}
+
+def medir(construir, frecuencias):
+    inicio = time.perf_counter()
+    construir(frecuencias)
+    return time.perf_counter() - inicio
+
+def main(argumentos):
+    tamanos = [int(a) for a in argumentos] or [256, 1024, 4096, 16384, 65536]
+    print(f"{'Símbolos':>9} {'Heap (s)':>10} {'Ordenadas (s)':>14} {'Compacto (s)':>13}")
+    for cantidad in tamanos:
+        frecuencias = generar_frecuencias(cantidad)
+        ordenadas = dict(sorted(frecuencias.items(), key=lambda par: par[1]))
+        print(f"{cantidad:>9} {medir(construir_arbol_huffman, frecuencias):>10.4f} "
+              f"{medir(construir_arbol_huffman, ordenadas):>14.4f} "
+              f"{medir(partial(construir_arbol_huffman, compacto=True), frecuencias):>13.4f}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
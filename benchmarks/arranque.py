@@ -0,0 +1,66 @@
+"""
+Latencia de import del núcleo del códec
+Uso: python -m benchmarks.arranque [--repeticiones N]   (por defecto 10)
+Cada medición corre en un intérprete nuevo, así que ningún módulo está importado de antes.
+Se informa el mejor tiempo y la mediana, y si el import arrastró NumPy o PyQt6
+"""
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+#(nombre, código que se mide)
+IMPORTS = (
+    ("nucleo", "import nucleo"),
+    ("nucleo + primer uso", "import nucleo; nucleo.comprimir_mensaje; nucleo.leer_y_decomprimir"),
+    ("encriptar", "import encriptar"),
+    ("desencriptar", "import desencriptar"),
+    ("lote", "import lote"),
+    ("main (interfaz)", "import main"),
+)
+
+_MEDIR = """
+import sys, time
+inicio = time.perf_counter()
+{codigo}
+segundos = time.perf_counter() - inicio
+print(repr((segundos, "numpy" in sys.modules, "PyQt6" in sys.modules)))
+"""
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def medir(codigo, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, "-c", _MEDIR.format(codigo=codigo)], cwd=RAIZ,
+                                capture_output=True, text=True, check=True).stdout
+        segundos, con_numpy, con_qt = eval(salida)
+        tiempos.append(segundos)
+    return {"mejor": min(tiempos), "mediana": statistics.median(tiempos), "numpy": con_numpy, "pyqt6": con_qt}
+
+def main(argumentos):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.arranque", description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--json", help="archivo donde guardar los resultados")
+    opciones = parser.parse_args(argumentos)
+
+    hay_qt = importlib.util.find_spec("PyQt6") is not None
+    resultados = {}
+    print(f"{'Import':<22} {'Mejor (ms)':>11} {'Mediana (ms)':>13} {'NumPy':>6} {'PyQt6':>6}")
+    for nombre, codigo in IMPORTS:
+        if codigo == "import main" and not hay_qt:
+            print(f"{nombre:<22} {'(PyQt6 no está instalado)':>26}")
+            continue
+        medida = resultados[nombre] = medir(codigo, opciones.repeticiones)
+        print(f"{nombre:<22} {medida['mejor'] * 1e3:>11.2f} {medida['mediana'] * 1e3:>13.2f} "
+              f"{'sí' if medida['numpy'] else 'no':>6} {'sí' if medida['pyqt6'] else 'no':>6}")
+
+    if opciones.json:
+        with open(opciones.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
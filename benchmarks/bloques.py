@@ -0,0 +1,50 @@
+"""
+Benchmark del formato por bloques con distinta cantidad de procesos
+Uso: python -m benchmarks.bloques [MB] [procesos ...]   (por defecto 100 MB con 1 2 4 8)
+La aceleración de la descompresión es contra iterar_bloques, que decodifica el mismo archivo en
+el proceso actual; la de la compresión, contra la primera cantidad de procesos
+"""
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.decodificador import generar_texto
+from bloques import comprimir_bloques, descomprimir_bloques, iterar_bloques
+
+def main(argumentos):
+    megabytes = int(argumentos[0]) if argumentos else 100
+    cantidades = [int(a) for a in argumentos[1:]] or [1, 2, 4, 8]
+    mensaje = generar_texto(1 << 20) * megabytes
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        archivo = os.path.join(carpeta, "bloques.bin")
+        print(f"{megabytes} MB, {os.cpu_count()} CPU")
+        comprimir_bloques(mensaje, archivo)
+        inicio = time.perf_counter()
+        with open(archivo, "rb") as f:
+            resultado = "".join(iterar_bloques(f))
+        secuencial = time.perf_counter() - inicio
+        if resultado != mensaje:
+            raise AssertionError("El mensaje decodificado no coincide")
+        print(f"Descompresión en este proceso: {secuencial:.2f} s")
+
+        print(f"{'Procesos':>8} {'Comprimir (s)':>14} {'Aceleración':>12} {'Descomprimir (s)':>17} {'Aceleración':>12}")
+        base = None
+        for procesos in cantidades:
+            inicio = time.perf_counter()
+            comprimir_bloques(mensaje, archivo, procesos=procesos)
+            compresion = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            resultado = descomprimir_bloques(archivo, procesos=procesos)
+            descompresion = time.perf_counter() - inicio
+            if resultado != mensaje:
+                raise AssertionError("El mensaje decodificado no coincide")
+
+            base = base or compresion
+            print(f"{procesos:>8} {compresion:>14.2f} {base / compresion:>11.2f}x "
+                  f"{descompresion:>17.2f} {secuencial / descompresion:>11.2f}x")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
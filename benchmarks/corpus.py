@@ -0,0 +1,73 @@
+"""
+Corpus sintéticos reproducibles para los benchmarks
+Cada corpus genera una muestra de hasta 1 M caracteres con una semilla fija y la repite
+hasta el tamaño pedido, así los archivos grandes no tardan en generarse
+"""
+import random
+
+#Caracteres generados como máximo; el resto del corpus repite la muestra
+TAMANO_MUESTRA = 1 << 20
+
+PALABRAS_INGLES = ("the of and to a in is it you that he was for on are with as I his they be at "
+                   "one have this from or had by hot word but what some we can out other were all "
+                   "there when up use your how said an each she which do their time if will way "
+                   "about many then them write would like so these her long make thing see him two "
+                   "has look more day could go come did number sound no most people my over know "
+                   "water than call first who may down side been now find any new work part take "
+                   "get place made live where after back little only round man year came show every "
+                   "good me give our under name very through just form sentence great think say").split()
+
+def _zipf(cantidad):
+    return [1 / (i + 1) for i in range(cantidad)]
+
+def _repetir(muestra, tamano):
+    veces = -(-tamano // len(muestra))
+    return (muestra * veces)[:tamano]
+
+def uniforme(tamano, semilla):
+    aleatorio = random.Random(semilla)
+    alfabeto = [chr(c) for c in range(32, 127)]
+    return "".join(aleatorio.choices(alfabeto, k=tamano))
+
+def zipf(tamano, semilla):
+    aleatorio = random.Random(semilla)
+    alfabeto = [chr(c) for c in range(32, 288)]
+    return "".join(aleatorio.choices(alfabeto, weights=_zipf(len(alfabeto)), k=tamano))
+
+def ingles(tamano, semilla):
+    aleatorio = random.Random(semilla)
+    pesos = _zipf(len(PALABRAS_INGLES))
+    partes = []
+    total = 0
+    while total < tamano:
+        frase = " ".join(aleatorio.choices(PALABRAS_INGLES, weights=pesos, k=14))
+        frase = frase[0].upper() + frase[1:] + ". "
+        partes.append(frase)
+        total += len(frase)
+    return "".join(partes)[:tamano]
+
+def unicode(tamano, semilla):
+    #CJK, cirílico, griego, acentos y emojis, con pesos de Zipf
+    aleatorio = random.Random(semilla)
+    alfabeto = ([chr(c) for c in range(0x4E00, 0x4E00 + 2000)] + [chr(c) for c in range(0x0410, 0x0450)]
+                + [chr(c) for c in range(0x03B1, 0x03CA)] + list("áéíóúñüçàèâêô ")
+                + [chr(c) for c in range(0x1F600, 0x1F650)])
+    aleatorio.shuffle(alfabeto)
+    return "".join(aleatorio.choices(alfabeto, weights=_zipf(len(alfabeto)), k=tamano))
+
+def alfabeto_pequeno(tamano, semilla):
+    aleatorio = random.Random(semilla)
+    return "".join(aleatorio.choices("ACGT", weights=(5, 2, 2, 1), k=tamano))
+
+CORPUS = {
+    "uniforme": uniforme,
+    "zipf": zipf,
+    "ingles": ingles,
+    "unicode": unicode,
+    "alfabeto_pequeno": alfabeto_pequeno,
+}
+
+def generar(nombre, tamano, semilla=2920):
+    #Texto de `tamano` caracteres
+    muestra = CORPUS[nombre](min(tamano, TAMANO_MUESTRA), semilla)
+    return _repetir(muestra, tamano) if tamano > len(muestra) else muestra
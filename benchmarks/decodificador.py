@@ -0,0 +1,92 @@
+"""
+Benchmark del decodificador por tablas frente al recorrido bit a bit del árbol
+Uso: python -m benchmarks.decodificador [MB ...]   (por defecto 1 10 100)
+El recorrido es el decodificar_mensaje anterior a las tablas; se mide sobre el texto de bits ya
+convertido y solo hasta LIMITE_RECORRIDO, porque ese texto ocupa 8 veces el mensaje codificado
+"""
+import random
+import sys
+import time
+
+from benchmarks.corpus import CORPUS, generar
+from árbol_huffman import calcular_frecuencias, construir_arbol_huffman, generar_codigos
+from desencriptar import codigos_enteros, construir_tablas_decodificacion, convertir_a_bits, decodificar_cuerpo
+
+#MB hasta los que se mide también el recorrido
+LIMITE_RECORRIDO = 10
+
+PALABRAS = ("el la de que y a en un ser se no haber por con su para como estar tener "
+            "le lo todo pero más hacer o poder decir este ir otro ese si me ya ver "
+            "porque dar cuando él muy sin vez mucho saber qué sobre mi alguno mismo "
+            "yo también hasta año dos querer entre así primero desde grande eso ni "
+            "nos llegar pasar tiempo ella sí día uno bien poco deber entonces poner "
+            "cosa tanto hombre parecer nuestro tan donde ahora parte después vida").split()
+
+def generar_texto(tamano, semilla=2920):
+    aleatorio = random.Random(semilla)
+    partes = []
+    total = 0
+    while total < tamano:
+        frase = " ".join(aleatorio.choices(PALABRAS, k=12)) + ". "
+        partes.append(frase)
+        total += len(frase)
+    return "".join(partes)[:tamano]
+
+def codificar(mensaje, tabla_codigos, trozo=1 << 20):
+    #Empaqueta por trozos para no tener todo el mensaje como texto de bits
+    salida = bytearray()
+    sobrante = ""
+    for i in range(0, len(mensaje), trozo):
+        bits = sobrante + "".join(map(tabla_codigos.__getitem__, mensaje[i:i+trozo]))
+        completos = len(bits) - len(bits) % 8
+        if completos:
+            salida += int(bits[:completos], 2).to_bytes(completos // 8, byteorder="big")
+        sobrante = bits[completos:]
+    padding = (8 - len(sobrante) % 8) % 8
+    if sobrante:
+        salida += int(sobrante + "0" * padding, 2).to_bytes(1, byteorder="big")
+    return bytes(salida), padding
+
+def recorrer_arbol(bits, arbol):
+    partes = []
+    nodo_actual = arbol
+    for bit in bits:
+        nodo_actual = nodo_actual.left if bit == "0" else nodo_actual.right
+        if nodo_actual.left is None and nodo_actual.right is None:
+            partes.append(nodo_actual.char)
+            nodo_actual = arbol
+    return "".join(partes)
+
+def medir(mensaje, con_recorrido):
+    arbol = construir_arbol_huffman(calcular_frecuencias(mensaje))
+    cuerpo, padding = codificar(mensaje, generar_codigos(arbol))
+
+    inicio = time.perf_counter()
+    tablas = construir_tablas_decodificacion(codigos_enteros(arbol))
+    resultado = decodificar_cuerpo(cuerpo, padding, tablas)
+    duracion = time.perf_counter() - inicio
+    if resultado != mensaje:
+        raise AssertionError("El mensaje decodificado no coincide")
+
+    if not con_recorrido:
+        return duracion, None
+    bits = convertir_a_bits(cuerpo, padding)
+    inicio = time.perf_counter()
+    resultado = recorrer_arbol(bits, arbol)
+    duracion_recorrido = time.perf_counter() - inicio
+    if resultado != mensaje:
+        raise AssertionError("El recorrido no coincide")
+    return duracion, duracion_recorrido
+
+def main(argumentos):
+    tamanos = [int(a) for a in argumentos] or [1, 10, 100]
+    print(f"{'Corpus':<18} {'Tamaño':>8} {'Tablas s':>9} {'MB/s':>8} {'Recorrido s':>12} {'Aceleración':>12}")
+    for nombre in CORPUS:
+        for megabytes in tamanos:
+            duracion, recorrido = medir(generar(nombre, megabytes << 20), megabytes <= LIMITE_RECORRIDO)
+            columnas = (f"{recorrido:>12.3f} {recorrido / duracion:>11.2f}x" if recorrido is not None
+                        else f"{'-':>12} {'-':>12}")
+            print(f"{nombre:<18} {megabytes:>6}MB {duracion:>9.3f} {megabytes / duracion:>8.2f} {columnas}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
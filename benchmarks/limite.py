@@ -0,0 +1,34 @@
+"""
+Pérdida de compresión al limitar la longitud de los códigos
+Uso: python -m benchmarks.limite [bits ...]   (por defecto 8 10 12 15)
+"""
+import sys
+import time
+
+from benchmarks.decodificador import generar_texto
+from árbol_huffman import calcular_frecuencias, informe_limite
+
+def distribuciones():
+    #Fibonacci: el peor caso para la profundidad del árbol
+    fibonacci = [1, 1]
+    while len(fibonacci) < 40:
+        fibonacci.append(fibonacci[-1] + fibonacci[-2])
+    yield "fibonacci", {chr(0x100 + i): freq for i, freq in enumerate(fibonacci)}
+    yield "zipf", {chr(0x100 + i): 10 ** 9 // (i + 1) ** 2 for i in range(1024)}
+    yield "texto", calcular_frecuencias(generar_texto(1 << 20))
+
+def main(argumentos):
+    limites = [int(a) for a in argumentos] or [8, 10, 12, 15]
+    print(f"{'Distribución':>12} {'Sin límite':>11} {'Límite':>7} {'Pérdida (%)':>12} {'Tiempo (s)':>11}")
+    for nombre, frecuencias in distribuciones():
+        for limite in limites:
+            if len(frecuencias) > 1 << limite:
+                continue
+            inicio = time.perf_counter()
+            informe = informe_limite(frecuencias, limite)
+            duracion = time.perf_counter() - inicio
+            print(f"{nombre:>12} {informe['longitud_sin_limite']:>11} {limite:>7} "
+                  f"{informe['perdida'] * 100:>12.4f} {duracion:>11.4f}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,188 @@
+"""
+Suite de benchmarks de la cadena completa de codificación y decodificación
+Uso: python -m benchmarks.suite [--corpus NOMBRE ...] [--tamanos 1K 1M 100M ...]
+                                [--json resultados.json] [--base base.json] [--tolerancia 0.25]
+Mide tiempo, velocidad y memoria pico de cada etapa, y la tasa de compresión de cada corpus.
+Con --base compara contra una corrida anterior y termina con código 1 si alguna etapa empeoró.
+benchmarks/base.json es la referencia del repositorio, hecha con los tamaños por defecto; los
+tiempos solo son comparables en la misma máquina, así que conviene regenerarla en la propia:
+    python -m benchmarks.suite --json benchmarks/base.json
+"""
+import argparse
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import vectorizado
+from benchmarks.corpus import CORPUS, generar
+from árbol_huffman import calcular_frecuencias, construir_arbol_huffman, generar_codigos, calcular_longitudes
+from encriptar import (codificar_mensaje, empaquetar_bits, empaquetar_mensaje, preparar_codigos,
+                       escribir_cabecera_canonica)
+from desencriptar import (convertir_a_bits, decodificar_mensaje, decodificar_cuerpo, codigos_enteros,
+                          construir_tablas_decodificacion)
+
+VERSION_RESULTADOS = 1
+TAMANOS = ["1K", "100K", "1M"]
+
+#Las etapas que trabajan con texto de '0'/'1' ocupan ~8 veces el mensaje; por encima de este
+#tamaño se saltan y quedan como null en el JSON
+LIMITE_ETAPAS_TEXTO = 10 << 20
+
+#Por debajo de este tiempo la comparación con la base es puro ruido
+MINIMO_COMPARABLE = 1e-3
+
+#(nombre, función sobre el estado, clave donde guardar el resultado, usa texto de bits)
+ETAPAS = (
+    ("calcular_frecuencias", lambda e: calcular_frecuencias(e["mensaje"]), "frecuencias", False),
+    ("construir_arbol_huffman", lambda e: construir_arbol_huffman(e["frecuencias"]), "arbol", False),
+    ("generar_codigos", lambda e: generar_codigos(e["arbol"]), "tabla_codigos", False),
+    ("codificar_mensaje", lambda e: codificar_mensaje(e["mensaje"], e["tabla_codigos"]), "bits", True),
+    ("empaquetar_bits", lambda e: empaquetar_bits(e["bits"]), None, True),
+    ("empaquetar_mensaje", lambda e: empaquetar_mensaje(e["mensaje"], preparar_codigos(e["tabla_codigos"])),
+     "empaquetado", False),
+    ("convertir_a_bits", lambda e: convertir_a_bits(*e["empaquetado"]), None, True),
+    ("decodificar_mensaje", lambda e: decodificar_mensaje(e["bits"], e["arbol"]), "decodificado_bits", True),
+    ("decodificar_cuerpo", lambda e: decodificar_cuerpo(
+        *e["empaquetado"], construir_tablas_decodificacion(codigos_enteros(e["arbol"]))), "decodificado", False),
+)
+
+def leer_tamano(texto):
+    multiplicadores = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+    sufijo = texto[-1].upper()
+    if sufijo in multiplicadores:
+        return int(float(texto[:-1]) * multiplicadores[sufijo])
+    return int(texto)
+
+def _medir_tiempo(funcion, estado, repeticiones):
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion(estado)
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor, resultado
+
+def _medir_memoria(funcion, estado):
+    #Memoria pico que reservó la etapa por encima de lo que ya estaba en uso
+    tracemalloc.start()
+    try:
+        antes = tracemalloc.get_traced_memory()[0]
+        funcion(estado)
+        return tracemalloc.get_traced_memory()[1] - antes
+    finally:
+        tracemalloc.stop()
+
+def medir_corpus(nombre, tamano, repeticiones=1, con_memoria=True):
+    mensaje = generar(nombre, tamano)
+    bytes_originales = len(mensaje.encode("utf-8", "surrogatepass"))
+    estado = {"mensaje": mensaje}
+    etapas = {}
+
+    for etapa, funcion, clave, usa_texto in ETAPAS:
+        if usa_texto and tamano > LIMITE_ETAPAS_TEXTO:
+            etapas[etapa] = None
+            continue
+        segundos, resultado = _medir_tiempo(funcion, estado, repeticiones)
+        etapas[etapa] = {
+            "segundos": segundos,
+            "mb_s": bytes_originales / (1 << 20) / segundos if segundos else None,
+            "memoria_pico": _medir_memoria(funcion, estado) if con_memoria else None,
+        }
+        if clave is not None:
+            estado[clave] = resultado
+
+    for clave in ("decodificado", "decodificado_bits"):
+        if clave in estado and estado[clave] != mensaje:
+            raise AssertionError(f"{nombre} {tamano}: el mensaje decodificado no coincide ({clave})")
+
+    #Tamaño del archivo canónico: cabecera más cuerpo
+    cabecera = io.BytesIO()
+    escribir_cabecera_canonica(cabecera, calcular_longitudes(estado["arbol"]), 0)
+    bytes_comprimidos = len(cabecera.getvalue()) + len(estado["empaquetado"][0])
+
+    return {"corpus": nombre, "tamano": tamano, "bytes_originales": bytes_originales,
+            "bytes_comprimidos": bytes_comprimidos, "ratio": bytes_comprimidos / bytes_originales,
+            "etapas": etapas}
+
+def entorno():
+    return {"python": platform.python_version(), "implementacion": platform.python_implementation(),
+            "sistema": platform.platform(), "procesador": platform.machine(), "numpy": vectorizado.HAY_NUMPY}
+
+def imprimir(resultado):
+    print(f"\n{resultado['corpus']} · {resultado['tamano']} caracteres · "
+          f"{resultado['bytes_originales']} → {resultado['bytes_comprimidos']} bytes "
+          f"(ratio {resultado['ratio']:.3f})")
+    print(f"  {'Etapa':<24} {'Segundos':>10} {'MB/s':>9} {'Memoria pico':>14}")
+    for etapa, medida in resultado["etapas"].items():
+        if medida is None:
+            print(f"  {etapa:<24} {'(se salta)':>10}")
+            continue
+        mb_s = f"{medida['mb_s']:.2f}" if medida["mb_s"] is not None else "-"
+        memoria = f"{medida['memoria_pico'] / (1 << 20):.2f} MB" if medida["memoria_pico"] is not None else "-"
+        print(f"  {etapa:<24} {medida['segundos']:>10.4f} {mb_s:>9} {memoria:>14}")
+
+def comparar(resultados, base, tolerancia):
+    #Devuelve las etapas más lentas que la base por encima de la tolerancia
+    anteriores = {(r["corpus"], r["tamano"]): r for r in base["resultados"]}
+    regresiones = []
+    for resultado in resultados:
+        anterior = anteriores.get((resultado["corpus"], resultado["tamano"]))
+        if anterior is None:
+            continue
+        if resultado["ratio"] > anterior["ratio"] * (1 + 1e-9):
+            regresiones.append((resultado["corpus"], resultado["tamano"], "ratio",
+                                anterior["ratio"], resultado["ratio"]))
+        for etapa, medida in resultado["etapas"].items():
+            medida_anterior = anterior["etapas"].get(etapa)
+            if medida is None or medida_anterior is None:
+                continue
+            if max(medida["segundos"], medida_anterior["segundos"]) < MINIMO_COMPARABLE:
+                continue
+            if medida["segundos"] > medida_anterior["segundos"] * (1 + tolerancia):
+                regresiones.append((resultado["corpus"], resultado["tamano"], etapa,
+                                    medida_anterior["segundos"], medida["segundos"]))
+    return regresiones
+
+def main(argumentos):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite", description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--corpus", nargs="+", choices=sorted(CORPUS), default=list(CORPUS))
+    parser.add_argument("--tamanos", nargs="+", default=TAMANOS, help="en caracteres, con sufijo K, M o G")
+    parser.add_argument("--repeticiones", type=int, default=3, help="se guarda el mejor tiempo")
+    parser.add_argument("--sin-memoria", action="store_true", help="no mide la memoria pico (más rápido)")
+    parser.add_argument("--json", help="archivo donde guardar los resultados")
+    parser.add_argument("--base", help="resultados anteriores contra los que comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="lentitud aceptada frente a la base")
+    opciones = parser.parse_args(argumentos)
+
+    resultados = []
+    for tamano in map(leer_tamano, opciones.tamanos):
+        for nombre in opciones.corpus:
+            resultado = medir_corpus(nombre, tamano, opciones.repeticiones, not opciones.sin_memoria)
+            imprimir(resultado)
+            resultados.append(resultado)
+
+    salida = {"version": VERSION_RESULTADOS, "entorno": entorno(), "resultados": resultados}
+    if opciones.json:
+        with open(opciones.json, "w", encoding="utf-8") as f:
+            json.dump(salida, f, indent=2, ensure_ascii=False)
+
+    if opciones.base:
+        with open(opciones.base, encoding="utf-8") as f:
+            base = json.load(f)
+        regresiones = comparar(resultados, base, opciones.tolerancia)
+        print(f"\nComparación con {opciones.base} (tolerancia {opciones.tolerancia:.0%}):")
+        if base.get("entorno") != salida["entorno"]:
+            #La tasa de compresión se compara igual; los tiempos pueden diferir solo por la máquina
+            print(f"  aviso: la base se midió en otro entorno ({base.get('entorno')})")
+        for corpus, tamano, etapa, antes, ahora in regresiones:
+            print(f"  {corpus} {tamano} {etapa}: {antes:.4f} → {ahora:.4f}")
+        if not regresiones:
+            print("  sin regresiones")
+        return 1 if regresiones else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
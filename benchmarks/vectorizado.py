@@ -0,0 +1,47 @@
+"""
+Benchmark del camino con NumPy frente al de Python puro
+Uso: python -m benchmarks.vectorizado [MB ...]   (por defecto 1 10)
+"""
+import sys
+import time
+
+import vectorizado
+from benchmarks.decodificador import generar_texto
+from encriptar import empaquetar_mensaje
+from árbol_huffman import (calcular_frecuencias, construir_arbol_huffman, calcular_longitudes,
+                           generar_codigos_canonicos)
+
+def medir(funcion, *argumentos):
+    inicio = time.perf_counter()
+    funcion(*argumentos)
+    return time.perf_counter() - inicio
+
+def medir_caminos(mensaje, codigos, usar_numpy):
+    umbral = vectorizado.UMBRAL_NUMPY
+    vectorizado.UMBRAL_NUMPY = 0 if usar_numpy else float("inf")
+    try:
+        return (medir(calcular_frecuencias, mensaje),
+                medir(empaquetar_mensaje, mensaje, codigos))
+    finally:
+        vectorizado.UMBRAL_NUMPY = umbral
+
+def main(argumentos):
+    if not vectorizado.HAY_NUMPY:
+        print("NumPy no está instalado: solo se mide el camino en Python puro")
+
+    tamanos = [int(a) for a in argumentos] or [1, 10]
+    muestra = generar_texto(1 << 20)
+    print(f"{'Tamaño':>8} {'Camino':>8} {'Conteo (s)':>11} {'Empaquetado (s)':>16} {'MB/s':>8}")
+    for megabytes in tamanos:
+        mensaje = muestra * megabytes
+        frecuencias = calcular_frecuencias(mensaje)
+        codigos = generar_codigos_canonicos(calcular_longitudes(construir_arbol_huffman(frecuencias, compacto=True)))
+
+        caminos = [("python", False)] + ([("numpy", True)] if vectorizado.HAY_NUMPY else [])
+        for nombre, usar_numpy in caminos:
+            conteo, empaquetado = medir_caminos(mensaje, codigos, usar_numpy)
+            print(f"{megabytes:>6}MB {nombre:>8} {conteo:>11.3f} {empaquetado:>16.3f} "
+                  f"{megabytes / (conteo + empaquetado):>8.2f}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
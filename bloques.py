@@ -0,0 +1,145 @@
+#Formato por bloques: cada bloque se codifica por separado con una tabla compartida,
+#así que se pueden comprimir y descomprimir en paralelo en varios procesos
+#
+#  HUF | versión 3 | tabla canónica | bloques | índice | cantidad de bloques (4) | posición del índice (8)
+#  índice: por bloque, posición (8 bytes), largo (8 bytes) y padding (1 byte)
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from árbol_huffman import (calcular_frecuencias, construir_arbol_huffman, calcular_longitudes,
+                           generar_codigos_canonicos)
+from encriptar import empaquetar_mensaje, escribir_tabla_canonica
+from desencriptar import CACHE_TABLAS, leer_tabla_canonica, construir_tablas_decodificacion, decodificar_cuerpo
+from formato import MAGIA, VERSION_BLOQUES, MASCARA_VERSION, BANDERA_BYTES, es_modo_bytes
+
+#Caracteres (o bytes, en modo bytes) por bloque
+TAMANO_BLOQUE = 1 << 20
+
+_ENTRADA_INDICE = 17
+_PIE = 12
+
+#Tablas de decodificación de cada proceso trabajador
+_tablas_trabajador = None
+
+def _en_orden(executor, funcion, argumentos, en_vuelo):
+    #Como executor.map, pero con a lo sumo en_vuelo llamadas enviadas: el argumento siguiente no se
+    #pide (ni se lee su bloque) hasta entregar el resultado más antiguo
+    pendientes = deque()
+    try:
+        for argumento in argumentos:
+            pendientes.append(executor.submit(funcion, argumento))
+            if len(pendientes) >= en_vuelo:
+                yield pendientes.popleft().result()
+        while pendientes:
+            yield pendientes.popleft().result()
+    finally:
+        for futuro in pendientes:
+            futuro.cancel()
+
+def _en_vuelo(procesos):
+    #Dos bloques por proceso: mientras uno se decodifica, el siguiente ya está en la cola
+    return 2 * (procesos or os.cpu_count() or 1)
+
+def _codificar_bloque(trozo, codigos):
+    return empaquetar_mensaje(trozo, codigos)
+
+def _iniciar_decodificador(longitudes):
+    global _tablas_trabajador
+    _tablas_trabajador = construir_tablas_decodificacion(generar_codigos_canonicos(longitudes))
+
+def _decodificar_bloque(bloque):
+    cuerpo_codificado, padding = bloque
+    return decodificar_cuerpo(cuerpo_codificado, padding, _tablas_trabajador)
+
+def comprimir_bloques(mensaje, nombre_archivo_binario, tamano_bloque=TAMANO_BLOQUE, procesos=None):
+    modo_bytes = es_modo_bytes(mensaje)
+    trozos = [bytes(mensaje[i:i+tamano_bloque]) if modo_bytes else mensaje[i:i+tamano_bloque]
+              for i in range(0, len(mensaje), tamano_bloque)]
+
+    with ProcessPoolExecutor(procesos) as executor:
+        #Conteo en paralelo y una sola tabla para todos los bloques
+        frecuencias = {}
+        for parciales in _en_orden(executor, calcular_frecuencias, trozos, _en_vuelo(procesos)):
+            for char, freq in parciales.items():
+                frecuencias[char] = frecuencias.get(char, 0) + freq
+
+        longitudes = calcular_longitudes(construir_arbol_huffman(frecuencias, compacto=True))
+        codigos = generar_codigos_canonicos(longitudes)
+
+        indice = []
+        with open(nombre_archivo_binario, "wb") as f:
+            escribir_cabecera_bloques(f, longitudes, modo_bytes)
+
+            #Los bloques salen en orden aunque terminen en otro
+            codificar = partial(_codificar_bloque, codigos=codigos)
+            for bytes_codificados, padding in _en_orden(executor, codificar, trozos, _en_vuelo(procesos)):
+                indice.append((f.tell(), len(bytes_codificados), padding))
+                f.write(bytes_codificados)
+
+            escribir_indice_bloques(f, indice, f.tell())
+
+    return indice
+
+def escribir_cabecera_bloques(f, longitudes, modo_bytes):
+    f.write(MAGIA)
+    f.write(bytes([VERSION_BLOQUES | (BANDERA_BYTES if modo_bytes else 0)]))
+    escribir_tabla_canonica(f, longitudes)
+
+def escribir_indice_bloques(f, indice, posicion_indice):
+    #posicion_indice: donde termina el último bloque
+    for posicion, largo, padding in indice:
+        f.write(posicion.to_bytes(8, byteorder="big"))
+        f.write(largo.to_bytes(8, byteorder="big"))
+        f.write(bytes([padding]))
+    f.write(len(indice).to_bytes(4, byteorder="big"))
+    f.write(posicion_indice.to_bytes(8, byteorder="big"))
+
+def leer_indice_bloques(f):
+    f.seek(-_PIE, 2)
+    pie = f.read(_PIE)
+    cantidad = int.from_bytes(pie[:4], byteorder="big")
+    posicion_indice = int.from_bytes(pie[4:], byteorder="big")
+
+    f.seek(posicion_indice)
+    datos = f.read(cantidad * _ENTRADA_INDICE)
+    indice = []
+    for i in range(0, len(datos), _ENTRADA_INDICE):
+        indice.append((int.from_bytes(datos[i:i+8], byteorder="big"),
+                       int.from_bytes(datos[i+8:i+16], byteorder="big"),
+                       datos[i+16]))
+
+    #La cabecera termina donde empieza el primer bloque (o el índice si no hay bloques)
+    fin_cabecera = indice[0][0] if indice else posicion_indice
+    f.seek(0)
+    cabecera = f.read(fin_cabecera)
+    if cabecera[:len(MAGIA)] != MAGIA or cabecera[len(MAGIA)] & MASCARA_VERSION != VERSION_BLOQUES:
+        raise ValueError("El archivo no tiene el formato por bloques")
+    modo_bytes = bool(cabecera[len(MAGIA)] & BANDERA_BYTES)
+    longitudes, _ = leer_tabla_canonica(cabecera, len(MAGIA) + 1, modo_bytes)
+
+    return longitudes, indice, modo_bytes
+
+def iterar_bloques(f):
+    #Bloques decodificados uno a uno en este proceso, en orden
+    longitudes, indice, modo_bytes = leer_indice_bloques(f)
+    tablas = CACHE_TABLAS.tablas({"longitudes": longitudes, "modo_bytes": modo_bytes})
+    for posicion, largo, padding in indice:
+        f.seek(posicion)
+        yield decodificar_cuerpo(f.read(largo), padding, tablas)
+
+def descomprimir_bloques(nombre_archivo, procesos=None):
+    with open(nombre_archivo, "rb") as f:
+        longitudes, indice, modo_bytes = leer_indice_bloques(f)
+
+        def bloques():
+            for posicion, largo, padding in indice:
+                f.seek(posicion)
+                yield f.read(largo), padding
+
+        #Solo se leen los bloques que caben en la ventana, no todo el archivo de entrada
+        with ProcessPoolExecutor(procesos, initializer=_iniciar_decodificador,
+                                 initargs=(longitudes,)) as executor:
+            vacio = b"" if modo_bytes else ""
+            return vacio.join(_en_orden(executor, _decodificar_bloque, bloques(), _en_vuelo(procesos)))
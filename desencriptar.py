@@ -1,9 +1,93 @@
-from árbol_huffman import HuffmanNode, construir_arbol_huffman
+import hashlib
+import io
+import mmap
+import os
+import threading
+import traceback
+from collections import OrderedDict
+from contextlib import ExitStack, closing, contextmanager
 
-def leer_cabecera(nombre_archivo):
-    with open(nombre_archivo, "rb") as f:
-        datos = f.read()
+from metricas import etapa
+from árbol_huffman import (HuffmanNode, construir_arbol_huffman, generar_codigos, calcular_longitudes_limitadas,
+                           generar_codigos_canonicos, construir_arbol_canonico)
+from formato import (MAGIA, VERSION_CANONICA, VERSION_BLOQUES, VERSION_FRECUENCIAS, VERSION_DICCIONARIO,
+                     VERSION_ADAPTATIVA, MASCARA_VERSION, BANDERA_BYTES, BANDERA_INDICE, BANDERA_LIMITE,
+                     ENTRADA_INDICE, PIE_INDICE, LARGO_ID_DICCIONARIO, DICCIONARIOS, leer_varint, leer_simbolo,
+                     escribir_varint, escribir_simbolo)
+
+#Bytes que se leen por bloque al descomprimir un flujo
+TAMANO_BLOQUE = 1 << 20
+
+#Bytes del cuerpo que se decodifican por vuelta al buscar un rango
+TAMANO_RANGO = 1 << 12
+
+#Tablas distintas que guarda la caché antes de expulsar la usada hace más tiempo
+CAPACIDAD_CACHE = 64
 
+class TablaDecodificacion:
+    #Autómata que decodifica un byte por paso. Cada nodo interno del árbol de códigos es un estado
+    #(0 es la raíz) y su fila va de (nodo << 8) a (nodo << 8) + 255: para cada byte, los símbolos
+    #que completa y el nodo donde queda, también desplazado 8 bits
+    def __init__(self, simbolos, hijos, vacio=""):
+        #"" para texto, b"" en modo bytes
+        self.vacio = vacio
+        self.simbolos = simbolos
+        #hijos[2 * nodo + bit]: nodo interno (> 0), ~índice del símbolo (< 0) o None si ningún código sigue
+        self.hijos = hijos
+        #Las filas se llenan la primera vez que se llega a su nodo; None es una fila sin llenar o
+        #un byte que no sigue ningún código
+        nodos = len(hijos) // 2
+        self.salidas = [None] * (nodos << 8)
+        self.siguientes = [None] * (nodos << 8)
+        self.llenas = bytearray(nodos)
+        self._desde_raiz = {}
+
+    def llenar(self, nodo):
+        #Otro hilo puede estar leyendo la tabla: la salida, que es lo que se mira, se escribe al final
+        salidas, siguientes = self._caminos(nodo, 8)
+        self.siguientes[nodo << 8:(nodo + 1) << 8] = siguientes
+        self.salidas[nodo << 8:(nodo + 1) << 8] = salidas
+        self.llenas[nodo] = 1
+
+    def _caminos(self, nodo, bits):
+        #Lo que sale de leer `bits` bits desde nodo, para cada valor de esos bits en orden. Desde la
+        #raíz se repite cada vez que un código termina, así que esas listas se guardan
+        if bits == 0:
+            return [self.vacio], [nodo << 8]
+        if nodo == 0 and bits in self._desde_raiz:
+            return self._desde_raiz[bits]
+        salidas = []
+        siguientes = []
+        for hijo in self.hijos[2 * nodo], self.hijos[2 * nodo + 1]:
+            if hijo is None:
+                salidas += [None] * (1 << (bits - 1))
+                siguientes += [None] * (1 << (bits - 1))
+                continue
+            resto_salidas, resto_siguientes = self._caminos(0 if hijo < 0 else hijo, bits - 1)
+            if hijo < 0:
+                simbolo = self.simbolos[~hijo]
+                resto_salidas = [None if resto is None else simbolo + resto for resto in resto_salidas]
+            salidas += resto_salidas
+            siguientes += resto_siguientes
+        if nodo == 0:
+            self._desde_raiz[bits] = salidas, siguientes
+        return salidas, siguientes
+
+    def avanzar(self, nodo, byte, inicio, fin):
+        #Solo los bits inicio..fin-1 del byte (0 es el más significativo): primer y último byte
+        salida = []
+        for posicion in range(inicio, fin):
+            hijo = self.hijos[2 * nodo + ((byte >> (7 - posicion)) & 1)]
+            if hijo is None:
+                raise ValueError("El cuerpo codificado no corresponde a la tabla de códigos")
+            if hijo < 0:
+                salida.append(self.simbolos[~hijo])
+                nodo = 0
+            else:
+                nodo = hijo
+        return self.vacio.join(salida), nodo
+
+def _leer_cabecera_v1(datos):
     puntero = 0
 
     #Leer los primeros 4 bytes: cantidad de caracteres únicos
@@ -12,8 +96,8 @@ def leer_cabecera(nombre_archivo):
 
     frecuencias = {}
     for _ in range(cantidad):
-        char = chr(datos[puntero])
-        puntero += 1
+        #Los caracteres no ASCII se escribían en UTF-8 con más de un byte
+        char, puntero = leer_simbolo(datos, puntero)
         freq = int.from_bytes(datos[puntero:puntero+2], byteorder="big")
         puntero += 2
         frecuencias[char] = freq
@@ -22,38 +106,492 @@ def leer_cabecera(nombre_archivo):
     padding = datos[puntero]
     puntero += 1
 
-    #Leer el cuerpo codificado
-    cuerpo_codificado = datos[puntero:]
+    return {"version": 1, "frecuencias": frecuencias}, puntero, padding
+
+def _leer_inicio(datos, version):
+    #Padding y, si la bandera está puesta, la longitud máxima de los códigos
+    puntero = len(MAGIA) + 1
+    padding = datos[puntero]
+    puntero += 1
+
+    cabecera = {"version": version, "modo_bytes": bool(datos[len(MAGIA)] & BANDERA_BYTES)}
+    if datos[len(MAGIA)] & BANDERA_LIMITE:
+        cabecera["limite"] = datos[puntero]
+        puntero += 1
+    return cabecera, puntero, padding
+
+def _leer_cabecera_canonica(datos, modo_bytes):
+    cabecera, puntero, padding = _leer_inicio(datos, VERSION_CANONICA)
+    cabecera["longitudes"], puntero = leer_tabla_canonica(datos, puntero, modo_bytes)
+    return cabecera, puntero, padding
+
+def _leer_cabecera_frecuencias(datos, modo_bytes):
+    cabecera, puntero, padding = _leer_inicio(datos, VERSION_FRECUENCIAS)
+
+    cantidad, puntero = leer_varint(datos, puntero)
+    frecuencias = {}
+    for _ in range(cantidad):
+        char, puntero = leer_simbolo(datos, puntero, modo_bytes)
+        frecuencias[char], puntero = leer_varint(datos, puntero)
+
+    cabecera["frecuencias"] = frecuencias
+    return cabecera, puntero, padding
+
+def _leer_cabecera_diccionario(datos, modo_bytes):
+    puntero = len(MAGIA) + 1
+    padding = datos[puntero]
+    puntero += 1
+
+    id_diccionario = bytes(datos[puntero:puntero+LARGO_ID_DICCIONARIO])
+    puntero += LARGO_ID_DICCIONARIO
+    diccionario = DICCIONARIOS.get(id_diccionario)
+    if diccionario is None:
+        raise ValueError(f"Diccionario desconocido: {id_diccionario.hex()}; cárguelo con "
+                         "diccionario.cargar_diccionario")
+
+    return {"version": VERSION_DICCIONARIO, "modo_bytes": modo_bytes, "diccionario": id_diccionario,
+            "longitudes": diccionario.longitudes}, puntero, padding
+
+def leer_tabla_canonica(datos, puntero, modo_bytes=False):
+    longitud_maxima = datos[puntero]
+    puntero += 1
+    cantidades = []
+    for _ in range(longitud_maxima):
+        cantidad, puntero = leer_varint(datos, puntero)
+        cantidades.append(cantidad)
+
+    #Los símbolos vienen ordenados por (longitud, símbolo)
+    longitudes = {}
+    for longitud, cantidad in enumerate(cantidades, start=1):
+        for _ in range(cantidad):
+            char, puntero = leer_simbolo(datos, puntero, modo_bytes)
+            longitudes[char] = longitud
+
+    return longitudes, puntero
+
+class _LectorCabecera:
+    #Permite indexar un flujo como si fuera bytes, leyendo solo lo necesario
+    def __init__(self, reader):
+        self.reader = reader
+        self.datos = bytearray()
+
+    def _asegurar(self, fin):
+        while len(self.datos) < fin:
+            trozo = self.reader.read(max(fin - len(self.datos), 4096))
+            if not trozo:
+                break
+            self.datos += trozo
+
+    def __getitem__(self, clave):
+        if isinstance(clave, slice):
+            self._asegurar(clave.stop)
+            return bytes(self.datos[clave])
+        self._asegurar(clave + 1)
+        return self.datos[clave]
+
+def _leer_cabecera(datos):
+    if datos[:len(MAGIA)] == MAGIA:
+        version = datos[len(MAGIA)] & MASCARA_VERSION
+        modo_bytes = bool(datos[len(MAGIA)] & BANDERA_BYTES)
+        if version == VERSION_BLOQUES:
+            raise ValueError("Archivo por bloques: se lee con bloques.descomprimir_bloques")
+        if version == VERSION_ADAPTATIVA:
+            raise ValueError("Flujo adaptativo: se lee con adaptativo.DecodificadorAdaptativo")
+        if version == VERSION_FRECUENCIAS:
+            cabecera, puntero, padding = _leer_cabecera_frecuencias(datos, modo_bytes)
+        elif version == VERSION_CANONICA:
+            cabecera, puntero, padding = _leer_cabecera_canonica(datos, modo_bytes)
+        elif version == VERSION_DICCIONARIO:
+            cabecera, puntero, padding = _leer_cabecera_diccionario(datos, modo_bytes)
+        else:
+            raise ValueError(f"Versión de archivo no soportada: {version}")
+        cabecera["con_indice"] = bool(datos[len(MAGIA)] & BANDERA_INDICE)
+        return cabecera, puntero, padding
+    return _leer_cabecera_v1(datos)
+
+def _parsear_cabecera(datos):
+    try:
+        return _leer_cabecera(datos)
+    except IndexError:
+        #El archivo termina antes que la cabecera
+        raise ValueError("Cabecera incompleta o dañada") from None
+
+@contextmanager
+def abrir_cabecera(nombre_archivo):
+    #El archivo se proyecta en memoria: la cabecera se lee en su lugar y el cuerpo (y el índice)
+    #son vistas sobre el mapa, sin copiarlo. Al salir del with se liberan las vistas y se cierra
+    #el mapa, así el archivo se puede sobrescribir o borrar enseguida; quien lo use no puede
+    #guardar otras vistas del cuerpo después del with
+    with open(nombre_archivo, "rb") as f:
+        mapa = None if os.fstat(f.fileno()).st_size == 0 else mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    datos = memoryview(mapa if mapa is not None else b"")
+    vistas = [datos]
+    try:
+        cabecera, puntero, padding = _parsear_cabecera(datos)
+
+        #Leer el cuerpo codificado; con índice, el cuerpo termina donde empieza el índice
+        fin_cuerpo = len(datos)
+        if cabecera.get("con_indice"):
+            fin_cuerpo = int.from_bytes(datos[-PIE_INDICE:], byteorder="big")
+            cabecera["indice"] = datos[fin_cuerpo:len(datos) - PIE_INDICE]
+            vistas.append(cabecera["indice"])
+        cuerpo_codificado = datos[puntero:fin_cuerpo]
+        vistas.append(cuerpo_codificado)
 
-    return frecuencias, cuerpo_codificado, padding
+        yield cabecera, cuerpo_codificado, padding
+    except BaseException as error:
+        #Los marcos del traceback (el decodificador que falló, por ejemplo) guardan vistas del cuerpo
+        traceback.clear_frames(error.__traceback__)
+        raise
+    finally:
+        for vista in vistas:
+            vista.release()
+        if mapa is not None:
+            try:
+                mapa.close()
+            except BufferError:
+                #Alguien sigue con una vista del mapa: se cierra cuando el recolector la libere
+                pass
+
+def leer_cabecera(nombre_archivo):
+    #Como abrir_cabecera, pero el cuerpo y el índice se copian y el archivo queda cerrado
+    with abrir_cabecera(nombre_archivo) as (cabecera, cuerpo_codificado, padding):
+        if "indice" in cabecera:
+            cabecera["indice"] = bytes(cabecera["indice"])
+        return cabecera, bytes(cuerpo_codificado), padding
+
+def leer_cabecera_stream(reader):
+    #Devuelve además los bytes del cuerpo que se leyeron junto con la cabecera
+    lector = _LectorCabecera(reader)
+    cabecera, puntero, padding = _parsear_cabecera(lector)
+    if cabecera.get("con_indice"):
+        #El pie dice dónde termina el cuerpo; leerlo requiere un flujo con seek
+        actual = reader.tell()
+        reader.seek(-PIE_INDICE, 2)
+        cabecera["largo_cuerpo"] = int.from_bytes(reader.read(PIE_INDICE), byteorder="big") - puntero
+        reader.seek(actual)
+    return cabecera, bytes(lector.datos[puntero:]), padding
+
+def arbol_de_cabecera(cabecera):
+    if "longitudes" in cabecera:
+        return construir_arbol_canonico(cabecera["longitudes"])
+    if "limite" in cabecera:
+        #Frecuencias con códigos limitados: el árbol es el canónico, con los pesos de cada nodo
+        frecuencias = cabecera["frecuencias"]
+        longitudes = calcular_longitudes_limitadas(frecuencias, cabecera["limite"])
+        return construir_arbol_canonico(longitudes, frecuencias)
+    return construir_arbol_huffman(cabecera["frecuencias"])
+
+def codigos_de_cabecera(cabecera):
+    #Con longitudes canónicas los códigos salen directo, sin reconstruir el árbol
+    if "longitudes" in cabecera:
+        return generar_codigos_canonicos(cabecera["longitudes"])
+    if "limite" in cabecera:
+        longitudes = calcular_longitudes_limitadas(cabecera["frecuencias"], cabecera["limite"])
+        return generar_codigos_canonicos(longitudes)
+    return codigos_enteros(construir_arbol_huffman(cabecera["frecuencias"], compacto=True))
 
 def convertir_a_bits(cuerpo_codificado, padding):
-    bits = ""
-    for byte in cuerpo_codificado:
-        bits += f'{byte:08b}'
+    bits = "".join(f'{byte:08b}' for byte in cuerpo_codificado)
     if padding > 0:
         bits = bits[:-padding]
     return bits
 
+def codigos_enteros(arbol):
+    #Convierte la tabla de generar_codigos en pares (código, longitud)
+    return {char: (int(codigo, 2) if codigo else 0, len(codigo))
+            for char, codigo in generar_codigos(arbol).items()}
+
+def construir_tablas_decodificacion(codigos):
+    #En modo bytes cada símbolo se emite como un bytes de largo 1
+    modo_bytes = any(isinstance(char, int) for char in codigos)
+    vacio = b"" if modo_bytes else ""
+    simbolos = []
+    hijos = [None, None]
+    for char, (codigo, longitud) in codigos.items():
+        nodo = 0
+        for posicion in range(longitud - 1, 0, -1):
+            bit = (codigo >> posicion) & 1
+            if hijos[2 * nodo + bit] is None:
+                hijos[2 * nodo + bit] = len(hijos) // 2
+                hijos += (None, None)
+            nodo = hijos[2 * nodo + bit]
+        if longitud:
+            hijos[2 * nodo + (codigo & 1)] = ~len(simbolos)
+            simbolos.append(bytes([char]) if modo_bytes else char)
+    return TablaDecodificacion(simbolos, hijos, vacio)
+
+def clave_de_cabecera(cabecera):
+    #Hash de la tabla tal como viene en la cabecera. Se respeta el orden de las frecuencias
+    #porque los empates del árbol se rompen por orden de aparición
+    if "diccionario" in cabecera:
+        #El id ya identifica la tabla, no hace falta recorrerla
+        return b"D" + cabecera["diccionario"]
+    if "longitudes" in cabecera:
+        tipo, tabla = b"L", cabecera["longitudes"]
+    else:
+        tipo, tabla = b"F", cabecera["frecuencias"]
+    resumen = hashlib.sha256(tipo + (b"B" if cabecera.get("modo_bytes") else b"T"))
+    if "limite" in cabecera:
+        resumen.update(b"M" + bytes([cabecera["limite"]]))
+    for char, valor in tabla.items():
+        resumen.update(escribir_simbolo(char))
+        resumen.update(escribir_varint(valor))
+    return resumen.digest()
+
+class CacheTablas:
+    #Caché LRU de árbol, códigos y tablas de decodificación por tabla de frecuencias;
+    #cada parte se construye la primera vez que se pide
+    def __init__(self, capacidad=CAPACIDAD_CACHE):
+        self.capacidad = capacidad
+        self.entradas = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+        self._candado = threading.Lock()
+
+    def _entrada(self, cabecera):
+        clave = clave_de_cabecera(cabecera)
+        with self._candado:
+            entrada = self.entradas.get(clave)
+            if entrada is not None:
+                self.entradas.move_to_end(clave)
+                self.aciertos += 1
+                return entrada
+
+            self.fallos += 1
+            #Solo la tabla: la cabecera puede tener vistas sobre el archivo proyectado
+            entrada = {"cabecera": {k: cabecera[k] for k in ("modo_bytes", "limite", "longitudes", "frecuencias")
+                                    if k in cabecera}}
+            self.entradas[clave] = entrada
+            while len(self.entradas) > self.capacidad:
+                self.entradas.popitem(last=False)
+                self.expulsiones += 1
+            return entrada
+
+    def _parte(self, entrada, nombre):
+        #Construir fuera del candado; si dos hilos coinciden, ambos obtienen una tabla válida
+        if nombre not in entrada:
+            if nombre == "arbol":
+                entrada[nombre] = arbol_de_cabecera(entrada["cabecera"])
+            elif nombre == "codigos":
+                entrada[nombre] = codigos_de_cabecera(entrada["cabecera"])
+            else:
+                entrada[nombre] = construir_tablas_decodificacion(self._parte(entrada, "codigos"))
+        return entrada[nombre]
+
+    def arbol(self, cabecera):
+        return self._parte(self._entrada(cabecera), "arbol")
+
+    def codigos(self, cabecera):
+        return self._parte(self._entrada(cabecera), "codigos")
+
+    def tablas(self, cabecera):
+        return self._parte(self._entrada(cabecera), "tablas")
+
+    def estadisticas(self):
+        with self._candado:
+            consultas = self.aciertos + self.fallos
+            return {"aciertos": self.aciertos, "fallos": self.fallos, "expulsiones": self.expulsiones,
+                    "tamano": len(self.entradas), "capacidad": self.capacidad,
+                    "tasa_aciertos": self.aciertos / consultas if consultas else 0.0}
+
+    def limpiar(self):
+        with self._candado:
+            self.entradas.clear()
+            self.aciertos = 0
+            self.fallos = 0
+            self.expulsiones = 0
+
+#Caché compartida por todas las funciones que leen archivos
+CACHE_TABLAS = CacheTablas()
+
+def _acumulador(vacio):
+    #bytes.join reserva un Py_buffer por pieza, así que en modo bytes se extiende un bytearray.
+    #Ambos rechazan None con TypeError, que es como el decodificador nota una fila sin llenar
+    if isinstance(vacio, bytes):
+        salida = bytearray()
+        return salida.extend, lambda: bytes(salida)
+    salida = io.StringIO(newline="")
+    return salida.write, salida.getvalue
+
+def iterar_decodificacion(trozos, padding, raiz, desplazamiento=0, estricto=True):
+    #desplazamiento: bits del primer trozo que se saltan, para empezar en un punto del índice.
+    #estricto: un código incompleto al final es un error; si no, esos bits se descartan
+    tabla = raiz
+    salidas = tabla.salidas
+    siguientes = tabla.siguientes
+    nodo = 0
+
+    trozos = iter(trozos)
+    siguiente = next(trozos, None)
+    try:
+        while siguiente is not None:
+            trozo = siguiente
+            siguiente = next(trozos, None)
+            if not trozo:
+                continue
+            agregar, terminar = _acumulador(tabla.vacio)
+            #El primer byte puede empezar a mitad y el último lleva el padding: esos van bit a bit
+            inicio = 1 if desplazamiento else 0
+            fin = len(trozo) - 1 if siguiente is None else len(trozo)
+            if desplazamiento:
+                ultimo = 8 - padding if siguiente is None and len(trozo) == 1 else 8
+                simbolos, nodo = tabla.avanzar(nodo, trozo[0], desplazamiento, ultimo)
+                agregar(simbolos)
+                desplazamiento = 0
+
+            base = nodo << 8
+            for byte in memoryview(trozo)[inicio:fin]:
+                indice = base | byte
+                try:
+                    agregar(salidas[indice])
+                except TypeError:
+                    #Fila sin llenar: se llena y se reintenta. Si ya estaba llena, el byte no sigue
+                    #ningún código y vuelve a fallar
+                    if not tabla.llenas[base >> 8]:
+                        tabla.llenar(base >> 8)
+                    agregar(salidas[indice])
+                base = siguientes[indice]
+            nodo = base >> 8
+
+            if siguiente is None and fin >= inicio:
+                simbolos, nodo = tabla.avanzar(nodo, trozo[-1], 0, 8 - padding)
+                agregar(simbolos)
+
+            texto = terminar()
+            if texto:
+                yield texto
+    except TypeError:
+        raise ValueError("El cuerpo codificado no corresponde a la tabla de códigos") from None
+
+    if nodo and estricto:
+        raise ValueError("El cuerpo codificado termina con un código incompleto")
+
+def decodificar_cuerpo(cuerpo_codificado, padding, tablas):
+    if len(cuerpo_codificado) * 8 - padding <= 0:
+        return tablas.vacio
+    return tablas.vacio.join(iterar_decodificacion([cuerpo_codificado], padding, tablas))
+
 def decodificar_mensaje(bits, arbol):
-    mensaje = ""
-    nodo_actual = arbol
-    for bit in bits:
-        if bit == "0":
-            nodo_actual = nodo_actual.left
-        else:
-            nodo_actual = nodo_actual.right
+    if not bits:
+        return ""
 
-        if nodo_actual.left is None and nodo_actual.right is None:
-            mensaje += nodo_actual.char
-            nodo_actual = arbol  # volver a la raíz
+    padding = (8 - len(bits) % 8) % 8
+    cuerpo_codificado = int(bits + "0" * padding, 2).to_bytes((len(bits) + padding) // 8, byteorder="big")
+    tablas = construir_tablas_decodificacion(codigos_enteros(arbol))
+    #Como el recorrido original del árbol, los bits de un código incompleto al final se ignoran
+    return tablas.vacio.join(iterar_decodificacion([cuerpo_codificado], padding, tablas, estricto=False))
 
-    return mensaje
+@contextmanager
+def _decodificacion_archivo(nombre_archivo):
+    #(vacío, largo del cuerpo, partes); el archivo queda proyectado hasta salir del with
+    with ExitStack() as pila:
+        with etapa("leer") as medida:
+            cabecera, cuerpo_codificado, padding = pila.enter_context(abrir_cabecera(nombre_archivo))
+            medida.salida(len(cuerpo_codificado))
+        vacio = b"" if cabecera.get("modo_bytes") else ""
+        if len(cuerpo_codificado) * 8 - padding <= 0:
+            yield vacio, 0, iter(())
+            return
+        with etapa("tablas"):
+            tablas = CACHE_TABLAS.tablas(cabecera)
+
+        #Se decodifica por vistas del mapa para no acumular piezas pequeñas de todo el mensaje;
+        #el generador se cierra antes que el mapa para soltar la vista del trozo en curso
+        trozos = (cuerpo_codificado[i:i+TAMANO_BLOQUE] for i in range(0, len(cuerpo_codificado), TAMANO_BLOQUE))
+        with closing(iterar_decodificacion(trozos, padding, tablas)) as partes:
+            yield vacio, len(cuerpo_codificado), partes
 
 def leer_y_decomprimir(nombre_archivo):
-    frecuencias, cuerpo_codificado, padding = leer_cabecera(nombre_archivo)
-    arbol = construir_arbol_huffman(frecuencias)
-    bits = convertir_a_bits(cuerpo_codificado, padding)
-    mensaje = decodificar_mensaje(bits, arbol)
+    with _decodificacion_archivo(nombre_archivo) as (vacio, largo_cuerpo, partes):
+        with etapa("decodificar", largo_cuerpo) as medida:
+            if isinstance(vacio, bytes):
+                #getvalue entrega el buffer interno sin copiarlo: el pico es la salida más lo que
+                #el buffer reserva de más al crecer (~1,25 veces la salida)
+                salida = io.BytesIO()
+                for parte in partes:
+                    salida.write(parte)
+                mensaje = salida.getvalue()
+            else:
+                #Un str no se arma sobre un buffer propio: join tiene a la vez todas las partes y el
+                #resultado, así que el pico es el doble de la salida. Para textos grandes conviene
+                #descomprimir_archivo, que escribe las partes sin juntarlas
+                mensaje = vacio.join(partes)
+            medida.simbolos(len(mensaje))
+            medida.salida(mensaje)
     return mensaje
 
+def descomprimir_archivo(nombre_archivo, writer):
+    #Escribe el mensaje por partes: la memoria no crece con el tamaño del archivo
+    with _decodificacion_archivo(nombre_archivo) as (_, _, partes):
+        for parte in partes:
+            writer.write(parte)
+
+def _buscar_punto(indice, posicion):
+    #Búsqueda binaria del último punto con símbolo <= posicion, leyendo el índice en su lugar
+    bajo, alto = 0, len(indice) // ENTRADA_INDICE
+    if alto == 0:
+        return 0, 0
+    while alto - bajo > 1:
+        medio = (bajo + alto) // 2
+        inicio = medio * ENTRADA_INDICE
+        if int.from_bytes(indice[inicio:inicio+8], byteorder="big") <= posicion:
+            bajo = medio
+        else:
+            alto = medio
+    inicio = bajo * ENTRADA_INDICE
+    return (int.from_bytes(indice[inicio:inicio+8], byteorder="big"),
+            int.from_bytes(indice[inicio+8:inicio+16], byteorder="big"))
+
+def decodificar_rango(nombre_archivo, inicio, fin):
+    #Símbolos [inicio, fin) del mensaje. Con índice se empieza en el punto más cercano,
+    #así que el costo depende del rango y del intervalo del índice, no del tamaño del archivo
+    with abrir_cabecera(nombre_archivo) as (cabecera, cuerpo_codificado, padding):
+        vacio = b"" if cabecera.get("modo_bytes") else ""
+        inicio = max(inicio, 0)
+        if fin <= inicio or len(cuerpo_codificado) * 8 - padding <= 0:
+            return vacio
+
+        #Sin índice se decodifica desde el principio
+        simbolo, bit = _buscar_punto(cabecera.get("indice", b""), inicio)
+        tablas = CACHE_TABLAS.tablas(cabecera)
+
+        trozos = (cuerpo_codificado[i:i+TAMANO_RANGO]
+                  for i in range(bit // 8, len(cuerpo_codificado), TAMANO_RANGO))
+        agregar, terminar = _acumulador(vacio)
+        decodificados = 0
+        with closing(iterar_decodificacion(trozos, padding, tablas, bit % 8)) as partes:
+            for parte in partes:
+                agregar(parte)
+                decodificados += len(parte)
+                if decodificados >= fin - simbolo:
+                    break
+    return terminar()[inicio - simbolo:fin - simbolo]
+
+def iterar_descompresion(reader, tamano_bloque=TAMANO_BLOQUE):
+    cabecera, inicio_cuerpo, padding = leer_cabecera_stream(reader)
+    tablas = CACHE_TABLAS.tablas(cabecera)
+
+    #Con índice se lee solo hasta el final del cuerpo
+    quedan = cabecera.get("largo_cuerpo")
+    if quedan is not None:
+        inicio_cuerpo = inicio_cuerpo[:quedan]
+        quedan -= len(inicio_cuerpo)
+
+    def trozos(quedan):
+        if inicio_cuerpo:
+            yield inicio_cuerpo
+        while quedan is None or quedan > 0:
+            trozo = reader.read(tamano_bloque if quedan is None else min(tamano_bloque, quedan))
+            if not trozo:
+                return
+            if quedan is not None:
+                quedan -= len(trozo)
+            yield trozo
+
+    yield from iterar_decodificacion(trozos(quedan), padding, tablas)
+
+def descomprimir_stream(reader, writer, tamano_bloque=TAMANO_BLOQUE):
+    for texto in iterar_descompresion(reader, tamano_bloque):
+        writer.write(texto)
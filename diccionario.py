@@ -0,0 +1,83 @@
+#Diccionarios entrenados: una tabla canónica compartida que se guarda aparte y que los
+#archivos .bin nombran por su id, así los mensajes cortos no cargan su propia tabla
+#
+#  archivo de diccionario: HUD | versión | modo (0 texto, 1 bytes) | nombre | tabla canónica
+import glob
+import hashlib
+import os
+
+from árbol_huffman import (calcular_frecuencias, construir_arbol_huffman, calcular_longitudes,
+                           generar_codigos_canonicos)
+from encriptar import escribir_tabla_canonica
+from desencriptar import leer_tabla_canonica
+from formato import (MAGIA_DICCIONARIO, VERSION_ARCHIVO_DICCIONARIO, LARGO_ID_DICCIONARIO, DICCIONARIOS,
+                     escribir_varint, leer_varint, escribir_simbolo)
+
+#Símbolos que siempre entran en la tabla aunque no aparezcan en el corpus
+ASCII_IMPRIMIBLE = [chr(c) for c in range(32, 127)] + ["\n", "\t"]
+
+class Diccionario:
+    def __init__(self, nombre, longitudes, modo_bytes=False):
+        self.nombre = nombre
+        self.longitudes = longitudes
+        self.modo_bytes = modo_bytes
+        self.codigos = generar_codigos_canonicos(longitudes)
+        self.id = id_de_tabla(longitudes, modo_bytes)
+
+def id_de_tabla(longitudes, modo_bytes=False):
+    #El id sale del contenido de la tabla, así dos diccionarios iguales comparten id
+    resumen = hashlib.sha256(b"B" if modo_bytes else b"T")
+    for char, longitud in sorted(longitudes.items()):
+        resumen.update(escribir_simbolo(char))
+        resumen.update(escribir_varint(longitud))
+    return resumen.digest()[:LARGO_ID_DICCIONARIO]
+
+def entrenar_diccionario(nombre, corpus, modo_bytes=False):
+    #corpus: mensajes de ejemplo (texto, o bytes en modo bytes)
+    frecuencias = {}
+    for mensaje in corpus:
+        for char, freq in calcular_frecuencias(mensaje).items():
+            frecuencias[char] = frecuencias.get(char, 0) + freq
+
+    #Todos los bytes, o el ASCII imprimible, quedan codificables con al menos un conteo
+    for char in (range(256) if modo_bytes else ASCII_IMPRIMIBLE):
+        frecuencias[char] = frecuencias.get(char, 0) + 1
+
+    longitudes = calcular_longitudes(construir_arbol_huffman(frecuencias, compacto=True))
+    return registrar_diccionario(Diccionario(nombre, longitudes, modo_bytes))
+
+def registrar_diccionario(diccionario):
+    DICCIONARIOS[diccionario.id] = diccionario
+    return diccionario
+
+def guardar_diccionario(diccionario, nombre_archivo):
+    with open(nombre_archivo, "wb") as f:
+        f.write(MAGIA_DICCIONARIO)
+        f.write(bytes([VERSION_ARCHIVO_DICCIONARIO, 1 if diccionario.modo_bytes else 0]))
+        nombre = diccionario.nombre.encode("utf-8")
+        f.write(escribir_varint(len(nombre)))
+        f.write(nombre)
+        escribir_tabla_canonica(f, diccionario.longitudes)
+
+def cargar_diccionario(nombre_archivo):
+    with open(nombre_archivo, "rb") as f:
+        datos = f.read()
+
+    if datos[:len(MAGIA_DICCIONARIO)] != MAGIA_DICCIONARIO:
+        raise ValueError("El archivo no es un diccionario")
+    puntero = len(MAGIA_DICCIONARIO)
+    if datos[puntero] != VERSION_ARCHIVO_DICCIONARIO:
+        raise ValueError(f"Versión de diccionario no soportada: {datos[puntero]}")
+    modo_bytes = bool(datos[puntero + 1])
+    puntero += 2
+
+    largo, puntero = leer_varint(datos, puntero)
+    nombre = datos[puntero:puntero+largo].decode("utf-8")
+    puntero += largo
+    longitudes, _ = leer_tabla_canonica(datos, puntero, modo_bytes)
+
+    return registrar_diccionario(Diccionario(nombre, longitudes, modo_bytes))
+
+def cargar_diccionarios(carpeta):
+    #Carga todos los .dic de una carpeta; devuelve [] si la carpeta no existe
+    return [cargar_diccionario(ruta) for ruta in sorted(glob.glob(os.path.join(carpeta, "*.dic")))]
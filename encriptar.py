@@ -1,10 +1,19 @@
-from árbol_huffman import calcular_frecuencias, construir_arbol_huffman, generar_codigos
+import io
+import math
+
+from árbol_huffman import (calcular_frecuencias, construir_arbol_huffman, generar_codigos, calcular_longitudes,
+                           calcular_longitudes_limitadas, generar_codigos_canonicos, ordenar_canonico)
+from formato import (MAGIA, VERSION_CANONICA, VERSION_FRECUENCIAS, VERSION_DICCIONARIO, BANDERA_BYTES,
+                     BANDERA_INDICE, BANDERA_LIMITE, es_modo_bytes, escribir_varint, escribir_simbolo,
+                     escribir_indice)
+from metricas import etapa
+from vectorizado import conviene_numpy, empaquetar_mensaje as empaquetar_numpy
+
+#Caracteres que se leen por bloque al comprimir un flujo
+TAMANO_BLOQUE = 1 << 20
 
 def codificar_mensaje(mensaje, tabla_codigos):
-    bits = ""
-    for c in mensaje:
-        bits += tabla_codigos[c]
-    return bits
+    return "".join(tabla_codigos[c] for c in mensaje)
 
 def empaquetar_bits(bits):
     padding = (8 - len(bits) % 8) % 8
@@ -17,27 +26,325 @@ def empaquetar_bits(bits):
 
     return bytes_codificados, padding
 
-def guardar_binario(nombre_archivo, frecuencias, bytes_codificados, padding):
+def preparar_codigos(tabla_codigos):
+    #Pasa cada código de texto a un par (entero, longitud)
+    return {char: (int(codigo, 2) if codigo else 0, len(codigo))
+            for char, codigo in tabla_codigos.items()}
+
+class EmpaquetadorBits:
+    #Empaqueta el mensaje por partes, conservando los bits sobrantes entre llamadas
+    def __init__(self, codigos):
+        self.codigos = codigos
+        self.acumulador = 0
+        self.bits_acumulados = 0
+        self.total_bits = 0
+
+    def agregar(self, mensaje):
+        if conviene_numpy(mensaje):
+            bytes_codificados, self.acumulador, self.bits_acumulados = empaquetar_numpy(
+                mensaje, self.codigos, self.acumulador, self.bits_acumulados)
+            self.total_bits += len(bytes_codificados) * 8
+            return bytes_codificados
+
+        codigos = self.codigos
+        bytes_codificados = bytearray()
+        acumulador = self.acumulador
+        bits_acumulados = self.bits_acumulados
+
+        for c in mensaje:
+            codigo, longitud = codigos[c]
+            acumulador = (acumulador << longitud) | codigo
+            bits_acumulados += longitud
+            #Vaciar el acumulador en bloques de 8 bytes para mantenerlo pequeño
+            if bits_acumulados >= 64:
+                bits_acumulados -= 64
+                bytes_codificados += (acumulador >> bits_acumulados).to_bytes(8, byteorder="big")
+                acumulador &= (1 << bits_acumulados) - 1
+
+        self.acumulador = acumulador
+        self.bits_acumulados = bits_acumulados
+        self.total_bits += len(bytes_codificados) * 8
+        return bytes_codificados
+
+    def posicion_bits(self):
+        #Bits escritos hasta ahora, contando los que siguen en el acumulador
+        return self.total_bits + self.bits_acumulados
+
+    def agregar_con_indice(self, mensaje, simbolos_previos, intervalo, puntos):
+        #Anota (símbolo, bit) cada `intervalo` símbolos; ahí el decodificador puede empezar
+        bytes_codificados = bytearray()
+        inicio = 0
+        siguiente = -simbolos_previos % intervalo
+        while siguiente < len(mensaje):
+            bytes_codificados += self.agregar(mensaje[inicio:siguiente])
+            puntos.append((simbolos_previos + siguiente, self.posicion_bits()))
+            inicio = siguiente
+            siguiente += intervalo
+        bytes_codificados += self.agregar(mensaje[inicio:])
+        return bytes_codificados
+
+    def terminar(self):
+        bits_acumulados = self.bits_acumulados
+        padding = (8 - bits_acumulados % 8) % 8
+        bytes_codificados = bytearray()
+        if bits_acumulados:
+            bytes_restantes = (bits_acumulados + padding) // 8
+            bytes_codificados += (self.acumulador << padding).to_bytes(bytes_restantes, byteorder="big")
+
+        self.total_bits += bits_acumulados
+        self.acumulador = 0
+        self.bits_acumulados = 0
+        return bytes_codificados, padding
+
+def empaquetar_mensaje(mensaje, codigos):
+    empaquetador = EmpaquetadorBits(codigos)
+    bytes_codificados = empaquetador.agregar(mensaje)
+    final, padding = empaquetador.terminar()
+    bytes_codificados += final
+    return bytes_codificados, padding
+
+def empaquetar_con_indice(mensaje, codigos, intervalo):
+    puntos = []
+    empaquetador = EmpaquetadorBits(codigos)
+    bytes_codificados = empaquetador.agregar_con_indice(mensaje, 0, intervalo, puntos)
+    final, padding = empaquetador.terminar()
+    bytes_codificados += final
+    return bytes_codificados, padding, puntos
+
+def bits_de_bytes(bytes_codificados, padding):
+    #Texto de '0'/'1' del cuerpo empaquetado, solo para depuración
+    if not bytes_codificados:
+        return ""
+    bits = format(int.from_bytes(bytes_codificados, byteorder="big"), f"0{len(bytes_codificados) * 8}b")
+    return bits[:len(bits) - padding]
+
+def _byte_version(version, modo_bytes, con_indice=False, limite=None):
+    return (version | (BANDERA_BYTES if modo_bytes else 0) | (BANDERA_INDICE if con_indice else 0)
+            | (BANDERA_LIMITE if limite is not None else 0))
+
+def _escribir_inicio(f, version, padding, modo_bytes, con_indice, limite):
+    f.write(MAGIA)
+    f.write(bytes([_byte_version(version, modo_bytes, con_indice, limite), padding]))
+    if limite is not None:
+        f.write(bytes([limite]))
+
+def escribir_cabecera_frecuencias(f, frecuencias, padding, modo_bytes=False, con_indice=False, limite=None):
+    #Tabla de frecuencias con enteros de tamaño variable y caracteres UTF-8 completos
+    _escribir_inicio(f, VERSION_FRECUENCIAS, padding, modo_bytes, con_indice, limite)
+
+    f.write(escribir_varint(len(frecuencias)))
+    for char, freq in frecuencias.items():
+        f.write(escribir_simbolo(char))
+        f.write(escribir_varint(freq))
+
+def guardar_binario(nombre_archivo, frecuencias, bytes_codificados, padding, modo_bytes=False, puntos=None,
+                    limite=None):
+    #Con límite, el decodificador rehace las longitudes limitadas a partir de las frecuencias
     with open(nombre_archivo, "wb") as f:
-        cantidad_caracteres = len(frecuencias)
-        f.write(cantidad_caracteres.to_bytes(4, byteorder="big")) 
+        escribir_cabecera_frecuencias(f, frecuencias, padding, modo_bytes, puntos is not None, limite)
+        f.write(bytes_codificados)
+        if puntos is not None:
+            escribir_indice(f, puntos, f.tell())
+
+def escribir_cabecera_canonica(f, longitudes, padding, modo_bytes=False, con_indice=False, limite=None):
+    _escribir_inicio(f, VERSION_CANONICA, padding, modo_bytes, con_indice, limite)
+    escribir_tabla_canonica(f, longitudes)
 
-        for char, freq in frecuencias.items():
-            f.write(char.encode('utf-8'))         
-            f.write(freq.to_bytes(2, byteorder='big'))  
+def escribir_tabla_canonica(f, longitudes):
+    #Cuántos símbolos hay de cada longitud, y luego los símbolos en orden canónico
+    ordenados = ordenar_canonico(longitudes)
+    longitud_maxima = ordenados[-1][1] if ordenados else 0
+    f.write(bytes([longitud_maxima]))
+    cantidades = [0] * (longitud_maxima + 1)
+    for _, longitud in ordenados:
+        cantidades[longitud] += 1
+    for cantidad in cantidades[1:]:
+        f.write(escribir_varint(cantidad))
 
-        f.write(bytes([padding]))
+    for char, _ in ordenados:
+        f.write(escribir_simbolo(char))
 
+def guardar_binario_canonico(nombre_archivo, longitudes, bytes_codificados, padding, modo_bytes=False,
+                             puntos=None, limite=None):
+    with open(nombre_archivo, "wb") as f:
+        escribir_cabecera_canonica(f, longitudes, padding, modo_bytes, puntos is not None, limite)
+        f.write(bytes_codificados)
+        if puntos is not None:
+            escribir_indice(f, puntos, f.tell())
+
+def guardar_binario_diccionario(nombre_archivo, diccionario, bytes_codificados, padding, puntos=None):
+    #Solo el id del diccionario en lugar de la tabla
+    with open(nombre_archivo, "wb") as f:
+        f.write(MAGIA)
+        f.write(bytes([_byte_version(VERSION_DICCIONARIO, diccionario.modo_bytes, puntos is not None), padding]))
+        f.write(diccionario.id)
         f.write(bytes_codificados)
+        if puntos is not None:
+            escribir_indice(f, puntos, f.tell())
+
+def _tamano_con_tabla(arbol, frecuencias, modo_bytes, con_frecuencias, limite):
+    #Bytes exactos de cabecera y cuerpo si la tabla va dentro del archivo
+    cabecera = io.BytesIO()
+    longitudes = calcular_longitudes_limitadas(frecuencias, limite, arbol)
+    if con_frecuencias:
+        escribir_cabecera_frecuencias(cabecera, frecuencias, 0, modo_bytes, limite=limite)
+    else:
+        escribir_cabecera_canonica(cabecera, longitudes, 0, modo_bytes, limite=limite)
+    bits = sum(frecuencias[char] * longitud for char, longitud in longitudes.items())
+    return len(cabecera.getvalue()) + (bits + 7) // 8
+
+def _elegir_diccionario(diccionario, frecuencias, modo_bytes, con_frecuencias, limite):
+    #Devuelve si conviene el diccionario y, si hubo que construirlo para comparar, el árbol
+    if diccionario.modo_bytes != modo_bytes or any(char not in diccionario.longitudes for char in frecuencias):
+        return False, None
+    #Los códigos del diccionario también tienen que respetar la longitud máxima
+    if limite is not None and max(diccionario.longitudes.values(), default=0) > limite:
+        return False, None
+    bits = sum(freq * diccionario.longitudes[char] for char, freq in frecuencias.items())
+    tamano_diccionario = len(MAGIA) + 2 + len(diccionario.id) + (bits + 7) // 8
+
+    #Cota inferior de la tabla embebida: los símbolos de la cabecera y la entropía del mensaje.
+    #Si el diccionario ya gana contra la cota, no hace falta construir el árbol
+    total = sum(frecuencias.values())
+    entropia = sum(freq * math.log2(total / freq) for freq in frecuencias.values())
+    cota = len(MAGIA) + 2 + sum(len(escribir_simbolo(char)) for char in frecuencias) + int(entropia) // 8
+    if tamano_diccionario <= cota:
+        return True, None
+
+    arbol = construir_arbol_huffman(frecuencias, compacto=True)
+    tamano_con_tabla = _tamano_con_tabla(arbol, frecuencias, modo_bytes, con_frecuencias, limite)
+    return tamano_diccionario <= tamano_con_tabla, arbol
+
+def _limite_necesario(arbol, longitud_maxima):
+    #El límite solo se aplica, y se anota en la cabecera, si el árbol de Huffman lo pasa
+    if longitud_maxima is None or max(calcular_longitudes(arbol).values(), default=0) <= longitud_maxima:
+        return None
+    return longitud_maxima
+
+def _empaquetar(mensaje, codigos, intervalo_indice):
+    if intervalo_indice is None:
+        return empaquetar_mensaje(mensaje, codigos) + (None,)
+    return empaquetar_con_indice(mensaje, codigos, intervalo_indice)
+
+def comprimir_mensaje(mensaje, nombre_archivo_binario, incluir_bits=False, con_frecuencias=False,
+                      intervalo_indice=None, diccionario=None, longitud_maxima=None):
+    #Con bytes, bytearray o memoryview se comprime con el alfabeto fijo de 256 bytes
+    modo_bytes = es_modo_bytes(mensaje)
+    with etapa("contar", mensaje, len(mensaje)):
+        frecuencias = calcular_frecuencias(mensaje)
 
-def comprimir_mensaje(mensaje, nombre_archivo_binario):
-    frecuencias = calcular_frecuencias(mensaje)
-    arbol = construir_arbol_huffman(frecuencias)
-    tabla_codigos = generar_codigos(arbol)
+    #Con un diccionario entrenado se usa el que deje el archivo más chico. Un archivo con diccionario
+    #no lleva tabla, así que si gana, con_frecuencias no tiene efecto: el árbol se rehace sin pesos
+    with etapa("arbol", simbolos=len(frecuencias)):
+        usar_diccionario, arbol = False, None
+        if diccionario is not None:
+            usar_diccionario, arbol = _elegir_diccionario(diccionario, frecuencias, modo_bytes, con_frecuencias,
+                                                          longitud_maxima)
+        if arbol is None and not usar_diccionario:
+            arbol = construir_arbol_huffman(frecuencias, compacto=True)
+        if arbol is not None:
+            longitud_maxima = _limite_necesario(arbol, longitud_maxima)
 
-    bits_codificados = codificar_mensaje(mensaje, tabla_codigos)
-    bytes_codificados, padding = empaquetar_bits(bits_codificados)
+    with etapa("codigos", simbolos=len(frecuencias)):
+        if usar_diccionario:
+            codigos = diccionario.codigos
+            tabla_codigos = {char: format(codigo, f"0{longitud}b") for char, (codigo, longitud) in codigos.items()
+                             if char in frecuencias}
+        elif con_frecuencias and longitud_maxima is None:
+            #Guarda las frecuencias para poder mostrar el árbol original al decodificar
+            tabla_codigos = generar_codigos(arbol)
+            codigos = preparar_codigos(tabla_codigos)
+        else:
+            #Con longitud_maxima los códigos no pasan de esa cantidad de bits (package-merge)
+            longitudes = calcular_longitudes_limitadas(frecuencias, longitud_maxima, arbol)
+            codigos = generar_codigos_canonicos(longitudes)
+            tabla_codigos = {char: format(codigo, f"0{longitud}b") for char, (codigo, longitud) in codigos.items()}
 
-    guardar_binario(nombre_archivo_binario, frecuencias, bytes_codificados, padding)
+    #Con intervalo_indice se guarda un punto de sincronización cada tantos símbolos,
+    #para poder decodificar rangos con desencriptar.decodificar_rango
+    with etapa("codificar", mensaje, len(mensaje)) as medida:
+        bytes_codificados, padding, puntos = _empaquetar(mensaje, codigos, intervalo_indice)
+        medida.salida(bytes_codificados)
 
+    with etapa("escribir", bytes_codificados):
+        if usar_diccionario:
+            guardar_binario_diccionario(nombre_archivo_binario, diccionario, bytes_codificados, padding, puntos)
+        elif con_frecuencias:
+            guardar_binario(nombre_archivo_binario, frecuencias, bytes_codificados, padding, modo_bytes, puntos,
+                            longitud_maxima)
+        else:
+            guardar_binario_canonico(nombre_archivo_binario, longitudes, bytes_codificados, padding, modo_bytes,
+                                     puntos, longitud_maxima)
+
+    #El texto de bits solo se arma si se pide explícitamente
+    bits_codificados = None
+    if incluir_bits:
+        with etapa("bits_texto", bytes_codificados):
+            bits_codificados = bits_de_bytes(bytes_codificados, padding)
     return tabla_codigos, bits_codificados
+
+def contar_frecuencias_stream(reader, tamano_bloque=TAMANO_BLOQUE):
+    frecuencias = {}
+    while True:
+        trozo = reader.read(tamano_bloque)
+        if not trozo:
+            return frecuencias
+        for char, freq in calcular_frecuencias(trozo).items():
+            frecuencias[char] = frecuencias.get(char, 0) + freq
+
+def comprimir_stream(reader, writer, frecuencias=None, tamano_bloque=TAMANO_BLOQUE, intervalo_indice=None,
+                     longitud_maxima=None):
+    #Un reader binario comprime en modo bytes
+    modo_bytes = es_modo_bytes(reader.read(0))
+
+    #Primera pasada para contar, salvo que ya se entregue la tabla de frecuencias
+    if frecuencias is None:
+        inicio_lectura = reader.tell()
+        frecuencias = contar_frecuencias_stream(reader, tamano_bloque)
+        reader.seek(inicio_lectura)
+
+    arbol = construir_arbol_huffman(frecuencias, compacto=True)
+    longitud_maxima = _limite_necesario(arbol, longitud_maxima)
+    longitudes = calcular_longitudes_limitadas(frecuencias, longitud_maxima, arbol)
+    codigos = generar_codigos_canonicos(longitudes)
+
+    #Con las frecuencias reales el padding se conoce antes de codificar
+    total_esperado = sum(frecuencias[char] * longitud for char, longitud in longitudes.items())
+    padding_esperado = (8 - total_esperado % 8) % 8
+
+    inicio_cabecera = writer.tell() if writer.seekable() else None
+    cabecera = io.BytesIO()
+    escribir_cabecera_canonica(cabecera, longitudes, padding_esperado, modo_bytes, intervalo_indice is not None,
+                               longitud_maxima)
+    writer.write(cabecera.getvalue())
+
+    empaquetador = EmpaquetadorBits(codigos)
+    puntos = []
+    simbolos = 0
+    while True:
+        trozo = reader.read(tamano_bloque)
+        if not trozo:
+            break
+        if intervalo_indice is None:
+            writer.write(empaquetador.agregar(trozo))
+        else:
+            writer.write(empaquetador.agregar_con_indice(trozo, simbolos, intervalo_indice, puntos))
+            simbolos += len(trozo)
+    final, padding = empaquetador.terminar()
+    writer.write(final)
+
+    if padding != padding_esperado:
+        #Solo pasa si la tabla entregada no coincide con el texto; se corrige el byte de padding
+        if inicio_cabecera is None:
+            raise ValueError("La tabla de frecuencias no corresponde al texto comprimido")
+        fin = writer.tell()
+        writer.seek(inicio_cabecera + len(MAGIA) + 1)
+        writer.write(bytes([padding]))
+        writer.seek(fin)
+
+    if intervalo_indice is not None:
+        #La posición del índice se cuenta desde el inicio de la cabecera, así no hace falta tell()
+        fin_cuerpo = len(cabecera.getvalue()) + (empaquetador.total_bits + padding) // 8
+        escribir_indice(writer, puntos, fin_cuerpo)
+
+    return empaquetador.total_bits
@@ -0,0 +1,94 @@
+#Constantes y utilidades compartidas del contenedor .bin
+
+#Los archivos v1 empiezan con la cantidad de caracteres en 4 bytes (primer byte 0),
+#así que una firma distinta de cero basta para reconocer las versiones nuevas
+MAGIA = b"HUF"
+VERSION_CANONICA = 2
+VERSION_BLOQUES = 3
+VERSION_FRECUENCIAS = 4
+#La tabla no va en el archivo: la cabecera nombra un diccionario entrenado por su id
+VERSION_DICCIONARIO = 5
+#Huffman adaptativo: sin tabla, el árbol se actualiza igual al codificar y al decodificar
+VERSION_ADAPTATIVA = 6
+
+#Los 4 bits altos del byte de versión se usan como banderas
+MASCARA_VERSION = 0x0F
+#Los símbolos son bytes (0 a 255) en lugar de caracteres
+BANDERA_BYTES = 0x80
+#Al final del archivo hay un índice de puntos de sincronización para acceso aleatorio
+BANDERA_INDICE = 0x40
+#Los códigos se limitaron a una longitud máxima, guardada en un byte después del padding
+BANDERA_LIMITE = 0x20
+
+#Cada punto del índice: posición en símbolos (8 bytes) y posición en bits del cuerpo (8 bytes);
+#el pie (8 bytes) guarda dónde empieza el índice, que es también donde termina el cuerpo
+ENTRADA_INDICE = 16
+PIE_INDICE = 8
+
+#Archivos de diccionario: firma, versión, modo, nombre y tabla canónica
+MAGIA_DICCIONARIO = b"HUD"
+VERSION_ARCHIVO_DICCIONARIO = 1
+LARGO_ID_DICCIONARIO = 4
+
+#Diccionarios cargados, por id; el decodificador los busca aquí
+DICCIONARIOS = {}
+
+def leer_version(inicio):
+    #(versión, modo bytes) de los primeros bytes del archivo; los v1 no tienen firma y siempre son texto
+    if len(inicio) <= len(MAGIA) or inicio[:len(MAGIA)] != MAGIA:
+        return 1, False
+    return inicio[len(MAGIA)] & MASCARA_VERSION, bool(inicio[len(MAGIA)] & BANDERA_BYTES)
+
+def es_modo_bytes(mensaje):
+    return isinstance(mensaje, (bytes, bytearray, memoryview))
+
+def escribir_varint(numero):
+    #Enteros sin signo en grupos de 7 bits, el bit alto indica que sigue otro byte
+    salida = bytearray()
+    while numero >= 0x80:
+        salida.append((numero & 0x7F) | 0x80)
+        numero >>= 7
+    salida.append(numero)
+    return bytes(salida)
+
+def leer_varint(datos, puntero):
+    numero = 0
+    desplazamiento = 0
+    while True:
+        byte = datos[puntero]
+        puntero += 1
+        numero |= (byte & 0x7F) << desplazamiento
+        if byte < 0x80:
+            return numero, puntero
+        desplazamiento += 7
+
+def escribir_simbolo(simbolo):
+    #En modo bytes el símbolo ocupa un byte; el texto va en UTF-8, que es autodelimitado:
+    #el primer byte indica cuántos bytes ocupa el carácter
+    if isinstance(simbolo, int):
+        return bytes([simbolo])
+    return simbolo.encode("utf-8", "surrogatepass")
+
+def largo_utf8(primero):
+    #Bytes que ocupa un carácter UTF-8 según su primer byte
+    if primero < 0x80:
+        return 1
+    if primero < 0xE0:
+        return 2
+    if primero < 0xF0:
+        return 3
+    return 4
+
+def leer_simbolo(datos, puntero, modo_bytes=False):
+    if modo_bytes:
+        return datos[puntero], puntero + 1
+
+    largo = largo_utf8(datos[puntero])
+    char = bytes(datos[puntero:puntero+largo]).decode("utf-8", "surrogatepass")
+    return char, puntero + largo
+
+def escribir_indice(f, puntos, posicion_indice):
+    for simbolo, bit in puntos:
+        f.write(simbolo.to_bytes(8, byteorder="big"))
+        f.write(bit.to_bytes(8, byteorder="big"))
+    f.write(posicion_indice.to_bytes(PIE_INDICE, byteorder="big"))
@@ -0,0 +1,186 @@
+"""
+Compresión y descompresión de muchos archivos desde la consola, sin interfaz gráfica
+Uso: python -m lote comprimir ARCHIVO|PATRÓN ... [-j PROCESOS] [--salida CARPETA] [--verificar]
+     python -m lote descomprimir ARCHIVO.bin|PATRÓN ... [-j PROCESOS] [--salida CARPETA] [--verificar]
+Cada archivo se procesa en un proceso del pool leyendo y escribiendo por bloques, y su línea
+de resultado se imprime apenas termina. Con --verificar se decodifica el .bin y se compara con
+el original. Termina con código 1 si algún archivo falló
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+#Solo el códec: este módulo nunca importa PyQt6
+from adaptativo import iterar_descompresion_adaptativa
+from bloques import iterar_bloques
+from desencriptar import iterar_descompresion
+from diccionario import cargar_diccionarios
+from encriptar import comprimir_stream
+from formato import MAGIA, VERSION_BLOQUES, VERSION_ADAPTATIVA, leer_version
+
+EXTENSION = ".bin"
+
+def expandir(patrones):
+    #Archivos y patrones glob (con ** recursivo), sin repetir y en el orden dado
+    archivos = []
+    faltantes = []
+    for patron in patrones:
+        encontrados = sorted(glob.glob(patron, recursive=True)) if glob.has_magic(patron) else [patron]
+        encontrados = [ruta for ruta in encontrados if os.path.isfile(ruta)]
+        if not encontrados:
+            faltantes.append(patron)
+        archivos.extend(encontrados)
+    return list(dict.fromkeys(archivos)), faltantes
+
+def ruta_salida(ruta, carpeta, comprimir):
+    if comprimir:
+        nombre = os.path.basename(ruta) + EXTENSION
+    else:
+        nombre = os.path.basename(ruta)
+        nombre = nombre[:-len(EXTENSION)] if nombre.endswith(EXTENSION) else nombre + ".out"
+    return os.path.join(carpeta if carpeta is not None else os.path.dirname(ruta), nombre)
+
+def _abrir_original(ruta, modo_texto, escribir=False):
+    #En modo texto el archivo se lee como UTF-8 sin traducir saltos de línea
+    if modo_texto:
+        return open(ruta, "w" if escribir else "r", encoding="utf-8", newline="")
+    return open(ruta, "wb" if escribir else "rb")
+
+def _leer_version(ruta):
+    with open(ruta, "rb") as f:
+        return leer_version(f.read(len(MAGIA) + 1))
+
+def _decodificar(ruta):
+    #Trozos decodificados del .bin, según el formato de su cabecera; nunca se tiene todo en memoria
+    version, _ = _leer_version(ruta)
+    with open(ruta, "rb") as f:
+        if version == VERSION_BLOQUES:
+            yield from iterar_bloques(f)
+        elif version == VERSION_ADAPTATIVA:
+            yield from iterar_descompresion_adaptativa(f)
+        else:
+            yield from iterar_descompresion(f)
+
+def verificar(binario, original, modo_texto):
+    #Compara por trozos lo decodificado del .bin con el archivo original
+    with _abrir_original(original, modo_texto) as f:
+        for trozo in _decodificar(binario):
+            if not trozo:
+                continue
+            if f.read(len(trozo)) != trozo:
+                return False
+        return not f.read(1)
+
+def comprimir_archivo(ruta, destino, modo_texto=False, intervalo_indice=None, longitud_maxima=None,
+                      con_verificacion=False):
+    inicio = time.perf_counter()
+    with _abrir_original(ruta, modo_texto) as reader, open(destino, "wb") as writer:
+        comprimir_stream(reader, writer, intervalo_indice=intervalo_indice, longitud_maxima=longitud_maxima)
+    segundos = time.perf_counter() - inicio
+
+    verificado = verificar(destino, ruta, modo_texto) if con_verificacion else None
+    return {"archivo": ruta, "salida": destino, "bytes_originales": os.path.getsize(ruta),
+            "bytes_comprimidos": os.path.getsize(destino), "segundos": segundos, "verificado": verificado}
+
+def descomprimir_archivo(ruta, destino, con_verificacion=False):
+    inicio = time.perf_counter()
+    _, modo_bytes = _leer_version(ruta)
+    with _abrir_original(destino, not modo_bytes, escribir=True) as writer:
+        for trozo in _decodificar(ruta):
+            writer.write(trozo)
+    segundos = time.perf_counter() - inicio
+
+    verificado = verificar(ruta, destino, not modo_bytes) if con_verificacion else None
+    return {"archivo": ruta, "salida": destino, "bytes_originales": os.path.getsize(destino),
+            "bytes_comprimidos": os.path.getsize(ruta), "segundos": segundos, "verificado": verificado}
+
+def _iniciar_trabajador(carpeta_diccionarios):
+    if carpeta_diccionarios is not None:
+        cargar_diccionarios(carpeta_diccionarios)
+
+def _tarea(opciones, ruta, destino):
+    if opciones.comando == "comprimir":
+        return comprimir_archivo(ruta, destino, opciones.texto, opciones.indice, opciones.longitud_maxima,
+                                 opciones.verificar)
+    return descomprimir_archivo(ruta, destino, opciones.verificar)
+
+def formatear(resultado):
+    #La velocidad se mide siempre sobre los bytes sin comprimir
+    original, comprimido = resultado["bytes_originales"], resultado["bytes_comprimidos"]
+    ratio = comprimido / original if original else 0.0
+    mb_s = original / (1 << 20) / resultado["segundos"] if resultado["segundos"] else 0.0
+    linea = (f"{resultado['archivo']} → {resultado['salida']}: {original} ↔ {comprimido} bytes "
+             f"(ratio {ratio:.3f}, {mb_s:.2f} MB/s)")
+    if resultado["verificado"] is not None:
+        linea += " verificado" if resultado["verificado"] else " ¡NO COINCIDE!"
+    return linea
+
+def _argumentos(argumentos):
+    parser = argparse.ArgumentParser(prog="python -m lote", description=__doc__.strip().split("\n")[0])
+    parser.add_argument("comando", choices=("comprimir", "descomprimir"))
+    parser.add_argument("patrones", nargs="+", help="archivos o patrones glob (se admite **)")
+    parser.add_argument("-j", "--procesos", type=int, default=os.cpu_count(),
+                        help="procesos del pool; con 1 se trabaja en este proceso")
+    parser.add_argument("-o", "--salida", help="carpeta de salida (por defecto, junto a cada archivo)")
+    parser.add_argument("-f", "--forzar", action="store_true", help="sobrescribe los archivos de salida")
+    parser.add_argument("--verificar", action="store_true", help="decodifica el .bin y lo compara con el original")
+    parser.add_argument("--texto", action="store_true",
+                        help="comprime como texto UTF-8 en lugar de bytes (al descomprimir lo dice la cabecera)")
+    parser.add_argument("--indice", type=int, metavar="N", help="punto de acceso aleatorio cada N símbolos")
+    parser.add_argument("--longitud-maxima", type=int, metavar="BITS", help="longitud máxima de los códigos")
+    parser.add_argument("--diccionarios", metavar="CARPETA", help="carpeta con los diccionarios .dic de los archivos versión 5")
+    return parser.parse_args(argumentos)
+
+def main(argumentos):
+    opciones = _argumentos(argumentos)
+    archivos, faltantes = expandir(opciones.patrones)
+    errores = len(faltantes)
+    for patron in faltantes:
+        print(f"{patron}: no hay archivos", file=sys.stderr)
+
+    if opciones.salida is not None:
+        os.makedirs(opciones.salida, exist_ok=True)
+
+    trabajos = []
+    for ruta in archivos:
+        destino = ruta_salida(ruta, opciones.salida, opciones.comando == "comprimir")
+        if os.path.exists(destino) and not opciones.forzar:
+            print(f"{ruta}: {destino} ya existe (usa --forzar)", file=sys.stderr)
+            errores += 1
+            continue
+        trabajos.append((ruta, destino))
+
+    def informar(ruta, obtener):
+        nonlocal errores
+        try:
+            resultado = obtener()
+        except Exception as error:
+            print(f"{ruta}: {error}", file=sys.stderr)
+            errores += 1
+            return
+        print(formatear(resultado), flush=True)
+        if resultado["verificado"] is False:
+            errores += 1
+
+    inicio = time.perf_counter()
+    if opciones.procesos == 1 or len(trabajos) <= 1:
+        _iniciar_trabajador(opciones.diccionarios)
+        for ruta, destino in trabajos:
+            informar(ruta, lambda: _tarea(opciones, ruta, destino))
+    else:
+        with ProcessPoolExecutor(opciones.procesos, initializer=_iniciar_trabajador,
+                                 initargs=(opciones.diccionarios,)) as executor:
+            futuros = {executor.submit(_tarea, opciones, ruta, destino): ruta for ruta, destino in trabajos}
+            #Cada resultado se imprime cuando termina, no en el orden de los argumentos
+            for futuro in as_completed(futuros):
+                informar(futuros[futuro], futuro.result)
+
+    print(f"{len(trabajos)} archivos en {time.perf_counter() - inicio:.2f} s, {errores} con errores",
+          file=sys.stderr)
+    return 1 if errores else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
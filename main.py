@@ -1,13 +1,83 @@
+import os
 import sys
+from contextlib import closing
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QPushButton, QLabel, QLineEdit, QFileDialog, 
                             QMessageBox, QStackedWidget, QSizePolicy, QHBoxLayout,
-                            QProgressBar, QSlider)
-from PyQt6.QtCore import Qt, QTimer, QPropertyAnimation, QEasingCurve, pyqtProperty
-from PyQt6.QtGui import QFont, QPainter, QPen, QBrush, QColor, QPainterPath
+                            QProgressBar, QSlider, QComboBox, QSpinBox, QAbstractScrollArea)
+from PyQt6.QtCore import (Qt, QTimer, QThread, QPointF, QRectF, QLineF, QPropertyAnimation, QEasingCurve,
+                          pyqtProperty, pyqtSignal)
+from PyQt6.QtGui import QFont, QFontMetrics, QPainter, QPen, QBrush, QColor, QPainterPath, QPixmap
 from encriptar import comprimir_mensaje
-from desencriptar import leer_cabecera, convertir_a_bits, decodificar_mensaje
-from árbol_huffman import construir_arbol_huffman
+from desencriptar import abrir_cabecera, iterar_decodificacion, CACHE_TABLAS
+from diccionario import cargar_diccionarios
+from formato import MAGIA, VERSION_DICCIONARIO, leer_version
+from árbol_huffman import calcular_disposicion, raiz_de
+from animacion import ModeloAnimacion
+from almacen import AlmacenTexto
+
+#Diccionarios entrenados (.dic) que se cargan al iniciar
+CARPETA_DICCIONARIOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "diccionarios")
+
+#Profundidad máxima del árbol al cifrar, para que el árbol dibujado no sea demasiado alto
+LONGITUD_MAXIMA_ARBOL = 12
+
+#Bytes del cuerpo que se decodifican entre cada aviso de progreso y cada chequeo de cancelación
+TAMANO_TROZO_DECODIFICACION = 1 << 16
+
+#La animación cubre el comienzo del mensaje; el resto se decodifica de una vez en el hilo
+BYTES_ANIMACION = 1 << 18
+
+class HiloDecodificacion(QThread):
+    """
+    Lee y decodifica un archivo .bin fuera del hilo de la interfaz
+    Envía el árbol y el modelo de la animación apenas lee la cabecera, y después el mensaje por trozos
+    La decodificación se cancela con requestInterruption()
+    """
+    arbol_listo = pyqtSignal(object, object)
+    trozo_decodificado = pyqtSignal(str)
+    progreso = pyqtSignal(int)
+    terminado = pyqtSignal()
+    fallo = pyqtSignal(str)
+
+    def __init__(self, archivo, parent=None):
+        super().__init__(parent)
+        self.archivo = archivo
+
+    def run(self):
+        try:
+            # El mapa del archivo se cierra al terminar, aunque se cancele a mitad
+            with abrir_cabecera(self.archivo) as (cabecera, cuerpo_codificado, padding):
+                arbol = CACHE_TABLAS.arbol(cabecera)
+                modelo = ModeloAnimacion(arbol, cuerpo_codificado, padding, CACHE_TABLAS.tablas(cabecera),
+                                         BYTES_ANIMACION * 8)
+                self.arbol_listo.emit(arbol, modelo)
+
+                total = len(cuerpo_codificado)
+                if total * 8 - padding > 0:
+                    leidos = 0
+
+                    def trozos():
+                        # El decodificador pide un trozo por adelantado: al pedir el que empieza
+                        # en i, ya terminó con todo lo anterior
+                        nonlocal leidos
+                        for i in range(0, total, TAMANO_TROZO_DECODIFICACION):
+                            leidos = i
+                            yield cuerpo_codificado[i:i + TAMANO_TROZO_DECODIFICACION]
+
+                    partes = iterar_decodificacion(trozos(), padding, CACHE_TABLAS.tablas(cabecera))
+                    with closing(partes):
+                        for texto in partes:
+                            if self.isInterruptionRequested():
+                                return
+                            # En modo bytes cada byte se muestra como el carácter de su valor
+                            self.trozo_decodificado.emit(texto if isinstance(texto, str)
+                                                         else texto.decode("latin-1"))
+                            self.progreso.emit(leidos * 100 // total)
+            self.progreso.emit(100)
+            self.terminado.emit()
+        except Exception as e:
+            self.fallo.emit(str(e))
 
 class TreeVisualizationWidget(QWidget):
     """
@@ -19,22 +89,70 @@ class TreeVisualizationWidget(QWidget):
     - ⚪ Gris: Nodos normales (nodos internos que no han sido visitados)
     - 🔵 Azul "0": Rama izquierda (cuando el bit es 0)
     - 🔴 Rojo "1": Rama derecha (cuando el bit es 1)
+    La rueda del ratón hace zoom, arrastrar mueve la vista y el doble clic la reinicia
+    La animación se puede adelantar bit a bit, símbolo a símbolo o de a varios símbolos,
+    y saltar a cualquier bit o carácter con ir_a_bit / ir_a_simbolo
     """
+    # Emite el bit en el que quedó la animación después de cada paso o salto
+    posicion_cambiada = pyqtSignal(int)
+
+    # (nombre, símbolos por paso (0 = un bit), ms entre pasos)
+    MODOS_AVANCE = (
+        ("Bit a bit", 0, 800),
+        ("Símbolo a símbolo", 1, 400),
+        ("10 símbolos por paso", 10, 150),
+        ("100 símbolos por paso", 100, 60),
+        ("1000 símbolos por paso", 1000, 30),
+    )
+
+    # Geometría del árbol sin zoom, en píxeles
+    RADIO_NODO = 30
+    SEPARACION_X = 74
+    SEPARACION_Y = 100
+    MARGEN = 80
+
+    # Nivel de detalle según el radio de los nodos en pantalla
+    RADIO_MINIMO_TEXTO = 9
+    RADIO_MINIMO_CIRCULO = 3
+
+    ESCALA_MINIMA = 0.02
+    ESCALA_MAXIMA = 4.0
+    # Al cargar, un árbol muy grande se achica hasta esta escala como mucho
+    ESCALA_INICIAL_MINIMA = 0.3
+    FACTOR_ZOOM = 1.15
+
     def __init__(self, parent=None):
         super().__init__(parent)
         # Estado del árbol y animación
         self.arbol = None
-        self.bits = ""
+        # ModeloAnimacion: símbolos ya decodificados y el bit donde empieza cada uno
+        self.modelo = None
         self.nodo_actual = None
         self.nodo_visitado = None
-        self.mensaje_reconstruido = ""
         self.indice_bit_actual = 0
         self.animacion_activa = False
+        self.modo_avance = 0
+        # Nodos desde la raíz hasta el último visitado; es lo único que se repinta en cada paso
+        self.camino = []
+
+        # Posición de cada nodo, calculada una vez al cargar el árbol
+        self.posiciones = {}
+        self.limites = QRectF()
+
+        # Vista: pantalla = posición * escala + desplazamiento
+        self.escala = 1.0
+        self.desplazamiento = QPointF(0, 0)
+        self.arrastre = None
+
+        # El árbol sin resaltar se dibuja una vez en un QPixmap y se reutiliza en cada paso;
+        # se vuelve a dibujar solo si cambia la vista
+        self.cache_estatico = None
+        self.desplazamiento_cache = QPointF(0, 0)
         
         # Timer para controlar la velocidad de animación
         self.timer = QTimer()
         self.timer.timeout.connect(self.siguiente_paso)
-        self.velocidad_animacion = 800  # ms entre cada paso
+        self.velocidad_animacion = self.MODOS_AVANCE[self.modo_avance][2]  # ms entre cada paso
         
         # Esquema de colores para diferenciar estados de los nodos
         self.color_nodo_normal = QColor(200, 200, 200)    # Gris: nodos no visitados
@@ -43,70 +161,215 @@ class TreeVisualizationWidget(QWidget):
         self.color_hoja = QColor(255, 165, 0)             # Naranja: hojas con caracteres
         self.color_texto = QColor(0, 0, 0)
         self.color_linea = QColor(100, 100, 100)
+
+        # Plumas y fuentes se crean una sola vez; las plumas cosméticas no cambian de grosor con el zoom
+        self.pluma_nodo = self._pluma(self.color_texto, 3)
+        self.pluma_nodo_actual = self._pluma(QColor(0, 0, 0), 5)
+        self.pluma_linea = self._pluma(self.color_linea, 3)
+        self.pluma_camino = self._pluma(QColor(0, 170, 0), 6)
+        self.pluma_cero = self._pluma(QColor(0, 0, 255), 1)
+        self.pluma_uno = self._pluma(QColor(255, 0, 0), 1)
+        self.fuente_nodo = QFont("Arial", 11, QFont.Weight.Bold)
+        self.fuente_rama = QFont("Arial", 10, QFont.Weight.Bold)
         
         self.setMinimumSize(800, 600)
         self.setStyleSheet("background-color: white; border: 1px solid #ccc;")
 
-    def cargar_arbol(self, archivo):
+    @staticmethod
+    def _pluma(color, grosor):
+        pluma = QPen(color, grosor)
+        pluma.setCosmetic(True)
+        return pluma
+
+    def cargar_arbol(self, arbol, modelo):
         """
-        Carga un archivo .bin y construye el árbol de Huffman para visualización
-        Retorna True si se cargó exitosamente, False en caso contrario
+        Muestra el árbol de Huffman leído por HiloDecodificacion
+        modelo: ModeloAnimacion con el comienzo del mensaje, que es lo que recorre la animación
         """
-        try:
-            # Extraer datos del archivo comprimido
-            frecuencias, cuerpo_codificado, padding = leer_cabecera(archivo)
-            self.arbol = construir_arbol_huffman(frecuencias)
-            self.bits = convertir_a_bits(cuerpo_codificado, padding)
-            
-            # Reiniciar estado de animación
-            self.nodo_actual = self.arbol
-            self.nodo_visitado = None
-            self.mensaje_reconstruido = ""
-            self.indice_bit_actual = 0
-            self.animacion_activa = False
-            self.timer.stop()
-            self.update()
-            return True
-        except Exception as e:
-            print(f"Error al cargar el árbol: {e}")
-            return False
+        # Un árbol compacto se recorre con vistas de sus nodos
+        arbol = raiz_de(arbol)
+        self.arbol = arbol
+        self.modelo = modelo
+
+        # Reiniciar estado de animación
+        self.nodo_actual = self.arbol
+        self.nodo_visitado = None
+        self.indice_bit_actual = 0
+        self.animacion_activa = False
+        self.camino = [arbol] if arbol else []
+        self.timer.stop()
+
+        self.posiciones = {}
+        for nodo, (columna, nivel) in calcular_disposicion(arbol).items():
+            self.posiciones[nodo] = QPointF(self.MARGEN + columna * self.SEPARACION_X,
+                                            self.MARGEN + nivel * self.SEPARACION_Y)
+        ancho = max((p.x() for p in self.posiciones.values()), default=0) + self.MARGEN
+        alto = max((p.y() for p in self.posiciones.values()), default=0) + self.MARGEN
+        self.limites = QRectF(0, 0, ancho, alto)
+        self.ajustar_vista()
+
+    def ajustar_vista(self):
+        """Escala el árbol para que entre en el widget, sin agrandarlo ni achicarlo de más"""
+        if self.limites.isEmpty():
+            return
+        ajuste = min(self.width() / self.limites.width(), self.height() / self.limites.height(), 1.0)
+        self.escala = max(ajuste, self.ESCALA_INICIAL_MINIMA)
+        if self.limites.width() * self.escala <= self.width():
+            x = (self.width() - self.limites.width() * self.escala) / 2
+        else:
+            # No entra a lo ancho: se centra la raíz
+            x = self.width() / 2 - self.posiciones[self.arbol].x() * self.escala
+        self.desplazamiento = QPointF(x, 0)
+        self.invalidar_cache()
+
+    def invalidar_cache(self):
+        self.cache_estatico = None
+        self.update()
+
+    def detener_animacion(self):
+        self.animacion_activa = False
+        self.timer.stop()
 
     def iniciar_animacion(self):
         """Inicia la animación automática de decodificación"""
-        if self.arbol and self.bits:
+        if self.arbol and self.modelo and self.indice_bit_actual < self.modelo.total_bits:
             self.animacion_activa = True
             self.timer.start(self.velocidad_animacion)
 
+    def cambiar_modo(self, indice):
+        """Cambia cuánto avanza cada paso (ver MODOS_AVANCE) y el tiempo entre pasos"""
+        self.modo_avance = indice
+        self.velocidad_animacion = self.MODOS_AVANCE[indice][2]
+        if self.animacion_activa:
+            self.timer.start(self.velocidad_animacion)
+
     def siguiente_paso(self):
         """
-        Procesa el siguiente bit en la secuencia de decodificación
-        Actualiza el estado visual del árbol y reconstruye el mensaje
+        Avanza la animación un bit, un símbolo o varios símbolos según el modo
+        El estado sale del modelo, no hace falta recorrer los bits intermedios
         """
-        if self.indice_bit_actual >= len(self.bits):
-            self.animacion_activa = False
-            self.timer.stop()
+        if not self.modelo or self.indice_bit_actual >= self.modelo.total_bits:
+            self.detener_animacion()
             return
 
-        bit = self.bits[self.indice_bit_actual]
-        self.nodo_visitado = self.nodo_actual
-        
-        # Navegar por el árbol según el bit actual
-        if bit == "0":
-            self.nodo_actual = self.nodo_actual.left
+        simbolos = self.MODOS_AVANCE[self.modo_avance][1]
+        if simbolos == 0:
+            destino = self.indice_bit_actual + 1
         else:
-            self.nodo_actual = self.nodo_actual.right
+            # Termina el símbolo a medio leer, si lo hay, y sigue con los siguientes
+            completos = self.modelo.simbolos_completos(self.indice_bit_actual)
+            destino = self.modelo.inicio_simbolo(completos + simbolos)
+        if destino >= self.modelo.total_bits:
+            self.detener_animacion()
+        self.ir_a_bit(destino)
+
+    def ir_a_bit(self, posicion):
+        """Lleva la animación al estado que tiene después de leer `posicion` bits"""
+        if not self.modelo:
+            return
+        posicion = min(max(posicion, 0), self.modelo.total_bits)
+        self.camino, self.nodo_actual, self.nodo_visitado = self.modelo.estado(posicion)
+        self.indice_bit_actual = posicion
+        self.update()
+        self.posicion_cambiada.emit(posicion)
+
+    def ir_a_simbolo(self, indice):
+        """Lleva la animación al comienzo del carácter número `indice`"""
+        if self.modelo:
+            self.ir_a_bit(self.modelo.inicio_simbolo(indice))
+
+    def _aplicar_vista(self, painter):
+        painter.translate(self.desplazamiento)
+        painter.scale(self.escala, self.escala)
+
+    def _rect_visible(self):
+        # Parte del árbol (sin zoom) que cae dentro del widget, con margen para los nodos del borde
+        radio = self.RADIO_NODO
+        return QRectF((-self.desplazamiento.x()) / self.escala - radio,
+                      (-self.desplazamiento.y()) / self.escala - radio,
+                      self.width() / self.escala + 2 * radio, self.height() / self.escala + 2 * radio)
+
+    def _dibujar_circulo(self, painter, nodo, color, pluma, con_texto):
+        posicion = self.posiciones[nodo]
+        radio = self.RADIO_NODO
+        painter.setBrush(QBrush(color))
+        painter.setPen(pluma)
+        painter.drawEllipse(posicion, radio, radio)
+        if not con_texto:
+            return
 
-        # Si llegamos a una hoja, extraer el carácter y volver a la raíz
-        if self.nodo_actual.left is None and self.nodo_actual.right is None:
-            self.mensaje_reconstruido += self.nodo_actual.char
-            self.nodo_actual = self.arbol  # Volver a la raíz para el siguiente carácter
+        # Texto del nodo: carácter si es hoja, frecuencia si es nodo interno
+        # (los árboles canónicos no guardan frecuencias)
+        if nodo.char is not None:
+            texto = f"'{nodo.char}'"
+        elif nodo.freq is not None:
+            texto = str(nodo.freq)
+        else:
+            return
+        painter.setPen(self.color_texto)
+        painter.drawText(QRectF(posicion.x() - radio, posicion.y() - radio, 2 * radio, 2 * radio),
+                         Qt.AlignmentFlag.AlignCenter, texto)
 
-        self.indice_bit_actual += 1
-        self.update()
+    def _renderizar_estatico(self):
+        """
+        Dibuja en un QPixmap el árbol sin resaltar, solo con los nodos y ramas visibles
+        Con poco zoom se omiten primero los textos y después los círculos
+        """
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(int(self.width() * ratio), int(self.height() * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.GlobalColor.transparent)
+
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        self._aplicar_vista(painter)
+        visible = self._rect_visible()
+        radio_pantalla = self.RADIO_NODO * self.escala
+        con_circulos = radio_pantalla >= self.RADIO_MINIMO_CIRCULO
+        con_texto = radio_pantalla >= self.RADIO_MINIMO_TEXTO
+        radio = self.RADIO_NODO if con_circulos else 0
+
+        # Ramas visibles, juntas en una sola llamada de dibujo
+        lineas = []
+        etiquetas = []
+        nodos_visibles = []
+        for nodo, posicion in self.posiciones.items():
+            if visible.contains(posicion):
+                nodos_visibles.append(nodo)
+            for hijo, etiqueta in ((nodo.left, "0"), (nodo.right, "1")):
+                if hijo is None:
+                    continue
+                destino = self.posiciones[hijo]
+                # Las ramas verticales tienen ancho cero y QRectF.intersects las descartaría
+                if not QRectF(posicion, destino).normalized().adjusted(-1, -1, 1, 1).intersects(visible):
+                    continue
+                lineas.append(QLineF(posicion.x(), posicion.y() + radio, destino.x(), destino.y() - radio))
+                if con_texto:
+                    etiquetas.append((etiqueta, (posicion + destino) / 2))
+
+        painter.setPen(self.pluma_linea)
+        painter.drawLines(lineas)
+
+        painter.setFont(self.fuente_rama)
+        for etiqueta, medio in etiquetas:
+            # Etiqueta "0" a la izquierda de la rama y "1" a la derecha
+            painter.setPen(self.pluma_cero if etiqueta == "0" else self.pluma_uno)
+            desplazamiento_x = -20 if etiqueta == "0" else 12
+            painter.drawText(QPointF(medio.x() + desplazamiento_x, medio.y()), etiqueta)
+
+        if con_circulos:
+            painter.setFont(self.fuente_nodo)
+            for nodo in nodos_visibles:
+                color = self.color_hoja if nodo.char is not None else self.color_nodo_normal
+                self._dibujar_circulo(painter, nodo, color, self.pluma_nodo, con_texto)
+        painter.end()
+
+        self.cache_estatico = pixmap
+        self.desplazamiento_cache = QPointF(self.desplazamiento)
 
     def paintEvent(self, event):
         """
-        Evento de pintura: dibuja el árbol binario completo
+        Evento de pintura: copia el árbol ya dibujado y encima resalta el camino actual
         Muestra mensaje de instrucción si no hay árbol cargado
         """
         if not self.arbol:
@@ -120,104 +383,146 @@ class TreeVisualizationWidget(QWidget):
                            "Seleccione un archivo .bin para visualizar el árbol")
             return
 
+        if self.cache_estatico is None:
+            self._renderizar_estatico()
+
         painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        
-        # Dibujar el árbol centrado con espaciado compacto
-        self.dibujar_nodo(painter, self.arbol, self.width() // 2, 80, self.width() // 4, 100)
+        # Mientras se arrastra, la imagen guardada se corre sin volver a dibujarla
+        painter.drawPixmap(self.desplazamiento - self.desplazamiento_cache, self.cache_estatico)
+
+        self._aplicar_vista(painter)
+        radio_pantalla = self.RADIO_NODO * self.escala
+        radio = self.RADIO_NODO if radio_pantalla >= self.RADIO_MINIMO_CIRCULO else 0
+        painter.setPen(self.pluma_camino)
+        for padre, hijo in zip(self.camino, self.camino[1:]):
+            origen, destino = self.posiciones[padre], self.posiciones[hijo]
+            painter.drawLine(QLineF(origen.x(), origen.y() + radio, destino.x(), destino.y() - radio))
+
+        con_texto = radio_pantalla >= self.RADIO_MINIMO_TEXTO
+        painter.setFont(self.fuente_nodo)
+        if self.nodo_visitado is not None:
+            self._dibujar_circulo(painter, self.nodo_visitado, self.color_nodo_visitado, self.pluma_nodo, con_texto)
+        # Borde más grueso para resaltar el nodo actual
+        if self.nodo_actual is not None and self.nodo_actual != self.nodo_visitado:
+            self._dibujar_circulo(painter, self.nodo_actual, self.color_nodo_actual, self.pluma_nodo_actual,
+                                  con_texto)
 
-    def dibujar_nodo(self, painter, nodo, x, y, ancho_rama, separacion_y):
-        """
-        Dibuja recursivamente un nodo y sus hijos
-        Aplica colores según el estado del nodo en la animación
-        """
-        if not nodo:
+    def resizeEvent(self, event):
+        self.invalidar_cache()
+        super().resizeEvent(event)
+
+    def wheelEvent(self, event):
+        """Zoom con la rueda, manteniendo fijo el punto bajo el cursor"""
+        if not self.arbol:
             return
+        pasos = event.angleDelta().y() / 120
+        escala = min(max(self.escala * self.FACTOR_ZOOM ** pasos, self.ESCALA_MINIMA), self.ESCALA_MAXIMA)
+        cursor = event.position()
+        punto = (cursor - self.desplazamiento) / self.escala
+        self.escala = escala
+        self.desplazamiento = cursor - punto * escala
+        self.invalidar_cache()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self.arrastre = event.position()
+
+    def mouseMoveEvent(self, event):
+        if self.arrastre is not None:
+            self.desplazamiento += event.position() - self.arrastre
+            self.arrastre = event.position()
+            self.update()
 
-        # Determinar color del nodo según su estado en la animación
-        color_nodo = self.color_nodo_normal
-        if nodo == self.nodo_visitado:
-            color_nodo = self.color_nodo_visitado
-        elif nodo == self.nodo_actual:
-            color_nodo = self.color_nodo_actual
-        elif nodo.char is not None:  # Es una hoja
-            color_nodo = self.color_hoja
-
-        # Dibujar círculo del nodo
-        radio = 30
-        painter.setBrush(QBrush(color_nodo))
-        
-        # Borde más grueso para resaltar el nodo actual
-        if nodo == self.nodo_actual:
-            painter.setPen(QPen(QColor(0, 0, 0), 5))
-        else:
-            painter.setPen(QPen(self.color_texto, 3))
-            
-        painter.drawEllipse(int(x - radio), int(y - radio), radio * 2, radio * 2)
+    def mouseReleaseEvent(self, event):
+        if self.arrastre is not None:
+            self.arrastre = None
+            # Al soltar se dibuja lo que quedó a la vista
+            self.invalidar_cache()
 
-        # Texto del nodo: carácter si es hoja, frecuencia si es nodo interno
-        painter.setPen(self.color_texto)
-        if nodo.char is not None:
-            texto = f"'{nodo.char}'"
-        else:
-            texto = str(nodo.freq)
-        
-        font = painter.font()
-        font.setPointSize(11)
-        font.setBold(True)
-        painter.setFont(font)
-        
-        # Centrar texto en el nodo
-        rect_texto = painter.fontMetrics().boundingRect(texto)
-        painter.drawText(int(x - rect_texto.width() // 2), 
-                        int(y + rect_texto.height() // 2), texto)
-
-        # Dibujar ramas y nodos hijos recursivamente
-        if nodo.left:
-            x_izq = int(x - ancho_rama)
-            y_izq = int(y + separacion_y)
-            
-            # Línea hacia hijo izquierdo
-            painter.setPen(QPen(self.color_linea, 3))
-            painter.drawLine(int(x), int(y + radio), x_izq, int(y_izq - 30))
-            
-            # Etiqueta "0" para rama izquierda
-            painter.setPen(QColor(0, 0, 255))
-            font.setPointSize(10)
-            font.setBold(True)
-            painter.setFont(font)
-            painter.drawText(int(x - ancho_rama // 2 - 10), int(y + separacion_y // 2), "0")
-            
-            # Llamada recursiva para hijo izquierdo
-            self.dibujar_nodo(painter, nodo.left, x_izq, y_izq, int(ancho_rama // 2.0), separacion_y)
+    def mouseDoubleClickEvent(self, event):
+        self.ajustar_vista()
 
-        if nodo.right:
-            x_der = int(x + ancho_rama)
-            y_der = int(y + separacion_y)
-            
-            # Línea hacia hijo derecho
-            painter.setPen(QPen(self.color_linea, 3))
-            painter.drawLine(int(x), int(y + radio), x_der, int(y_der - 30))
-            
-            # Etiqueta "1" para rama derecha
-            painter.setPen(QColor(255, 0, 0))
-            font.setPointSize(10)
-            font.setBold(True)
-            painter.setFont(font)
-            painter.drawText(int(x + ancho_rama // 2 + 10), int(y + separacion_y // 2), "1")
-            
-            # Llamada recursiva para hijo derecho
-            self.dibujar_nodo(painter, nodo.right, x_der, y_der, int(ancho_rama // 2.0), separacion_y)
-
-    def get_mensaje_reconstruido(self):
-        """Retorna el mensaje reconstruido hasta el momento actual"""
-        return self.mensaje_reconstruido
+    def get_mensaje_reconstruido(self, ultimos=None):
+        """Retorna el mensaje reconstruido hasta el momento actual (o sus últimos caracteres)"""
+        if not self.modelo:
+            return ""
+        return self.modelo.texto(self.indice_bit_actual, ultimos)
 
     def get_progreso(self):
         """Calcula el porcentaje de progreso de la decodificación"""
-        if not self.bits:
+        if not self.modelo or not self.modelo.total_bits:
             return 0
-        return (self.indice_bit_actual / len(self.bits)) * 100
+        return (self.indice_bit_actual / self.modelo.total_bits) * 100
+
+class VistaTexto(QAbstractScrollArea):
+    """
+    Muestra el mensaje descifrado sin copiarlo entero a un QLabel
+    El texto vive en un AlmacenTexto (memoria acotada, el resto en disco), se corta en filas
+    de ancho fijo y en cada pintado solo se leen las filas visibles
+    Los saltos de línea y las tabulaciones se muestran como ⏎ y →
+    """
+    VISIBLES = str.maketrans({"\n": "⏎", "\r": "␍", "\t": "→"})
+    MARGEN = 6
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.almacen = AlmacenTexto()
+        self.fuente = QFont("Monospace", 12)
+        self.fuente.setStyleHint(QFont.StyleHint.Monospace)
+        self.metricas = QFontMetrics(self.fuente)
+        self.columnas = 1
+        self.setMinimumHeight(120)
+        self.setStyleSheet("background-color: #e8f4f8; border: 2px solid #4CAF50; border-radius: 8px;")
+
+    def limpiar(self):
+        self.almacen.cerrar()
+        self.almacen = AlmacenTexto()
+        self._actualizar_barra()
+        self.viewport().update()
+
+    def agregar(self, texto):
+        """Agrega texto al final; si la vista estaba al final, lo sigue"""
+        barra = self.verticalScrollBar()
+        al_final = barra.value() >= barra.maximum()
+        self.almacen.agregar(texto)
+        self._actualizar_barra()
+        if al_final:
+            barra.setValue(barra.maximum())
+        self.viewport().update()
+
+    def _filas_visibles(self):
+        return max((self.viewport().height() - 2 * self.MARGEN) // self.metricas.lineSpacing(), 1)
+
+    def _actualizar_barra(self):
+        ancho = self.viewport().width() - 2 * self.MARGEN
+        self.columnas = max(ancho // max(self.metricas.horizontalAdvance("M"), 1), 1)
+        filas = -(-len(self.almacen) // self.columnas)
+        barra = self.verticalScrollBar()
+        barra.setRange(0, max(filas - self._filas_visibles(), 0))
+        barra.setPageStep(self._filas_visibles())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._actualizar_barra()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.setFont(self.fuente)
+        painter.setPen(QColor(0, 0, 0))
+        primera = self.verticalScrollBar().value()
+        filas = self._filas_visibles() + 1
+        texto = self.almacen.leer(primera * self.columnas, (primera + filas) * self.columnas)
+        texto = texto.translate(self.VISIBLES)
+
+        alto = self.metricas.lineSpacing()
+        y = self.MARGEN + self.metricas.ascent()
+        for i in range(0, len(texto), self.columnas):
+            painter.drawText(self.MARGEN, y, texto[i:i + self.columnas])
+            y += alto
 
 class MainWindow(QMainWindow):
     #Configuración de la ventana
@@ -241,9 +546,15 @@ class MainWindow(QMainWindow):
     CAMPO_ALTURA = 30
     CAMPO_FUENTE = 14
 
+    #Caracteres de la animación que se muestran debajo del árbol
+    CARACTERES_ANIMACION = 80
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Decodificador Gráfico de Mensajes")
+        # Los mensajes escritos usan el primer diccionario de texto, si conviene
+        self.diccionarios = [d for d in cargar_diccionarios(CARPETA_DICCIONARIOS) if not d.modo_bytes]
+        self.hilo_decodificacion = None
         self.configurar_ventana()
         self.configurar_estilos()
         self.setup_ui()
@@ -307,6 +618,7 @@ class MainWindow(QMainWindow):
         self.setup_menu_principal()
         self.setup_pantalla_codificar()
         self.setup_pantalla_decodificar()
+        self.stacked_widget.currentChanged.connect(self.cambiar_pantalla)
         self.stacked_widget.setCurrentIndex(0)
 
     def crear_boton(self, texto, altura=None):
@@ -414,24 +726,68 @@ class MainWindow(QMainWindow):
         btn_seleccionar = self.crear_boton("Seleccionar archivo a descifrar")
         btn_seleccionar.clicked.connect(self.seleccionar_archivo_abrir)
         layout.addWidget(btn_seleccionar)
+
+        # Progreso de la decodificación en segundo plano
+        progreso_layout = QHBoxLayout()
+        self.barra_progreso = QProgressBar()
+        self.barra_progreso.setRange(0, 100)
+        self.btn_cancelar = QPushButton("Cancelar")
+        self.btn_cancelar.clicked.connect(self.cancelar_decodificacion)
+        progreso_layout.addWidget(self.barra_progreso)
+        progreso_layout.addWidget(self.btn_cancelar)
+        self.barra_progreso.hide()
+        self.btn_cancelar.hide()
+        layout.addLayout(progreso_layout)
         
         # Widget de visualización del árbol
         self.tree_widget = TreeVisualizationWidget()
+        self.tree_widget.posicion_cambiada.connect(self.mostrar_posicion)
         layout.addWidget(self.tree_widget)
-        
-        # Mensaje reconstruido
+
+        # Controles de la animación: pausa, velocidad, posición en bits y salto a un carácter
+        controles_layout = QHBoxLayout()
+        self.btn_reproducir = QPushButton("Pausar")
+        self.btn_reproducir.clicked.connect(self.alternar_animacion)
+        self.combo_velocidad = QComboBox()
+        self.combo_velocidad.addItems([nombre for nombre, _, _ in TreeVisualizationWidget.MODOS_AVANCE])
+        self.combo_velocidad.currentIndexChanged.connect(self.tree_widget.cambiar_modo)
+        self.slider_posicion = QSlider(Qt.Orientation.Horizontal)
+        self.slider_posicion.valueChanged.connect(self.mover_posicion)
+        self.spin_caracter = QSpinBox()
+        self.spin_caracter.setPrefix("Carácter ")
+        self.spin_caracter.valueChanged.connect(self.saltar_a_caracter)
+        controles_layout.addWidget(self.btn_reproducir)
+        controles_layout.addWidget(self.combo_velocidad)
+        controles_layout.addWidget(self.slider_posicion, 1)
+        controles_layout.addWidget(self.spin_caracter)
+        layout.addLayout(controles_layout)
+
+        # Posición de la animación y lo que lleva decodificado
+        self.label_animacion = QLabel("")
+        self.label_animacion.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.label_animacion.setStyleSheet("font-size: 16px;")
+        layout.addWidget(self.label_animacion)
+        
+        # Estado de la decodificación y mensaje reconstruido
         self.label_mensaje = QLabel("")
         self.label_mensaje.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.label_mensaje.setWordWrap(True)
-        self.label_mensaje.setStyleSheet("font-size: 18px; padding: 15px; background-color: #e8f4f8; border: 2px solid #4CAF50; border-radius: 8px; min-height: 60px;")
+        self.label_mensaje.setStyleSheet("font-size: 18px;")
         layout.addWidget(self.label_mensaje)
+        self.vista_mensaje = VistaTexto()
+        layout.addWidget(self.vista_mensaje)
         
         # Botón volver
         btn_volver = self.crear_boton("Volver al menú")
         btn_volver.clicked.connect(lambda: self.stacked_widget.setCurrentIndex(0))
         layout.addWidget(btn_volver)
         
-        self.stacked_widget.addWidget(widget)
+        self.indice_pantalla_decodificar = self.stacked_widget.addWidget(widget)
+
+    def cambiar_pantalla(self, indice):
+        # Fuera de la pantalla de descifrado la animación no tiene que seguir corriendo
+        if indice != self.indice_pantalla_decodificar and self.tree_widget.animacion_activa:
+            self.tree_widget.detener_animacion()
+            self.btn_reproducir.setText("Reanudar")
 
     def seleccionar_archivo_guardar(self):
         archivo, _ = QFileDialog.getSaveFileName(
@@ -458,39 +814,133 @@ class MainWindow(QMainWindow):
             "Archivos binarios (*.bin);;Todos los archivos (*.*)"
         )
         if archivo:
-            try:
-                # Cargar el árbol en el widget de visualización
-                if self.tree_widget.cargar_arbol(archivo):
-                    # Iniciar animación automáticamente
-                    self.tree_widget.iniciar_animacion()
-                    
-                    # Mostrar mensaje inicial
-                    self.label_mensaje.setText("Iniciando decodificación...")
-                    
-                    # Timer para actualizar el mensaje reconstruido
-                    self.timer_mensaje = QTimer()
-                    self.timer_mensaje.timeout.connect(self.actualizar_mensaje)
-                    self.timer_mensaje.start(100)
-                    
-                else:
-                    QMessageBox.critical(self, "Error", "No se pudo cargar el archivo")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Error: {str(e)}")
-
-    def actualizar_mensaje(self):
+            # Un archivo nuevo reemplaza a la decodificación anterior
+            self.cancelar_decodificacion()
+            self.tree_widget.detener_animacion()
+            self.vista_mensaje.limpiar()
+            self.label_mensaje.setText("Cargando archivo...")
+            self.barra_progreso.setValue(0)
+            self.barra_progreso.show()
+            self.btn_cancelar.show()
+
+            hilo = self.hilo_decodificacion = HiloDecodificacion(archivo, self)
+            hilo.arbol_listo.connect(self.mostrar_arbol)
+            hilo.trozo_decodificado.connect(self.agregar_trozo)
+            hilo.progreso.connect(self.actualizar_progreso)
+            hilo.terminado.connect(self.terminar_decodificacion)
+            hilo.fallo.connect(self.fallo_decodificacion)
+            # Al terminar o cancelarse, el hilo se libera; si no, cada archivo dejaría uno vivo
+            hilo.finished.connect(self.liberar_hilo)
+            hilo.finished.connect(hilo.deleteLater)
+            hilo.start()
+
+    def _es_hilo_actual(self):
+        # Descarta las señales que un hilo cancelado haya dejado en la cola
+        return self.sender() is self.hilo_decodificacion
+
+    def liberar_hilo(self):
         """
-        Actualiza el mensaje reconstruido en tiempo real
-        Se ejecuta cada 100ms durante la animación
+        El hilo que terminó se va a borrar con deleteLater: no debe quedar referenciado
         """
-        mensaje_actual = self.tree_widget.get_mensaje_reconstruido()
-        if mensaje_actual:
-            self.label_mensaje.setText(f"Mensaje descifrado:\n{mensaje_actual}")
+        if self._es_hilo_actual():
+            self.hilo_decodificacion = None
+
+    def mostrar_arbol(self, arbol, modelo):
+        if not self._es_hilo_actual():
+            return
+        self.tree_widget.cargar_arbol(arbol, modelo)
+        for control, maximo in ((self.slider_posicion, modelo.total_bits), (self.spin_caracter, len(modelo))):
+            control.blockSignals(True)
+            control.setRange(0, maximo)
+            control.setValue(0)
+            control.blockSignals(False)
+        # Iniciar animación automáticamente
+        self.tree_widget.iniciar_animacion()
+        self.mostrar_posicion(0)
+        self.label_mensaje.setText("Decodificando...")
+
+    def mostrar_posicion(self, posicion):
+        """
+        Sincroniza los controles con la posición de la animación
+        El texto sale del modelo ya decodificado, no se arma carácter por carácter
+        """
+        modelo = self.tree_widget.modelo
+        if modelo is None:
+            return
+        completos = modelo.simbolos_completos(posicion)
+        for control, valor in ((self.slider_posicion, posicion), (self.spin_caracter, completos)):
+            control.blockSignals(True)
+            control.setValue(valor)
+            control.blockSignals(False)
+        self.btn_reproducir.setText("Pausar" if self.tree_widget.animacion_activa else "Reanudar")
+        texto = self.tree_widget.get_mensaje_reconstruido(self.CARACTERES_ANIMACION)
+        self.label_animacion.setText(f"Bit {posicion} de {modelo.total_bits} · "
+                                     f"carácter {completos} de {len(modelo)}\n{texto}")
+
+    def alternar_animacion(self):
+        if self.tree_widget.animacion_activa:
+            self.tree_widget.detener_animacion()
         else:
-            self.label_mensaje.setText("Decodificando...")
-        
-        # Detener timer cuando se complete la decodificación
-        if self.tree_widget.get_progreso() >= 100:
-            self.timer_mensaje.stop()
+            # Al final de la animación, reanudar vuelve a empezar
+            if self.tree_widget.get_progreso() >= 100:
+                self.tree_widget.ir_a_bit(0)
+            self.tree_widget.iniciar_animacion()
+        self.btn_reproducir.setText("Pausar" if self.tree_widget.animacion_activa else "Reanudar")
+
+    def mover_posicion(self, posicion):
+        if posicion != self.tree_widget.indice_bit_actual:
+            self.tree_widget.ir_a_bit(posicion)
+
+    def saltar_a_caracter(self, indice):
+        self.tree_widget.ir_a_simbolo(indice)
+
+    def agregar_trozo(self, texto):
+        """
+        Muestra el mensaje a medida que el hilo entrega trozos decodificados
+        """
+        if not self._es_hilo_actual():
+            return
+        # Solo se agrega el trozo nuevo; la vista pinta las filas visibles
+        self.vista_mensaje.agregar(texto)
+        self.label_mensaje.setText(f"Mensaje descifrado: {len(self.vista_mensaje.almacen)} caracteres...")
+
+    def actualizar_progreso(self, valor):
+        if self._es_hilo_actual():
+            self.barra_progreso.setValue(valor)
+
+    def terminar_decodificacion(self):
+        if not self._es_hilo_actual():
+            return
+        self.barra_progreso.hide()
+        self.btn_cancelar.hide()
+        cantidad = len(self.vista_mensaje.almacen)
+        self.label_mensaje.setText(f"Mensaje descifrado: {cantidad} caracteres" if cantidad
+                                   else "Mensaje descifrado: (vacío)")
+
+    def fallo_decodificacion(self, error):
+        if not self._es_hilo_actual():
+            return
+        self.barra_progreso.hide()
+        self.btn_cancelar.hide()
+        self.label_mensaje.setText("")
+        QMessageBox.critical(self, "Error", f"No se pudo cargar el archivo: {error}")
+
+    def cancelar_decodificacion(self):
+        if self.hilo_decodificacion is None:
+            return
+        hilo, self.hilo_decodificacion = self.hilo_decodificacion, None
+        if hilo.isRunning():
+            # El hilo revisa el pedido entre trozos, así que la espera es corta
+            hilo.requestInterruption()
+            hilo.wait()
+            self.label_mensaje.setText("Decodificación cancelada")
+        self.barra_progreso.hide()
+        self.btn_cancelar.hide()
+
+    def closeEvent(self, event):
+        self.cancelar_decodificacion()
+        self.vista_mensaje.almacen.cerrar()
+        super().closeEvent(event)
 
     def codificar_mensaje(self):
         if not hasattr(self, "archivo_actual"):
@@ -503,8 +953,22 @@ class MainWindow(QMainWindow):
             return
             
         try:
-            tabla, bits = comprimir_mensaje(mensaje, self.archivo_actual)
-            QMessageBox.information(self, "Éxito", "Mensaje cifrado")
+            # Se guardan las frecuencias para que el árbol muestre sus pesos al descifrar, salvo que
+            # el diccionario deje el archivo más chico: ese formato no lleva tabla y el árbol se
+            # dibuja sin pesos en los nodos internos
+            diccionario = self.diccionarios[0] if self.diccionarios else None
+            # El límite solo cambia el árbol si el de Huffman es más profundo; con más caracteres
+            # distintos de los que caben en LONGITUD_MAXIMA_ARBOL bits se cifra sin límite
+            longitud_maxima = LONGITUD_MAXIMA_ARBOL if len(set(mensaje)) <= 1 << LONGITUD_MAXIMA_ARBOL else None
+            tabla, bits = comprimir_mensaje(mensaje, self.archivo_actual, con_frecuencias=True,
+                                            diccionario=diccionario, longitud_maxima=longitud_maxima)
+            with open(self.archivo_actual, "rb") as f:
+                version, _ = leer_version(f.read(len(MAGIA) + 1))
+            if version == VERSION_DICCIONARIO:
+                QMessageBox.information(self, "Éxito", f"Mensaje cifrado con el diccionario «{diccionario.nombre}». "
+                                        "Al descifrarlo, el árbol no mostrará las frecuencias")
+            else:
+                QMessageBox.information(self, "Éxito", "Mensaje cifrado")
             self.campo_mensaje.clear()
             self.label_archivo.clear()
             delattr(self, "archivo_actual")
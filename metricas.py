@@ -0,0 +1,150 @@
+#Métricas por etapa de comprimir_mensaje y leer_y_decomprimir.
+#Solo se miden dentro de `with perfilar() as metricas:`; fuera de ese bloque etapa() devuelve
+#un objeto vacío compartido y no se toma ningún tiempo
+import contextvars
+import time
+from contextlib import contextmanager
+
+_actual = contextvars.ContextVar("metricas", default=None)
+
+#tracemalloc se importa solo al perfilar con memoria=True
+tracemalloc = None
+
+def _cargar_tracemalloc():
+    global tracemalloc
+    if tracemalloc is None:
+        import tracemalloc as modulo
+        tracemalloc = modulo
+
+def _tamano(datos):
+    #Bytes que ocupa la entrada de una etapa; el texto se cuenta en UTF-8
+    if datos is None:
+        return 0
+    if isinstance(datos, int):
+        return datos
+    if isinstance(datos, str):
+        return len(datos.encode("utf-8", "surrogatepass"))
+    return len(datos)
+
+class _EtapaNula:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        return False
+
+    def salida(self, datos):
+        pass
+
+    def simbolos(self, cantidad):
+        pass
+
+_NULA = _EtapaNula()
+
+class Etapa:
+    def __init__(self, metricas, nombre, entrada, simbolos):
+        self.metricas = metricas
+        self.nombre = nombre
+        self.bytes_entrada = _tamano(entrada)
+        self.datos_salida = None
+        self.cantidad_simbolos = simbolos
+        self.inicio = None
+        self.memoria_inicial = None
+
+    def __enter__(self):
+        if self.metricas.memoria:
+            tracemalloc.reset_peak()
+            self.memoria_inicial = tracemalloc.get_traced_memory()[0]
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excepcion):
+        segundos = time.perf_counter() - self.inicio
+        memoria_pico = None
+        if self.memoria_inicial is not None:
+            memoria_pico = tracemalloc.get_traced_memory()[1] - self.memoria_inicial
+        #El tamaño de la salida se calcula después de tomar el tiempo
+        self.metricas.registrar(self.nombre, segundos, self.bytes_entrada, _tamano(self.datos_salida),
+                                self.cantidad_simbolos, memoria_pico)
+        return False
+
+    def salida(self, datos):
+        self.datos_salida = datos
+
+    def simbolos(self, cantidad):
+        self.cantidad_simbolos = cantidad
+
+class Metricas:
+    def __init__(self, memoria=False, callback=None):
+        #memoria: mide el pico de memoria reservada en cada etapa con tracemalloc (más lento)
+        self.memoria = memoria
+        #callback(nombre, registro) se llama al terminar cada etapa
+        self.callback = callback
+        self.etapas = {}
+
+    def registrar(self, nombre, segundos, bytes_entrada, bytes_salida, simbolos, memoria_pico):
+        total = self.etapas.setdefault(nombre, {"llamadas": 0, "segundos": 0.0, "bytes_entrada": 0,
+                                                "bytes_salida": 0, "simbolos": 0, "memoria_pico": None})
+        total["llamadas"] += 1
+        total["segundos"] += segundos
+        total["bytes_entrada"] += bytes_entrada
+        total["bytes_salida"] += bytes_salida
+        total["simbolos"] += simbolos
+        if memoria_pico is not None:
+            total["memoria_pico"] = max(total["memoria_pico"] or 0, memoria_pico)
+
+        if self.callback is not None:
+            self.callback(nombre, {"segundos": segundos, "bytes_entrada": bytes_entrada,
+                                   "bytes_salida": bytes_salida, "simbolos": simbolos,
+                                   "memoria_pico": memoria_pico})
+
+    def como_dict(self):
+        resultado = {}
+        for nombre, total in self.etapas.items():
+            resultado[nombre] = dict(total)
+            resultado[nombre]["simbolos_por_segundo"] = (total["simbolos"] / total["segundos"]
+                                                         if total["segundos"] else None)
+        return resultado
+
+    def como_prometheus(self, prefijo="huffman"):
+        #Formato de texto de Prometheus, una serie por etapa
+        series = (("llamadas", "counter", "Veces que se ejecutó la etapa", "llamadas_total"),
+                  ("segundos", "counter", "Tiempo de reloj acumulado", "segundos_total"),
+                  ("bytes_entrada", "counter", "Bytes que entraron a la etapa", "bytes_entrada_total"),
+                  ("bytes_salida", "counter", "Bytes que salieron de la etapa", "bytes_salida_total"),
+                  ("simbolos", "counter", "Símbolos procesados", "simbolos_total"),
+                  ("memoria_pico", "gauge", "Pico de memoria reservada", "memoria_pico_bytes"))
+        lineas = []
+        for clave, tipo, ayuda, sufijo in series:
+            metrica = f"{prefijo}_etapa_{sufijo}"
+            valores = [(nombre, total[clave]) for nombre, total in self.etapas.items() if total[clave] is not None]
+            if not valores:
+                continue
+            lineas.append(f"# HELP {metrica} {ayuda}")
+            lineas.append(f"# TYPE {metrica} {tipo}")
+            for nombre, valor in valores:
+                lineas.append(f'{metrica}{{etapa="{nombre}"}} {valor}')
+        return "\n".join(lineas) + "\n" if lineas else ""
+
+def etapa(nombre, entrada=None, simbolos=0):
+    #entrada: datos (o cantidad de bytes) que recibe la etapa; solo se miden si hay métricas activas
+    metricas = _actual.get()
+    if metricas is None:
+        return _NULA
+    return Etapa(metricas, nombre, entrada, simbolos)
+
+@contextmanager
+def perfilar(memoria=False, callback=None):
+    metricas = Metricas(memoria, callback)
+    if memoria:
+        _cargar_tracemalloc()
+    iniciar_traza = memoria and not tracemalloc.is_tracing()
+    if iniciar_traza:
+        tracemalloc.start()
+    token = _actual.set(metricas)
+    try:
+        yield metricas
+    finally:
+        _actual.reset(token)
+        if iniciar_traza:
+            tracemalloc.stop()
@@ -0,0 +1,59 @@
+"""
+Núcleo del códec, sin interfaz gráfica
+Reúne la API de los módulos del códec y los importa recién cuando se usa uno de sus nombres:
+    import nucleo
+    nucleo.comprimir_mensaje(texto, "salida.bin")
+La interfaz (main.py) es la única que importa PyQt6 y solo se carga al ejecutar `python main.py`
+"""
+import importlib
+
+#Nombre exportado: módulo donde está definido
+_EXPORTADOS = {
+    "calcular_frecuencias": "árbol_huffman",
+    "construir_arbol_huffman": "árbol_huffman",
+    "generar_codigos": "árbol_huffman",
+    "ArbolCompacto": "árbol_huffman",
+    "compactar": "árbol_huffman",
+    "generar_codigos_canonicos": "árbol_huffman",
+    "informe_limite": "árbol_huffman",
+    "comprimir_mensaje": "encriptar",
+    "comprimir_stream": "encriptar",
+    "leer_y_decomprimir": "desencriptar",
+    "descomprimir_archivo": "desencriptar",
+    "descomprimir_stream": "desencriptar",
+    "iterar_descompresion": "desencriptar",
+    "decodificar_rango": "desencriptar",
+    "leer_cabecera": "desencriptar",
+    "abrir_cabecera": "desencriptar",
+    "CACHE_TABLAS": "desencriptar",
+    "comprimir_bloques": "bloques",
+    "descomprimir_bloques": "bloques",
+    "iterar_bloques": "bloques",
+    "CodificadorAdaptativo": "adaptativo",
+    "DecodificadorAdaptativo": "adaptativo",
+    "comprimir_adaptativo": "adaptativo",
+    "descomprimir_adaptativo": "adaptativo",
+    "iterar_descompresion_adaptativa": "adaptativo",
+    "entrenar_diccionario": "diccionario",
+    "guardar_diccionario": "diccionario",
+    "cargar_diccionario": "diccionario",
+    "cargar_diccionarios": "diccionario",
+    "perfilar": "metricas",
+    "comprimir_mensaje_async": "asincrono",
+    "descomprimir_async": "asincrono",
+    "leer_y_decomprimir_async": "asincrono",
+}
+
+__all__ = sorted(_EXPORTADOS)
+
+def __getattr__(nombre):
+    modulo = _EXPORTADOS.get(nombre)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    valor = getattr(importlib.import_module(modulo), nombre)
+    #Las siguientes búsquedas encuentran el nombre sin pasar por aquí
+    globals()[nombre] = valor
+    return valor
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTADOS))
@@ -0,0 +1,38 @@
+import io
+import unittest
+
+from adaptativo import comprimir_adaptativo, descomprimir_adaptativo
+
+class TestDescompresionPorTrozos(unittest.TestCase):
+    def ida_y_vuelta(self, mensaje, tamano_bloque):
+        comprimido = io.BytesIO()
+        comprimir_adaptativo(io.BytesIO(mensaje) if isinstance(mensaje, bytes) else io.StringIO(mensaje),
+                             comprimido)
+        salida = io.BytesIO() if isinstance(mensaje, bytes) else io.StringIO()
+        descomprimir_adaptativo(io.BytesIO(comprimido.getvalue()), salida, tamano_bloque=tamano_bloque)
+        return salida.getvalue()
+
+    def test_trozos_pequenos_bytes(self):
+        mensaje = b"hello world" * 20 + bytes(range(256))
+        for tamano in (1, 2, 3):
+            with self.subTest(tamano=tamano):
+                self.assertEqual(self.ida_y_vuelta(mensaje, tamano), mensaje)
+
+    def test_trozos_pequenos_texto(self):
+        mensaje = "ñandú, 😀 y árbol " * 20
+        for tamano in (1, 2, 3):
+            with self.subTest(tamano=tamano):
+                self.assertEqual(self.ida_y_vuelta(mensaje, tamano), mensaje)
+
+    def test_vacio_en_writer_binario(self):
+        for tamano in (1, 2, 3):
+            with self.subTest(tamano=tamano):
+                self.assertEqual(self.ida_y_vuelta(b"", tamano), b"")
+
+    def test_entrada_vacia(self):
+        salida = io.BytesIO()
+        descomprimir_adaptativo(io.BytesIO(b""), salida)
+        self.assertEqual(salida.getvalue(), b"")
+
+if __name__ == "__main__":
+    unittest.main()
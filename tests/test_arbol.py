@@ -0,0 +1,57 @@
+import random
+import unittest
+
+from árbol_huffman import HuffmanNode, construir_arbol_huffman, generar_codigos
+
+def construir_arbol_original(frecuencias):
+    #Constructor original: reordena la lista y saca los dos primeros con pop(0) en cada unión
+    nodos = [HuffmanNode(char, freq) for char, freq in frecuencias.items()]
+    while len(nodos) > 1:
+        nodos.sort(key=lambda n: n.freq)
+        izquierdo = nodos.pop(0)
+        derecho = nodos.pop(0)
+        padre = HuffmanNode(None, izquierdo.freq + derecho.freq)
+        padre.left = izquierdo
+        padre.right = derecho
+        nodos.append(padre)
+    return nodos[0] if nodos else None
+
+def tabla_sin_empates(aleatorio, cantidad):
+    #Potencias de 2 distintas: cada nodo pesa la suma de un conjunto de hojas y dos conjuntos
+    #distintos nunca suman lo mismo, así que no hay empates en ningún paso
+    exponentes = aleatorio.sample(range(60), cantidad)
+    return {chr(0x100 + i): (1 << e) for i, e in enumerate(exponentes)}
+
+class TestConstructorEquivalente(unittest.TestCase):
+    def test_codigos_iguales_al_original(self):
+        aleatorio = random.Random(2920)
+        for prueba in range(300):
+            frecuencias = tabla_sin_empates(aleatorio, aleatorio.randint(2, 60))
+            if prueba % 2:
+                #Las frecuencias ordenadas toman el camino de dos colas
+                frecuencias = dict(sorted(frecuencias.items(), key=lambda par: par[1]))
+            with self.subTest(prueba=prueba):
+                self.assertEqual(generar_codigos(construir_arbol_huffman(frecuencias)),
+                                 generar_codigos(construir_arbol_original(frecuencias)))
+
+    def test_codigos_iguales_en_forma_compacta(self):
+        aleatorio = random.Random(7)
+        for _ in range(100):
+            frecuencias = tabla_sin_empates(aleatorio, aleatorio.randint(2, 60))
+            self.assertEqual(generar_codigos(construir_arbol_huffman(frecuencias, compacto=True)),
+                             generar_codigos(construir_arbol_original(frecuencias)))
+
+    def test_vacio(self):
+        self.assertIsNone(construir_arbol_huffman({}))
+        self.assertEqual(generar_codigos(construir_arbol_huffman({})), {})
+        self.assertEqual(generar_codigos(construir_arbol_original({})), {})
+
+    def test_un_simbolo(self):
+        #El original devolvía la hoja sola, con código vacío; ahora cuelga de una raíz
+        #para que el código tenga un bit
+        self.assertEqual(generar_codigos(construir_arbol_original({"a": 5})), {"a": ""})
+        self.assertEqual(generar_codigos(construir_arbol_huffman({"a": 5})), {"a": "0"})
+        self.assertEqual(generar_codigos(construir_arbol_huffman({"a": 5}, compacto=True)), {"a": "0"})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import asincrono
+from asincrono import comprimir_mensaje_async, leer_y_decomprimir_async
+from encriptar import comprimir_mensaje
+
+class TestCancelarAlAbrir(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.ruta = os.path.join(directorio.name, "salida.bin")
+        #open se detiene en el hilo hasta que la tarea ya esté cancelada
+        self.abriendo = threading.Event()
+        self.seguir = threading.Event()
+        self.abiertos = []
+
+        def open_lento(*argumentos):
+            self.abriendo.set()
+            self.seguir.wait()
+            archivo = open(*argumentos)
+            self.abiertos.append(archivo)
+            return archivo
+
+        parche = mock.patch.object(asincrono, "open", open_lento, create=True)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    async def cancelar_mientras_abre(self, corrutina):
+        tarea = asyncio.create_task(corrutina)
+        await asyncio.get_running_loop().run_in_executor(None, self.abriendo.wait)
+        tarea.cancel()
+        await asyncio.sleep(0)
+        self.seguir.set()
+        with self.assertRaises(asyncio.CancelledError):
+            await tarea
+        self.assertEqual(len(self.abiertos), 1)
+        self.assertTrue(self.abiertos[0].closed)
+
+    async def test_lectura(self):
+        comprimir_mensaje("se cancela al abrir " * 50, self.ruta)
+        await self.cancelar_mientras_abre(leer_y_decomprimir_async(self.ruta))
+
+    async def test_escritura_no_deja_archivo(self):
+        await self.cancelar_mientras_abre(comprimir_mensaje_async("se cancela al abrir " * 50, self.ruta))
+        self.assertFalse(os.path.exists(self.ruta))
+
+class TestIdaYVuelta(unittest.IsolatedAsyncioTestCase):
+    async def test_texto_y_bytes(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = os.path.join(directorio, "salida.bin")
+            for mensaje in ("ida y vuelta asíncrona " * 400, bytes(range(256)) * 30):
+                with self.subTest(tipo=type(mensaje).__name__):
+                    await comprimir_mensaje_async(mensaje, ruta, tamano_bloque=1000)
+                    self.assertEqual(await leer_y_decomprimir_async(ruta), mensaje)
+
+if __name__ == "__main__":
+    unittest.main()
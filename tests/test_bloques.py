@@ -0,0 +1,38 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from bloques import _en_orden, comprimir_bloques, descomprimir_bloques, iterar_bloques
+
+class TestBloques(unittest.TestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.ruta = os.path.join(directorio.name, "bloques.bin")
+
+    def test_ida_y_vuelta_en_procesos(self):
+        for mensaje in ("bloques que se decodifican en paralelo " * 300, bytes(range(256)) * 40):
+            with self.subTest(tipo=type(mensaje).__name__):
+                comprimir_bloques(mensaje, self.ruta, tamano_bloque=1000, procesos=2)
+                self.assertEqual(descomprimir_bloques(self.ruta, procesos=2), mensaje)
+                with open(self.ruta, "rb") as f:
+                    self.assertEqual(type(mensaje)().join(iterar_bloques(f)), mensaje)
+
+    def test_ventana_acotada(self):
+        #No se pide un argumento nuevo hasta entregar el resultado más antiguo
+        pedidos = []
+
+        def argumentos():
+            for i in range(20):
+                pedidos.append(i)
+                yield i
+
+        with ThreadPoolExecutor(2) as executor:
+            resultados = _en_orden(executor, lambda x: x * 2, argumentos(), 3)
+            for entregados, resultado in enumerate(resultados, 1):
+                self.assertEqual(resultado, (entregados - 1) * 2)
+                self.assertLessEqual(len(pedidos), entregados + 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,241 @@
+import io
+import mmap
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import desencriptar
+from árbol_huffman import construir_arbol_huffman, generar_codigos
+from desencriptar import (CacheTablas, codigos_enteros, construir_tablas_decodificacion, decodificar_cuerpo,
+                          decodificar_mensaje, decodificar_rango, descomprimir_archivo, leer_cabecera,
+                          leer_y_decomprimir)
+from encriptar import comprimir_mensaje
+from formato import MAGIA, VERSION_CANONICA, VERSION_FRECUENCIAS, leer_version
+
+def decodificar_original(bits, arbol):
+    #Recorrido bit a bit del árbol, como lo hacía decodificar_mensaje antes de las tablas
+    mensaje = ""
+    nodo_actual = arbol
+    for bit in bits:
+        nodo_actual = nodo_actual.left if bit == "0" else nodo_actual.right
+        if nodo_actual.left is None and nodo_actual.right is None:
+            mensaje += nodo_actual.char
+            nodo_actual = arbol
+    return mensaje
+
+class TestDecodificarMensaje(unittest.TestCase):
+    def setUp(self):
+        aleatorio = random.Random(11)
+        self.mensaje = "".join(aleatorio.choice("aaaabbbccdeéñ😀") for _ in range(500))
+        frecuencias = {char: self.mensaje.count(char) for char in dict.fromkeys(self.mensaje)}
+        self.arbol = construir_arbol_huffman(frecuencias)
+        codigos = generar_codigos(self.arbol)
+        self.bits = "".join(codigos[char] for char in self.mensaje)
+
+    def test_igual_al_recorrido_original(self):
+        self.assertEqual(decodificar_mensaje(self.bits, self.arbol), self.mensaje)
+
+    def test_codigo_incompleto_al_final_se_ignora(self):
+        #Cortar el último código en cualquier punto da lo mismo que el recorrido original
+        for corte in range(1, 12):
+            bits = self.bits[:-corte]
+            with self.subTest(corte=corte):
+                self.assertEqual(decodificar_mensaje(bits, self.arbol), decodificar_original(bits, self.arbol))
+
+    def test_decodificar_cuerpo_sigue_siendo_estricto(self):
+        tablas = construir_tablas_decodificacion(codigos_enteros(self.arbol))
+        #El último código tiene más de un bit: sin su último bit queda incompleto
+        bits = self.bits[:-1]
+        padding = (8 - len(bits) % 8) % 8
+        cuerpo = int(bits + "0" * padding, 2).to_bytes((len(bits) + padding) // 8, byteorder="big")
+        with self.assertRaises(ValueError):
+            decodificar_cuerpo(cuerpo, padding, tablas)
+
+class _ConArchivo(unittest.TestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.ruta = os.path.join(directorio.name, "salida.bin")
+
+    def version(self):
+        with open(self.ruta, "rb") as f:
+            return leer_version(f.read(len(MAGIA) + 1))
+
+class TestFormatoCanonico(_ConArchivo):
+    MENSAJES = ("longitudes canónicas en la cabecera", "x", "ñandú 😀 " * 40,
+                b"\x00\xff" * 100 + bytes(range(256)), b"z")
+
+    def test_ida_y_vuelta(self):
+        for mensaje in self.MENSAJES:
+            with self.subTest(mensaje=mensaje[:20]):
+                comprimir_mensaje(mensaje, self.ruta)
+                self.assertEqual(self.version(), (VERSION_CANONICA, isinstance(mensaje, bytes)))
+                cabecera, _, _ = leer_cabecera(self.ruta)
+                self.assertEqual(set(cabecera["longitudes"]), set(mensaje))
+                self.assertEqual(leer_y_decomprimir(self.ruta), mensaje)
+
+class TestFormatoFrecuencias(_ConArchivo):
+    def test_frecuencias_mayores_a_dos_bytes(self):
+        #Antes las frecuencias ocupaban 2 bytes: más de 65.535 apariciones no cabían
+        mensaje = "a" * 70000 + "b" * 300 + "\U0010FFFF" * 3 + "\x00"
+        comprimir_mensaje(mensaje, self.ruta, con_frecuencias=True)
+        self.assertEqual(self.version(), (VERSION_FRECUENCIAS, False))
+        cabecera, _, _ = leer_cabecera(self.ruta)
+        self.assertEqual(cabecera["frecuencias"], {"a": 70000, "b": 300, "\U0010FFFF": 3, "\x00": 1})
+        self.assertEqual(leer_y_decomprimir(self.ruta), mensaje)
+
+    def test_modo_bytes(self):
+        mensaje = bytes(range(256)) * 300 + b"\x00" * 70000
+        comprimir_mensaje(mensaje, self.ruta, con_frecuencias=True)
+        self.assertEqual(self.version(), (VERSION_FRECUENCIAS, True))
+        cabecera, _, _ = leer_cabecera(self.ruta)
+        self.assertEqual(cabecera["frecuencias"][0], 70300)
+        self.assertEqual(leer_y_decomprimir(self.ruta), mensaje)
+
+class TestDecodificarRango(_ConArchivo):
+    def rangos(self, largo, intervalo):
+        aleatorio = random.Random(largo)
+        #Alrededor de los puntos del índice, al final, vacíos, fuera del mensaje y al azar
+        for punto in (intervalo, 5 * intervalo, largo // 2 - largo // 2 % intervalo):
+            yield from ((punto - 1, punto + 1), (punto, punto + 1), (punto + 1, punto + intervalo))
+        yield from ((0, largo), (largo - 3, largo), (largo - 3, largo + 50), (10, 10), (-5, 4), (largo + 1, largo + 9))
+        for _ in range(30):
+            inicio = aleatorio.randrange(largo)
+            yield inicio, inicio + aleatorio.randrange(1, 3 * desencriptar.TAMANO_RANGO)
+
+    def test_rangos_entre_bloques_y_puntos_del_indice(self):
+        aleatorio = random.Random(7)
+        texto = "".join(aleatorio.choice("aaaabbcdeéñ😀 ") for _ in range(60000))
+        datos = bytes(aleatorio.choice(b"aaaabbc\x00\xff") for _ in range(60000))
+        for mensaje in (texto, datos):
+            for intervalo in (None, 1, 37):
+                comprimir_mensaje(mensaje, self.ruta, intervalo_indice=intervalo)
+                _, cuerpo, _ = leer_cabecera(self.ruta)
+                #El cuerpo ocupa varias vueltas de TAMANO_RANGO bytes
+                self.assertGreater(len(cuerpo), 2 * desencriptar.TAMANO_RANGO)
+                for inicio, fin in self.rangos(len(mensaje), intervalo or 64):
+                    with self.subTest(tipo=type(mensaje).__name__, intervalo=intervalo, inicio=inicio, fin=fin):
+                        self.assertEqual(decodificar_rango(self.ruta, inicio, fin), mensaje[max(inicio, 0):fin])
+
+class TestCacheTablas(unittest.TestCase):
+    def cabecera(self, *simbolos):
+        return {"modo_bytes": False, "longitudes": {char: len(simbolos) - 1 for char in simbolos}}
+
+    def test_aciertos_y_fallos(self):
+        cache = CacheTablas(capacidad=4)
+        tablas = cache.tablas(self.cabecera("a", "b"))
+        #Otra cabecera con la misma tabla comparte la entrada; el árbol y los códigos también
+        self.assertIs(cache.tablas(self.cabecera("a", "b")), tablas)
+        cache.arbol(self.cabecera("a", "b"))
+        cache.codigos(self.cabecera("a", "b"))
+        cache.tablas(self.cabecera("c", "d"))
+        estadisticas = cache.estadisticas()
+        self.assertEqual((estadisticas["aciertos"], estadisticas["fallos"], estadisticas["expulsiones"]), (3, 2, 0))
+        self.assertEqual(estadisticas["tamano"], 2)
+        self.assertEqual(estadisticas["tasa_aciertos"], 3 / 5)
+
+    def test_expulsa_la_usada_hace_mas_tiempo(self):
+        cache = CacheTablas(capacidad=2)
+        primera = cache.tablas(self.cabecera("a", "b"))
+        cache.tablas(self.cabecera("c", "d"))
+        #Usar la primera la deja como la más reciente: sale la segunda
+        cache.tablas(self.cabecera("a", "b"))
+        cache.tablas(self.cabecera("e", "f"))
+        self.assertEqual(cache.estadisticas()["expulsiones"], 1)
+        self.assertIs(cache.tablas(self.cabecera("a", "b")), primera)
+        fallos = cache.estadisticas()["fallos"]
+        cache.tablas(self.cabecera("c", "d"))
+        self.assertEqual(cache.estadisticas()["fallos"], fallos + 1)
+        self.assertEqual(cache.estadisticas()["tamano"], 2)
+
+    def test_limpiar(self):
+        cache = CacheTablas()
+        cache.tablas(self.cabecera("a", "b"))
+        cache.limpiar()
+        self.assertEqual(cache.estadisticas()["tamano"], 0)
+        self.assertEqual(cache.estadisticas()["fallos"], 0)
+
+class _MapaRegistrado(mmap.mmap):
+    abiertos = []
+
+    def __init__(self, *argumentos, **opciones):
+        _MapaRegistrado.abiertos.append(self)
+
+class TestMapaCerrado(unittest.TestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.ruta = os.path.join(directorio.name, "salida.bin")
+        self.mensaje = "el mapa se cierra al terminar " * 500
+        comprimir_mensaje(self.mensaje, self.ruta, intervalo_indice=64)
+        _MapaRegistrado.abiertos = []
+        parche = mock.patch.object(desencriptar.mmap, "mmap", _MapaRegistrado)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def assertMapasCerrados(self):
+        self.assertTrue(_MapaRegistrado.abiertos)
+        self.assertTrue(all(mapa.closed for mapa in _MapaRegistrado.abiertos))
+
+    def test_leer_y_decomprimir(self):
+        self.assertEqual(leer_y_decomprimir(self.ruta), self.mensaje)
+        self.assertMapasCerrados()
+
+    def test_descomprimir_archivo(self):
+        salida = io.StringIO()
+        descomprimir_archivo(self.ruta, salida)
+        self.assertEqual(salida.getvalue(), self.mensaje)
+        self.assertMapasCerrados()
+
+    def test_decodificar_rango_que_corta_antes_del_final(self):
+        self.assertEqual(decodificar_rango(self.ruta, 100, 200), self.mensaje[100:200])
+        self.assertMapasCerrados()
+
+    def test_leer_cabecera_devuelve_copias(self):
+        cabecera, cuerpo, _ = leer_cabecera(self.ruta)
+        self.assertIsInstance(cuerpo, bytes)
+        self.assertIsInstance(cabecera["indice"], bytes)
+        self.assertMapasCerrados()
+
+class TestArchivoTruncado(unittest.TestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = directorio.name
+        ruta = os.path.join(self.directorio, "completo.bin")
+        comprimir_mensaje("un archivo cortado da ValueError " * 300, ruta)
+        with open(ruta, "rb") as f:
+            self.datos = f.read()
+        _MapaRegistrado.abiertos = []
+        parche = mock.patch.object(desencriptar.mmap, "mmap", _MapaRegistrado)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def escribir(self, datos):
+        ruta = os.path.join(self.directorio, "truncado.bin")
+        with open(ruta, "wb") as f:
+            f.write(datos)
+        return ruta
+
+    def test_cabecera_truncada(self):
+        for largo in (0, 3, 4, 6, 12):
+            ruta = self.escribir(self.datos[:largo])
+            with self.subTest(largo=largo):
+                with self.assertRaises(ValueError):
+                    leer_cabecera(ruta)
+                with self.assertRaises(ValueError):
+                    leer_y_decomprimir(ruta)
+
+    def test_cuerpo_truncado(self):
+        #Se corta en medio de un código, para que el último quede incompleto
+        ruta = self.escribir(self.datos[:len(self.datos) // 2] + b"\xff")
+        with self.assertRaises(ValueError):
+            leer_y_decomprimir(ruta)
+        with self.assertRaises(ValueError):
+            descomprimir_archivo(ruta, io.StringIO())
+        self.assertTrue(all(mapa.closed for mapa in _MapaRegistrado.abiertos))
+
+if __name__ == "__main__":
+    unittest.main()
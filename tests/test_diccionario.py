@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+
+from desencriptar import arbol_de_cabecera, leer_cabecera, leer_y_decomprimir
+from diccionario import entrenar_diccionario
+from encriptar import comprimir_mensaje
+from formato import MAGIA, VERSION_DICCIONARIO, leer_version
+
+class TestDiccionarioConLimite(unittest.TestCase):
+    def setUp(self):
+        #Frecuencias de Fibonacci: el código más largo pasa de 8 bits
+        fib = [1, 1]
+        while len(fib) < 14:
+            fib.append(fib[-1] + fib[-2])
+        self.corpus = "".join(chr(ord("a") + i) * freq for i, freq in enumerate(fib))
+        self.diccionario = entrenar_diccionario("fibonacci", self.corpus)
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.ruta = os.path.join(directorio.name, "salida.bin")
+
+    def version(self):
+        with open(self.ruta, "rb") as f:
+            return leer_version(f.read(len(MAGIA) + 1))[0]
+
+    def test_diccionario_sin_limite(self):
+        comprimir_mensaje(self.corpus, self.ruta, diccionario=self.diccionario)
+        self.assertEqual(self.version(), VERSION_DICCIONARIO)
+
+    def test_diccionario_gana_sobre_las_frecuencias(self):
+        #La versión 5 no lleva tabla: el árbol se rehace desde el diccionario, sin pesos
+        comprimir_mensaje(self.corpus, self.ruta, con_frecuencias=True, diccionario=self.diccionario)
+        self.assertEqual(self.version(), VERSION_DICCIONARIO)
+        cabecera, _, _ = leer_cabecera(self.ruta)
+        self.assertNotIn("frecuencias", cabecera)
+        self.assertIsNone(arbol_de_cabecera(cabecera).freq)
+        self.assertEqual(leer_y_decomprimir(self.ruta), self.corpus)
+
+    def test_limite_menor_que_el_diccionario(self):
+        self.assertGreater(max(self.diccionario.longitudes.values()), 8)
+        tabla, _ = comprimir_mensaje(self.corpus, self.ruta, diccionario=self.diccionario, longitud_maxima=8)
+        self.assertNotEqual(self.version(), VERSION_DICCIONARIO)
+        self.assertLessEqual(max(map(len, tabla.values())), 8)
+        self.assertEqual(leer_y_decomprimir(self.ruta), self.corpus)
+
+if __name__ == "__main__":
+    unittest.main()
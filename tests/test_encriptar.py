@@ -0,0 +1,37 @@
+import os
+import tempfile
+import unittest
+
+from árbol_huffman import calcular_frecuencias, construir_arbol_huffman, generar_codigos
+from desencriptar import arbol_de_cabecera, leer_cabecera, leer_y_decomprimir
+from encriptar import comprimir_mensaje
+
+class TestLongitudMaxima(unittest.TestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.ruta = os.path.join(directorio.name, "salida.bin")
+
+    def test_arbol_que_cabe_se_guarda_tal_cual(self):
+        mensaje = "el árbol de huffman ya cabe en doce bits " * 20
+        comprimir_mensaje(mensaje, self.ruta, con_frecuencias=True, longitud_maxima=12)
+        cabecera, _, _ = leer_cabecera(self.ruta)
+        self.assertNotIn("limite", cabecera)
+        #Se dibuja el árbol de las uniones de Huffman, no el canónico
+        original = construir_arbol_huffman(calcular_frecuencias(mensaje))
+        self.assertEqual(generar_codigos(arbol_de_cabecera(cabecera)), generar_codigos(original))
+
+    def test_arbol_mas_profundo_se_limita(self):
+        #Frecuencias de Fibonacci: el código más largo pasa de 8 bits
+        fib = [1, 1]
+        while len(fib) < 14:
+            fib.append(fib[-1] + fib[-2])
+        mensaje = "".join(chr(ord("a") + i) * freq for i, freq in enumerate(fib))
+        tabla, _ = comprimir_mensaje(mensaje, self.ruta, con_frecuencias=True, longitud_maxima=8)
+        cabecera, _, _ = leer_cabecera(self.ruta)
+        self.assertEqual(cabecera["limite"], 8)
+        self.assertLessEqual(max(map(len, tabla.values())), 8)
+        self.assertEqual(leer_y_decomprimir(self.ruta), mensaje)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import io
+import os
+import tempfile
+import unittest
+
+import lote
+from adaptativo import comprimir_adaptativo
+from bloques import comprimir_bloques
+
+class TestDecodificacionPorTrozos(unittest.TestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = directorio.name
+        self.mensaje = bytes(range(256)) * 40
+
+    def ruta(self, nombre):
+        return os.path.join(self.directorio, nombre)
+
+    def test_bloques_se_entregan_de_a_uno(self):
+        comprimir_bloques(self.mensaje, self.ruta("v3.bin"), tamano_bloque=1000, procesos=1)
+        trozos = list(lote._decodificar(self.ruta("v3.bin")))
+        self.assertEqual(len(trozos), -(-len(self.mensaje) // 1000))
+        self.assertEqual(b"".join(trozos), self.mensaje)
+
+    def test_adaptativo_se_entrega_por_trozos(self):
+        with open(self.ruta("v6.bin"), "wb") as f:
+            comprimir_adaptativo(io.BytesIO(self.mensaje), f)
+        trozos = list(lote._decodificar(self.ruta("v6.bin")))
+        self.assertGreater(len(trozos), 0)
+        self.assertEqual(b"".join(trozos), self.mensaje)
+
+    def test_descomprimir_y_verificar(self):
+        comprimir_bloques(self.mensaje, self.ruta("v3.bin"), tamano_bloque=1000, procesos=1)
+        resultado = lote.descomprimir_archivo(self.ruta("v3.bin"), self.ruta("v3"), con_verificacion=True)
+        self.assertTrue(resultado["verificado"])
+        with open(self.ruta("v3"), "rb") as f:
+            self.assertEqual(f.read(), self.mensaje)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+#Camino rápido con NumPy para contar frecuencias y empaquetar el mensaje.
+#Si NumPy no está instalado, HAY_NUMPY es False y se usa el camino en Python puro
+import importlib.util
+
+#Importar NumPy cuesta ~100 ms, así que solo se busca al arrancar y se importa
+#la primera vez que un mensaje es lo bastante grande para usarlo
+HAY_NUMPY = importlib.util.find_spec("numpy") is not None
+np = None
+
+#Por debajo de este tamaño el costo de preparar los arreglos no compensa
+UMBRAL_NUMPY = 1 << 16
+
+#Símbolos que se empaquetan por vuelta, para acotar la memoria de los arreglos de bits
+TROZO_NUMPY = 1 << 18
+
+def conviene_numpy(mensaje):
+    return HAY_NUMPY and isinstance(mensaje, (str, bytes, bytearray, memoryview)) and len(mensaje) >= UMBRAL_NUMPY
+
+def _cargar_numpy():
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+
+def _a_arreglo(mensaje):
+    #Texto como puntos de código (uint32) o bytes como uint8
+    if isinstance(mensaje, str):
+        return np.frombuffer(mensaje.encode("utf-32-le", "surrogatepass"), dtype=np.uint32), chr
+    return np.frombuffer(mensaje, dtype=np.uint8), int
+
+def _a_entero(simbolo):
+    return ord(simbolo) if isinstance(simbolo, str) else simbolo
+
+def contar_frecuencias(mensaje):
+    _cargar_numpy()
+    arreglo, a_simbolo = _a_arreglo(mensaje)
+    conteos = np.bincount(arreglo)
+    presentes = np.flatnonzero(conteos)
+    return {a_simbolo(int(s)): int(c) for s, c in zip(presentes, conteos[presentes])}
+
+def empaquetar_mensaje(mensaje, codigos, acumulador=0, bits_acumulados=0):
+    #Devuelve los bytes completos y los bits que sobran (menos de 8) como (acumulador, cantidad)
+    _cargar_numpy()
+    arreglo, _ = _a_arreglo(mensaje)
+    if len(arreglo) == 0:
+        return bytearray(), acumulador, bits_acumulados
+
+    #Los bits pendientes de la llamada anterior van delante del primer trozo
+    sobrante = np.array([(acumulador >> (bits_acumulados - 1 - j)) & 1 for j in range(bits_acumulados)],
+                        dtype=np.uint8)
+    bytes_codificados = bytearray()
+
+    #Cada símbolo tiene su fila de bits de ancho fijo y la longitud real de su código
+    simbolos = sorted(codigos, key=_a_entero)
+    claves = np.array([_a_entero(s) for s in simbolos], dtype=np.int64)
+    longitud_maxima = max(longitud for _, longitud in codigos.values())
+    tabla_largo = np.array([codigos[s][1] for s in simbolos], dtype=np.int64)
+    tabla_bits = np.zeros((len(simbolos), longitud_maxima), dtype=np.uint8)
+    for fila, simbolo in enumerate(simbolos):
+        codigo, longitud = codigos[simbolo]
+        for j in range(longitud):
+            tabla_bits[fila, j] = (codigo >> (longitud - 1 - j)) & 1
+    columnas = np.arange(longitud_maxima)
+
+    for i in range(0, len(arreglo), TROZO_NUMPY):
+        parte = arreglo[i:i+TROZO_NUMPY]
+        filas = np.minimum(np.searchsorted(claves, parte), len(claves) - 1)
+        if (claves[filas] != parte).any():
+            raise KeyError("El mensaje tiene símbolos que no están en la tabla de códigos")
+        largos = tabla_largo[filas]
+
+        #Al filtrar las filas con la máscara de longitudes, los bits de cada código
+        #quedan uno tras otro en su posición final (la suma acumulada de las longitudes)
+        bits = tabla_bits[filas][columnas < largos[:, None]]
+
+        bits = np.concatenate((sobrante, bits))
+        completos = len(bits) - len(bits) % 8
+        bytes_codificados += np.packbits(bits[:completos]).tobytes()
+        sobrante = bits[completos:]
+
+    acumulador = 0
+    for bit in sobrante.tolist():
+        acumulador = (acumulador << 1) | bit
+    return bytes_codificados, acumulador, len(sobrante)
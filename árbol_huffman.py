@@ -1,11 +1,115 @@
+import heapq
+from array import array
+from collections import deque
+
+from vectorizado import conviene_numpy, contar_frecuencias
+
 class HuffmanNode:
+    __slots__ = ("char", "freq", "left", "right")
+
     def __init__(self, char=None, freq=0):
         self.char = char
         self.freq = freq
         self.left = None
         self.right = None
 
+class ArbolCompacto:
+    #Árbol en arreglos paralelos: el nodo i tiene hijos izquierdo[i] y derecho[i] (-1 si no hay),
+    #símbolo simbolos[i] (None en los nodos internos) y peso pesos[i]. No hay un objeto por nodo,
+    #así que ocupa menos y pickle no recorre el árbol: los hijos van como bloques de bytes y los
+    #símbolos y pesos como dos listas planas
+    __slots__ = ("izquierdo", "derecho", "simbolos", "pesos", "raiz")
+
+    def __init__(self):
+        self.izquierdo = array("i")
+        self.derecho = array("i")
+        self.simbolos = []
+        self.pesos = []
+        self.raiz = -1
+
+    def __len__(self):
+        return len(self.simbolos)
+
+    def agregar(self, char=None, freq=0, izquierdo=-1, derecho=-1):
+        self.izquierdo.append(izquierdo)
+        self.derecho.append(derecho)
+        self.simbolos.append(char)
+        self.pesos.append(freq)
+        return len(self.simbolos) - 1
+
+    def nodo(self, indice=None):
+        return NodoCompacto(self, self.raiz if indice is None else indice)
+
+    def a_nodos(self):
+        #El mismo árbol con un HuffmanNode por nodo
+        nodos = [HuffmanNode(char, freq) for char, freq in zip(self.simbolos, self.pesos)]
+        for nodo, izquierdo, derecho in zip(nodos, self.izquierdo, self.derecho):
+            if izquierdo >= 0:
+                nodo.left = nodos[izquierdo]
+            if derecho >= 0:
+                nodo.right = nodos[derecho]
+        return nodos[self.raiz]
+
+class NodoCompacto:
+    #Vista de un nodo de ArbolCompacto con la interfaz de HuffmanNode, para el código que recorre
+    #el árbol nodo a nodo. Dos vistas del mismo nodo son iguales, así que sirven de clave
+    __slots__ = ("arbol", "indice")
+
+    def __init__(self, arbol, indice):
+        self.arbol = arbol
+        self.indice = indice
+
+    @property
+    def char(self):
+        return self.arbol.simbolos[self.indice]
+
+    @property
+    def freq(self):
+        return self.arbol.pesos[self.indice]
+
+    @property
+    def left(self):
+        hijo = self.arbol.izquierdo[self.indice]
+        return NodoCompacto(self.arbol, hijo) if hijo >= 0 else None
+
+    @property
+    def right(self):
+        hijo = self.arbol.derecho[self.indice]
+        return NodoCompacto(self.arbol, hijo) if hijo >= 0 else None
+
+    def __eq__(self, otro):
+        return isinstance(otro, NodoCompacto) and otro.arbol is self.arbol and otro.indice == self.indice
+
+    def __hash__(self):
+        return hash((id(self.arbol), self.indice))
+
+def raiz_de(arbol):
+    #Adaptador: la raíz como nodo, sea el árbol de HuffmanNode o compacto
+    if isinstance(arbol, ArbolCompacto):
+        return arbol.nodo() if len(arbol) else None
+    return arbol
+
+def compactar(arbol):
+    #ArbolCompacto equivalente a un árbol de nodos, numerado en preorden
+    if arbol is None or isinstance(arbol, ArbolCompacto):
+        return arbol
+    compacto = ArbolCompacto()
+    pila = [(arbol, -1, False)]
+    while pila:
+        nodo, padre, derecho = pila.pop()
+        indice = compacto.agregar(nodo.char, nodo.freq)
+        if padre >= 0:
+            (compacto.derecho if derecho else compacto.izquierdo)[padre] = indice
+        for hijo, es_derecho in ((nodo.right, True), (nodo.left, False)):
+            if hijo is not None:
+                pila.append((hijo, indice, es_derecho))
+    compacto.raiz = 0
+    return compacto
+
 def calcular_frecuencias(mensaje):
+    if conviene_numpy(mensaje):
+        return contar_frecuencias(mensaje)
+
     frecuencias = {}
     for c in mensaje:
         if c in frecuencias:
@@ -14,29 +118,76 @@ def calcular_frecuencias(mensaje):
             frecuencias[c] = 1
     return frecuencias
 
-def construir_arbol_huffman(frecuencias):
-    #Para lista de nodos
-    nodos = [HuffmanNode(char, freq) for char, freq in frecuencias.items()]
+def _construir_con_dos_colas(arbol, hojas):
+    #Tiempo lineal: las hojas ya vienen ordenadas y los padres se crean en orden
+    pesos = arbol.pesos
+    hojas = deque(hojas)
+    padres = deque()
+
+    def menor():
+        #En empate gana la hoja, igual que en el orden estable original
+        if not padres or (hojas and pesos[hojas[0]] <= pesos[padres[0]]):
+            return hojas.popleft()
+        return padres.popleft()
+
+    while len(hojas) + len(padres) > 1:
+        izquierdo = menor()
+        derecho = menor()
+        padres.append(arbol.agregar(None, pesos[izquierdo] + pesos[derecho], izquierdo, derecho))
 
-    while len(nodos) > 1:
-        # Ordenar nodos por frecuencia ascendente
-        nodos.sort(key=lambda n: n.freq)
+    return (padres or hojas)[0]
 
-        # Tomar los dos de menor frecuencia
-        izquierdo = nodos.pop(0)
-        derecho = nodos.pop(0)
+def construir_arbol_huffman(frecuencias, compacto=False):
+    #Se construye sobre índices de un ArbolCompacto; con compacto=False se devuelve como HuffmanNode
+    arbol = ArbolCompacto()
+    for char, freq in frecuencias.items():
+        arbol.agregar(char, freq)
+    cantidad = len(arbol)
+    if not cantidad:
+        return None
 
-        # Crear nodo padre
-        padre = HuffmanNode(None, izquierdo.freq + derecho.freq)
-        padre.left = izquierdo
-        padre.right = derecho
+    pesos = arbol.pesos
+    # Un único símbolo cuelga de una raíz para que su código tenga al menos un bit
+    if cantidad == 1:
+        arbol.raiz = arbol.agregar(None, pesos[0], 0)
+    elif all(a <= b for a, b in zip(pesos, pesos[1:])):
+        arbol.raiz = _construir_con_dos_colas(arbol, range(cantidad))
+    else:
+        # Los empates se rompen por orden de creación, que es el índice del nodo,
+        # para que el árbol sea siempre el mismo
+        heap = [(freq, indice) for indice, freq in enumerate(pesos)]
+        heapq.heapify(heap)
 
-        # Insertar nuevamente
-        nodos.append(padre)
+        while len(heap) > 1:
+            # Tomar los dos de menor frecuencia
+            _, izquierdo = heapq.heappop(heap)
+            _, derecho = heapq.heappop(heap)
 
-    return nodos[0] if nodos else None
+            # Crear nodo padre e insertarlo nuevamente
+            freq = pesos[izquierdo] + pesos[derecho]
+            heapq.heappush(heap, (freq, arbol.agregar(None, freq, izquierdo, derecho)))
+
+        arbol.raiz = heap[0][1]
+
+    return arbol if compacto else arbol.a_nodos()
+
+def _codigos_compacto(arbol):
+    tabla = {}
+    pila = [(arbol.raiz, "")]
+    while pila:
+        indice, codigo = pila.pop()
+        char = arbol.simbolos[indice]
+        if char is not None:
+            tabla[char] = codigo
+            continue
+        for hijo, bit in ((arbol.derecho[indice], "1"), (arbol.izquierdo[indice], "0")):
+            if hijo >= 0:
+                pila.append((hijo, codigo + bit))
+    return tabla
 
 def generar_codigos(nodo, codigo_actual="", tabla=None):
+    if isinstance(nodo, ArbolCompacto):
+        return _codigos_compacto(nodo) if len(nodo) else {}
     if tabla is None:
         tabla = {}
 
@@ -50,3 +201,160 @@ def generar_codigos(nodo, codigo_actual="", tabla=None):
     return tabla
 
 
+
+def calcular_longitudes(arbol):
+    longitudes = {}
+    if arbol is None:
+        return longitudes
+
+    if isinstance(arbol, ArbolCompacto):
+        #Los índices de los hijos se siguen en los arreglos, sin crear vistas
+        izquierdo, derecho, simbolos = arbol.izquierdo, arbol.derecho, arbol.simbolos
+        pila = [(arbol.raiz, 0)] if len(arbol) else []
+        while pila:
+            indice, profundidad = pila.pop()
+            if simbolos[indice] is not None:
+                longitudes[simbolos[indice]] = profundidad
+            else:
+                for hijo in (derecho[indice], izquierdo[indice]):
+                    if hijo >= 0:
+                        pila.append((hijo, profundidad + 1))
+        return longitudes
+
+    pila = [(arbol, 0)]
+    while pila:
+        nodo, profundidad = pila.pop()
+        if nodo.char is not None:
+            longitudes[nodo.char] = profundidad
+        else:
+            for hijo in (nodo.right, nodo.left):
+                if hijo is not None:
+                    pila.append((hijo, profundidad + 1))
+    return longitudes
+
+def calcular_disposicion(arbol):
+    #(columna, nivel) de cada nodo para dibujar el árbol. Las hojas ocupan columnas consecutivas
+    #de izquierda a derecha y cada padre queda centrado sobre sus hijos: ningún par de nodos
+    #se superpone, sea cual sea la forma del árbol
+    posiciones = {}
+    arbol = raiz_de(arbol)
+    if arbol is None:
+        return posiciones
+
+    columna = 0
+    pila = [(arbol, 0, False)]
+    while pila:
+        nodo, nivel, visto = pila.pop()
+        hijos = [hijo for hijo in (nodo.left, nodo.right) if hijo is not None]
+        if not hijos:
+            posiciones[nodo] = (columna, nivel)
+            columna += 1
+        elif visto:
+            posiciones[nodo] = ((posiciones[hijos[0]][0] + posiciones[hijos[-1]][0]) / 2, nivel)
+        else:
+            pila.append((nodo, nivel, True))
+            pila.extend((hijo, nivel + 1, False) for hijo in reversed(hijos))
+    return posiciones
+
+def limitar_longitudes(frecuencias, longitud_maxima):
+    #Package-merge: longitudes óptimas sin pasar de longitud_maxima
+    if not 1 <= longitud_maxima <= 255 or len(frecuencias) > 1 << longitud_maxima:
+        raise ValueError(f"No caben {len(frecuencias)} símbolos en códigos de hasta {longitud_maxima} bits")
+    simbolos = list(frecuencias)
+    if len(simbolos) <= 1:
+        return {char: 1 for char in simbolos}
+
+    #Cada elemento es (peso, hoja) o (peso, (elemento, elemento)); en empate va primero la hoja
+    hojas = sorted(((frecuencias[char], i) for i, char in enumerate(simbolos)), key=lambda par: par[0])
+    actual = hojas
+    for _ in range(longitud_maxima - 1):
+        paquetes = [(actual[i][0] + actual[i+1][0], (actual[i], actual[i+1]))
+                    for i in range(0, len(actual) - 1, 2)]
+        actual = list(heapq.merge(hojas, paquetes, key=lambda par: par[0]))
+
+    #La longitud de cada símbolo es la cantidad de veces que aparece en los 2n-2 elegidos
+    longitudes = [0] * len(simbolos)
+    pila = [elemento for _, elemento in actual[:2 * len(simbolos) - 2]]
+    while pila:
+        elemento = pila.pop()
+        if isinstance(elemento, int):
+            longitudes[elemento] += 1
+        else:
+            pila.extend(hijo for _, hijo in elemento)
+    return {char: longitudes[i] for i, char in enumerate(simbolos)}
+
+def calcular_longitudes_limitadas(frecuencias, longitud_maxima=None, arbol=None):
+    #Si el árbol de Huffman ya respeta el límite se usan sus longitudes tal cual
+    if arbol is None:
+        arbol = construir_arbol_huffman(frecuencias, compacto=True)
+    longitudes = calcular_longitudes(arbol)
+    if longitud_maxima is None or not longitudes or max(longitudes.values()) <= longitud_maxima:
+        return longitudes
+    return limitar_longitudes(frecuencias, longitud_maxima)
+
+def informe_limite(frecuencias, longitud_maxima):
+    #Cuánto se pierde de compresión al limitar la longitud de los códigos
+    libres = calcular_longitudes(construir_arbol_huffman(frecuencias, compacto=True))
+    limitadas = calcular_longitudes_limitadas(frecuencias, longitud_maxima)
+    bits_libres = sum(frecuencias[char] * longitud for char, longitud in libres.items())
+    bits_limitados = sum(frecuencias[char] * longitud for char, longitud in limitadas.items())
+    return {"longitud_maxima": longitud_maxima,
+            "longitud_sin_limite": max(libres.values(), default=0),
+            "bits_sin_limite": bits_libres,
+            "bits_con_limite": bits_limitados,
+            "perdida": (bits_limitados - bits_libres) / bits_libres if bits_libres else 0.0}
+
+def ordenar_canonico(longitudes):
+    return sorted(longitudes.items(), key=lambda par: (par[1], par[0]))
+
+def generar_codigos_canonicos(longitudes):
+    #Códigos consecutivos en orden (longitud, símbolo): basta con las longitudes para rehacerlos
+    codigos = {}
+    codigo = 0
+    longitud_anterior = 0
+    for char, longitud in ordenar_canonico(longitudes):
+        codigo <<= longitud - longitud_anterior
+        codigos[char] = (codigo, longitud)
+        codigo += 1
+        longitud_anterior = longitud
+    return codigos
+
+def _sumar_frecuencias(raiz):
+    #Los nodos internos pesan lo que sus hijos
+    pila = [(raiz, False)]
+    while pila:
+        nodo, visto = pila.pop()
+        if nodo.char is not None:
+            continue
+        if visto:
+            nodo.freq = sum(hijo.freq for hijo in (nodo.left, nodo.right) if hijo is not None)
+        else:
+            pila.append((nodo, True))
+            pila.extend((hijo, False) for hijo in (nodo.left, nodo.right) if hijo is not None)
+
+def construir_arbol_canonico(longitudes, frecuencias=None):
+    #Árbol equivalente a los códigos canónicos; sin frecuencias los nodos no tienen peso
+    if not longitudes:
+        return None
+
+    raiz = HuffmanNode(None, None)
+    for char, (codigo, longitud) in generar_codigos_canonicos(longitudes).items():
+        nodo = raiz
+        for i in range(longitud - 1, 0, -1):
+            if (codigo >> i) & 1:
+                if nodo.right is None:
+                    nodo.right = HuffmanNode(None, None)
+                nodo = nodo.right
+            else:
+                if nodo.left is None:
+                    nodo.left = HuffmanNode(None, None)
+                nodo = nodo.left
+        hoja = HuffmanNode(char, frecuencias[char] if frecuencias is not None else None)
+        if codigo & 1:
+            nodo.right = hoja
+        else:
+            nodo.left = hoja
+
+    if frecuencias is not None:
+        _sumar_frecuencias(raiz)
+    return raiz